@@ -6,32 +6,83 @@ class MorphoLayoutLoader {
     constructor() {
         this.currentLayout = null;
         this.availableLayouts = [];
+        this.snapshot = null;
     }
 
     /**
      * 初期化：layouts.json を読み込み、保存されたレイアウトを適用
+     * 保存されたレイアウトがページ生成時のものと同じ（または未設定）なら、一覧の取得を待たずにそのまま使う
      */
     async init() {
         try {
+            this.snapshot = this.readSnapshot();
+            const savedLayout = localStorage.getItem('morpho-layout');
+            const pageLayout = this.snapshot?.layout;
+            if (pageLayout && (!savedLayout || savedLayout === pageLayout)) {
+                this.currentLayout = pageLayout;
+                this.revalidate();
+                console.log(`🎨 MorphoLayoutLoader: Layout "${this.currentLayout}" applied`);
+                return;
+            }
+
             // 1. layouts.json を読み込み
-            const response = await fetch('../layouts/layouts.json');
-            if (!response.ok) {
+            const data = await this.fetchLayouts();
+            if (!data) {
                 console.warn('layouts.json not found, using default');
                 return;
             }
-            const data = await response.json();
             this.availableLayouts = data.layouts || [];
 
-            // 2. 保存されたレイアウトまたはデフォルトを適用
-            const savedLayout = localStorage.getItem('morpho-layout') || 'default';
-            await this.applyLayout(savedLayout);
+            // 2. 保存されたレイアウトを適用
+            await this.applyLayout(savedLayout || 'default');
 
-            console.log(`🎨 MorphoLayoutLoader: Layout "${savedLayout}" applied`);
+            console.log(`🎨 MorphoLayoutLoader: Layout "${this.currentLayout}" applied`);
         } catch (error) {
             console.error('MorphoLayoutLoader init error:', error);
         }
     }
 
+    /**
+     * 最新の layouts.json を取得してレイアウト一覧を更新
+     */
+    async revalidate() {
+        const data = await this.fetchLayouts();
+        if (data?.layouts) {
+            this.availableLayouts = data.layouts;
+        }
+    }
+
+    /**
+     * layouts.json を取得（失敗時は null）
+     */
+    async fetchLayouts() {
+        try {
+            const response = await fetch('../layouts/layouts.json');
+            return response.ok ? await response.json() : null;
+        } catch {
+            return null;
+        }
+    }
+
+    /**
+     * public/ からの相対パスを、アセットマップでハッシュ付きの名前に解決したURL（未登録なら元のパス）
+     */
+    async resolveAsset(path) {
+        return window.MorphoLoader ? window.MorphoLoader.resolveAsset(path) : `../${path}`;
+    }
+
+    /**
+     * 生成時にページへ埋め込まれたマニフェストのスナップショット（無ければ null）
+     */
+    readSnapshot() {
+        try {
+            const element = document.getElementById('morpho-manifest');
+            return element ? JSON.parse(element.textContent) : null;
+        } catch {
+            return null;
+        }
+    }
+
     /**
      * レイアウトを適用
      */
@@ -42,6 +93,8 @@ class MorphoLayoutLoader {
             layoutId = 'default';
         }
 
+        const href = await this.resolveAsset(`layouts/${layout?.file || 'default.css'}`);
+
         // 既存のレイアウトCSSを削除
         const existingLink = document.getElementById('morpho-layout-css');
         if (existingLink) {
@@ -52,7 +105,7 @@ class MorphoLayoutLoader {
         const link = document.createElement('link');
         link.id = 'morpho-layout-css';
         link.rel = 'stylesheet';
-        link.href = `../layouts/${layout?.file || 'default.css'}`;
+        link.href = href;
 
         // テーマCSSの後に挿入
         const themeLink = document.getElementById('morpho-theme-css');
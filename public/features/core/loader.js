@@ -6,25 +6,40 @@ class MorphoLoader {
     constructor() {
         this.loadedModules = new Map();
         this.userSettings = this.loadUserSettings();
+        // スクリプトはスナップショットの後に置かれるので、この時点で読める
+        this.snapshot = this.readSnapshot();
+        this.assetMap = null;
     }
 
     /**
-     * 初期化：features.json を読み込み、有効な機能を動的にロード
+     * 初期化：バンドルのマニフェスト（なければ features.json）を読み込み、有効な機能をロード
+     * 機能を切り替えていなければページに埋め込まれたバンドルの情報で取得を待たずに読み込み、最新版は裏で確認する
      */
     async init() {
         try {
-            // 1. features.json を読み込み
-            const response = await fetch('../features/features.json');
-            if (!response.ok) {
-                console.error('Failed to load features.json');
+            const embedded = this.snapshot?.features;
+            const customized = Object.keys(this.userSettings.features || {}).length > 0;
+            if (embedded && !customized) {
+                await this.loadBundle(embedded, embedded.modules.map(id => ({ id })));
+                this.revalidate();
+                console.log(`✨ MorphoLoader: ${this.loadedModules.size} modules loaded`);
                 return;
             }
-            const data = await response.json();
 
-            // 2. 有効な機能のみ読み込み
-            for (const feature of data.features) {
-                if (this.isEnabled(feature)) {
-                    await this.loadModule(feature);
+            const bundle = await this.fetchJSON('../features/bundle.json');
+            if (bundle) {
+                await this.loadFromBundle(bundle);
+            } else {
+                // バンドル未生成の場合は従来どおり features.json から個別に読み込み
+                const data = await this.fetchJSON('../features/features.json');
+                if (!data) {
+                    console.error('Failed to load features.json');
+                    return;
+                }
+                for (const feature of data.features) {
+                    if (this.isEnabled(feature)) {
+                        await this.loadModule(feature);
+                    }
                 }
             }
 
@@ -34,6 +49,105 @@ class MorphoLoader {
         }
     }
 
+    /**
+     * バンドル（デフォルトで有効な機能と必須機能）を1回で読み込み、
+     * ユーザーが追加で有効にした機能だけを個別に読み込む
+     */
+    async loadFromBundle(bundle) {
+        const enabled = bundle.features.filter(feature => this.isEnabled(feature));
+        const enabledIds = new Set(enabled.map(feature => feature.id));
+
+        // ユーザーが同梱の機能を無効にしている場合はバンドルを使わない
+        if (bundle.modules.every(id => enabledIds.has(id))) {
+            await this.loadBundle(bundle, enabled);
+        }
+
+        // バンドルに含まれない（または実行できなかった）機能は個別に読み込み
+        for (const feature of enabled) {
+            if (!this.loadedModules.has(feature.id)) {
+                await this.loadModule(feature);
+            }
+        }
+    }
+
+    /**
+     * bundle.js を読み込み、実行された機能を読み込み済みにする
+     */
+    async loadBundle(bundle, features) {
+        await this.loadScript(`${await this.resolveAsset(`features/${bundle.bundle}`)}?v=${bundle.hash}`);
+        const executed = new Set(window.__morphoBundled || []);
+        for (const feature of features) {
+            if (executed.has(feature.id)) {
+                this.loadedModules.set(feature.id, feature);
+            }
+        }
+    }
+
+    /**
+     * 最新の bundle.json を取得し、読み込み済みの機能の情報を埋め、スナップショットに無かった有効な機能を読み込む
+     */
+    async revalidate() {
+        const latest = await this.fetchJSON('../features/bundle.json');
+        if (!latest) return;
+        for (const feature of latest.features) {
+            if (this.loadedModules.has(feature.id)) {
+                this.loadedModules.set(feature.id, feature);
+            } else if (this.isEnabled(feature)) {
+                await this.loadModule(feature);
+            }
+        }
+    }
+
+    /**
+     * 生成時にページへ埋め込まれたマニフェストのスナップショット（無ければ null）
+     */
+    readSnapshot() {
+        try {
+            const element = document.getElementById('morpho-manifest');
+            return element ? JSON.parse(element.textContent) : null;
+        } catch {
+            return null;
+        }
+    }
+
+    /**
+     * public/ からの相対パスを、アセットマップでハッシュ付きの名前に解決したURL（未登録なら元のパス）
+     * ページに埋め込まれていないパスは、初回だけ asset-map.json を取得して引く
+     */
+    async resolveAsset(path) {
+        const embedded = this.snapshot?.assets?.[path];
+        if (embedded) return `../${embedded}`;
+        this.assetMap = this.assetMap || this.fetchJSON('../asset-map.json').then(data => data?.assets || {});
+        const assets = await this.assetMap;
+        return `../${assets[path] || path}`;
+    }
+
+    /**
+     * JSONを取得（失敗時は null）
+     */
+    async fetchJSON(url) {
+        try {
+            const response = await fetch(url);
+            return response.ok ? await response.json() : null;
+        } catch {
+            return null;
+        }
+    }
+
+    /**
+     * scriptタグを追加して読み込み完了を待つ（失敗時は false）
+     */
+    loadScript(src) {
+        return new Promise((resolve) => {
+            const script = document.createElement('script');
+            script.src = src;
+            script.async = true;
+            script.onload = () => resolve(true);
+            script.onerror = () => resolve(false);
+            document.body.appendChild(script);
+        });
+    }
+
     /**
      * 機能が有効かどうかを判定
      */
@@ -55,24 +169,13 @@ class MorphoLoader {
      * モジュールを動的に読み込み
      */
     async loadModule(feature) {
-        return new Promise((resolve, reject) => {
-            const script = document.createElement('script');
-            script.src = `../features/${feature.file}`;
-            script.async = true;
-
-            script.onload = () => {
-                this.loadedModules.set(feature.id, feature);
-                console.log(`✅ Loaded: ${feature.name}`);
-                resolve();
-            };
-
-            script.onerror = () => {
-                console.warn(`⚠️ Failed to load: ${feature.name}`);
-                resolve(); // エラーでも継続
-            };
-
-            document.body.appendChild(script);
-        });
+        const loaded = await this.loadScript(await this.resolveAsset(`features/${feature.file}`));
+        if (loaded) {
+            this.loadedModules.set(feature.id, feature);
+            console.log(`✅ Loaded: ${feature.name}`);
+        } else {
+            console.warn(`⚠️ Failed to load: ${feature.name}`); // エラーでも継続
+        }
     }
 
     /**
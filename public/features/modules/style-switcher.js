@@ -135,7 +135,14 @@
             this.saveTheme();
         }
 
-        applyTheme(themeId) {
+        /**
+         * public/ からの相対パスを、アセットマップでハッシュ付きの名前に解決したURL（未登録なら元のパス）
+         */
+        async resolveAsset(path) {
+            return window.MorphoLoader ? window.MorphoLoader.resolveAsset(path) : `../${path}`;
+        }
+
+        async applyTheme(themeId) {
             // 現在のテーマCSSを削除
             const existing = document.getElementById('morpho-theme-css');
             if (existing) existing.remove();
@@ -143,11 +150,15 @@
             // ベーステーマはスキップ
             if (themeId === 'default') return;
 
-            // 新しいテーマCSSを読み込み
+            // 新しいテーマCSSを読み込み（名前の変わらないコピーは削除されることがあるため、ハッシュ付きの名前に解決する）
+            const href = await this.resolveAsset(`styles/themes/${themeId}.css`);
+            // 解決を待つ間に別のテーマへ切り替えられていたら何もしない
+            if (themeId !== this.currentTheme) return;
+            document.getElementById('morpho-theme-css')?.remove();
             const link = document.createElement('link');
             link.id = 'morpho-theme-css';
             link.rel = 'stylesheet';
-            link.href = `/styles/themes/${themeId}.css`;
+            link.href = href;
             document.head.appendChild(link);
         }
 
@@ -0,0 +1,135 @@
+/* MorphoNews service worker (generated by scripts/generator.py) */
+const PRECACHE_VERSION = 'c66b1c6e21a7';
+const PRECACHE = 'morpho-precache';
+const RUNTIME = 'morpho-runtime';
+const RUNTIME_LIMIT = 30;
+const MANIFEST_URL = new URL('precache-manifest.json', self.location).href;
+// 各エントリの revision をキャッシュ内に保存するためのキー
+const REVISIONS_KEY = new URL('__precache-revisions', self.location).href;
+
+const readRevisions = async (cache) => {
+    try {
+        const response = await cache.match(REVISIONS_KEY);
+        return response ? await response.json() : {};
+    } catch {
+        return {};
+    }
+};
+
+// revision が変わったエントリだけを取り直し、マニフェストから消えたエントリを削除
+self.addEventListener('install', (event) => {
+    event.waitUntil((async () => {
+        const response = await fetch(`${MANIFEST_URL}?v=${PRECACHE_VERSION}`, { cache: 'no-store' });
+        const manifest = await response.json();
+        const cache = await caches.open(PRECACHE);
+        const previous = await readRevisions(cache);
+        const revisions = {};
+        await Promise.all(manifest.entries.map(async ({ url, revision }) => {
+            const absolute = new URL(url, self.location).href;
+            if (previous[absolute] === revision && await cache.match(absolute)) {
+                revisions[absolute] = revision;
+                return;
+            }
+            try {
+                const fresh = await fetch(absolute, { cache: 'no-cache' });
+                if (fresh.ok) {
+                    await cache.put(absolute, fresh);
+                    revisions[absolute] = revision;
+                }
+            } catch (error) {
+                console.warn('Precache failed:', url, error);
+            }
+        }));
+        for (const request of await cache.keys()) {
+            if (!(request.url in revisions) && request.url !== REVISIONS_KEY) {
+                await cache.delete(request);
+            }
+        }
+        await cache.put(REVISIONS_KEY, new Response(JSON.stringify(revisions)));
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil((async () => {
+        for (const name of await caches.keys()) {
+            if (name !== PRECACHE && name !== RUNTIME) {
+                await caches.delete(name);
+            }
+        }
+        await self.clients.claim();
+    })());
+});
+
+// 内容が変わらないURL（ハッシュ付きのファイル名）
+const IMMUTABLE_PATHS = [
+    /\/assets\/dist\//,
+    /\/styles\/dist\/.+\.[0-9a-f]{8,}\.css$/,
+];
+// 名前は変わらないが描き直されることがあるURL（アーカイブHTML）
+const REVALIDATE_PATHS = [
+    /\/archives\/\d{4}-\d{2}-\d{2}_\d{4}\.html$/,
+];
+
+// 取得したページを保存し、古いものから RUNTIME_LIMIT 件を超えた分を削除
+const putRuntime = async (request, response) => {
+    const runtime = await caches.open(RUNTIME);
+    await runtime.put(request, response);
+    const keys = await runtime.keys();
+    for (const key of keys.slice(0, Math.max(0, keys.length - RUNTIME_LIMIT))) {
+        await runtime.delete(key);
+    }
+};
+
+// キャッシュ済みのアーカイブHTMLを返し、裏で取り直して同じキャッシュを更新する
+const revalidate = async (event, url) => {
+    const { request } = event;
+    const key = url.origin + url.pathname;
+    const precached = await caches.match(key, { cacheName: PRECACHE });
+    const cached = precached || await caches.match(request, { cacheName: RUNTIME, ignoreSearch: true });
+    if (!cached) return null;
+    event.waitUntil((async () => {
+        try {
+            const fresh = await fetch(request, { cache: 'no-cache' });
+            if (!fresh.ok) return;
+            if (precached) {
+                await (await caches.open(PRECACHE)).put(key, fresh);
+            } else {
+                await putRuntime(request, fresh);
+            }
+        } catch {
+            // オフライン: 次の表示で取り直す
+        }
+    })());
+    return cached;
+};
+
+// 内容が変わらないものはプリキャッシュから、アーカイブHTMLはキャッシュから返して裏で更新する。
+// それ以外（名前の変わらないJSONやページ）はネットワーク優先で、オフライン時はプリキャッシュ・取得済みのページを使う
+self.addEventListener('fetch', (event) => {
+    const { request } = event;
+    const url = new URL(request.url);
+    if (request.method !== 'GET' || url.origin !== self.location.origin) return;
+    event.respondWith((async () => {
+        if (IMMUTABLE_PATHS.some((pattern) => pattern.test(url.pathname))) {
+            const cached = await caches.match(request, { cacheName: PRECACHE, ignoreSearch: true });
+            if (cached) return cached;
+        }
+        if (REVALIDATE_PATHS.some((pattern) => pattern.test(url.pathname))) {
+            const cached = await revalidate(event, url);
+            if (cached) return cached;
+        }
+        try {
+            const response = await fetch(request);
+            if (response.ok && request.mode === 'navigate') {
+                await putRuntime(request, response.clone());
+            }
+            return response;
+        } catch (error) {
+            const fallback = await caches.match(request, { cacheName: PRECACHE, ignoreSearch: true })
+                || await caches.match(request, { cacheName: RUNTIME, ignoreSearch: true });
+            if (fallback) return fallback;
+            throw error;
+        }
+    })());
+});
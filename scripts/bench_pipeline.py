@@ -0,0 +1,77 @@
+"""
+GENERATION_MODEごとのエンドツーエンド実行時間をオフラインで計測するスクリプト
+
+mock_llm_server.py をバックグラウンドで起動し、public・stateディレクトリのコピー上で
+generator.py を LLM_BACKEND=mock / ダミーRSS で実行する。
+実リポジトリの public/ と state/ は変更しない。
+
+使い方:
+    python scripts/bench_pipeline.py --modes ai full-evolve --repeat 3 --latency 1.0
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from mock_llm_server import mock_feed_urls, start_server
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPTS_DIR)
+GENERATOR = os.path.join(SCRIPTS_DIR, "generator.py")
+
+
+def run_once(mode, port):
+    """public・stateのコピー上でgenerator.pyを1回実行し、経過秒数を返す"""
+    with tempfile.TemporaryDirectory(prefix="morpho-bench-") as work_dir:
+        shutil.copytree(os.path.join(REPO_DIR, "public"), os.path.join(work_dir, "public"))
+        state_dir = os.path.join(REPO_DIR, "state")
+        if os.path.isdir(state_dir):
+            shutil.copytree(state_dir, os.path.join(work_dir, "state"))
+        env = {
+            **os.environ,
+            "GENERATION_MODE": mode,
+            "LLM_BACKEND": "mock",
+            "LLM_MOCK_URL": f"http://127.0.0.1:{port}",
+            "LLM_CACHE_MODE": "bypass",
+            "MORPHO_RSS_FEEDS": ",".join(mock_feed_urls(port)),
+        }
+        start = time.time()
+        result = subprocess.run(
+            [sys.executable, GENERATOR],
+            cwd=work_dir,
+            env=env,
+            capture_output=True,
+            text=True
+        )
+        elapsed = time.time() - start
+        if result.returncode != 0:
+            print(result.stdout[-2000:])
+            print(result.stderr[-2000:])
+            raise RuntimeError(f"generator.py failed in mode '{mode}'")
+        return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MorphoNews pipeline benchmark")
+    parser.add_argument("--modes", nargs="+", default=["news-only", "modular", "ai", "full-evolve"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="モックLLMの応答遅延（秒）")
+    parser.add_argument("--throughput", type=float, default=200, help="モックLLMの出力トークン/秒")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.latency, args.throughput, args.failure_rate, args.seed)
+    print(f"Mock LLM: latency={args.latency}s throughput={args.throughput} tok/s failure_rate={args.failure_rate}")
+    print(f"{'mode':<12} {'runs':>4} {'median(s)':>10} {'min(s)':>8} {'max(s)':>8}")
+    try:
+        for mode in args.modes:
+            timings = [run_once(mode, args.port) for _ in range(args.repeat)]
+            print(f"{mode:<12} {len(timings):>4} {statistics.median(timings):>10.2f} {min(timings):>8.2f} {max(timings):>8.2f}")
+    finally:
+        server.shutdown()
@@ -0,0 +1,77 @@
+"""
+アーカイブHTML描画のマイクロベンチマーク
+
+public/data/ の実データで TEMPLATE.html を描画し、
+従来の str.replace を繰り返す方式とコンパイル済みテンプレート（template_engine.py）を比較する。
+両方式の出力が一致することも確認する。
+
+使い方:
+    python scripts/bench_template.py --repeat 200
+"""
+import argparse
+import glob
+import html
+import os
+import statistics
+import time
+
+from template_engine import CompiledTemplate
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPTS_DIR)
+
+os.chdir(REPO_DIR)
+import generator  # noqa: E402  (generator.pyは相対パスのpublic/を前提とする)
+
+
+def render_sequential(template_text, values, escaped):
+    """従来方式: プレースホルダーごとにテンプレート全体をstr.replaceする"""
+    output = template_text
+    for name, value in values.items():
+        value = str(value)
+        output = output.replace("{" + name + "}", html.escape(value) if name in escaped else value)
+    return output
+
+
+def measure(fn, repeat):
+    """fnをrepeat回実行し、1回あたりの経過時間（ミリ秒）のリストを返す"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MorphoNews template rendering benchmark")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--data", help="描画に使うデータJSON（省略時は最新）")
+    args = parser.parse_args()
+
+    data_path = args.data or sorted(glob.glob(os.path.join(generator.DATA_DIR, "????-??-??_????.json")))[-1]
+    news_data = generator.load_json(data_path)
+    current_id = os.path.splitext(os.path.basename(data_path))[0]
+
+    template_path = os.path.join(generator.ARCHIVE_DIR, 'TEMPLATE.html')
+    with open(template_path, 'r', encoding='utf-8') as f:
+        template_text = f.read()
+    values = generator.build_archive_values(news_data, current_id, './prev.html', 1)
+    escaped = generator.ARCHIVE_ESCAPED_SLOTS
+    template = CompiledTemplate(template_text)
+
+    sequential = render_sequential(template_text, values, escaped)
+    compiled = template.render(values, escaped)
+    if sequential != compiled:
+        raise SystemExit("Output mismatch between sequential and compiled rendering")
+
+    results = {
+        "compile": measure(lambda: CompiledTemplate(template_text), args.repeat),
+        "str.replace x%d" % len(values): measure(lambda: render_sequential(template_text, values, escaped), args.repeat),
+        "compiled render": measure(lambda: template.render(values, escaped), args.repeat),
+    }
+
+    print(f"\nData: {data_path} (template {len(template_text)} chars, output {len(compiled)} chars)")
+    print(f"{'method':<20} {'median_ms':>10} {'min_ms':>10} {'max_ms':>10}")
+    for name, timings in results.items():
+        print(f"{name:<20} {statistics.median(timings):>10.3f} {min(timings):>10.3f} {max(timings):>10.3f}")
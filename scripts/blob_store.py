@@ -0,0 +1,104 @@
+"""
+プロンプトなど大きなテキストのためのコンテンツアドレス型ブロブストア（public/data/blobs/）
+
+各テキストを SHA-256（先頭128bit）をファイル名とする public/data/blobs/{hash}.txt に1度だけ保存する。
+データJSONには本文の代わりに {"$blobs": [hash]} を書き、読み込み時に展開する。
+
+ページが読み込むデータJSON（news-renderer.js が取得）からプロンプト本文が外れ、
+プロンプト開示用の prompts/{id}.json とデータJSONは同じブロブを参照する。
+ブロブは1プロンプト1ファイルなので、開示パネルを開いたときの取得はプロンプトごとに1回で済む。
+ブロブはプレーンテキストなのでそのまま読める。
+
+使い方（既存のデータJSONをブロブ参照形式に変換）:
+    python scripts/blob_store.py public/data
+"""
+import glob
+import hashlib
+import json
+import os
+import sys
+
+BLOB_REF_KEY = "$blobs"
+# これより短い文字列はブロブ化しない
+BLOB_MIN_CHARS = 1024
+# ブロブ名に使うSHA-256の桁数（16進）
+BLOB_DIGEST_CHARS = 32
+# データJSONでブロブ化するフィールド
+PROMPT_FIELDS = frozenset({'summary_prompt', 'feature_prompt', 'style_prompt', 'layout_prompt', 'design_prompt'})
+
+
+def is_blob_ref(value):
+    return isinstance(value, dict) and BLOB_REF_KEY in value and len(value) == 1
+
+
+class BlobStore:
+    """public/data/blobs/ のコンテンツアドレス型ストア"""
+
+    def __init__(self, blob_dir):
+        self.blob_dir = blob_dir
+
+    def path_for(self, digest):
+        return os.path.join(self.blob_dir, f"{digest}.txt")
+
+    def put(self, text):
+        """テキストを1つのブロブとして保存し、参照を返す（既存のブロブは書き込まない）"""
+        os.makedirs(self.blob_dir, exist_ok=True)
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:BLOB_DIGEST_CHARS]
+        path = self.path_for(digest)
+        if not os.path.exists(path):
+            # rerender_archives.py の並列ワーカーが同じブロブを同時に書くことがあるため、一時ファイルはプロセスごとに分ける
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return {BLOB_REF_KEY: [digest]}
+
+    def get(self, ref):
+        """参照からテキストを復元（複数のブロブに分けて書かれた参照は連結する）"""
+        parts = []
+        for digest in ref[BLOB_REF_KEY]:
+            with open(self.path_for(digest), 'rb') as f:
+                parts.append(f.read().decode('utf-8'))
+        return "".join(parts)
+
+    def pack(self, data, fields=PROMPT_FIELDS):
+        """fieldsに含まれるキーの長い文字列をブロブ参照に置き換えたコピーを返す"""
+        if isinstance(data, dict):
+            return {
+                key: self.put(value)
+                if key in fields and isinstance(value, str) and len(value) >= BLOB_MIN_CHARS
+                else self.pack(value, fields)
+                for key, value in data.items()
+            }
+        if isinstance(data, list):
+            return [self.pack(item, fields) for item in data]
+        return data
+
+    def expand(self, data):
+        """ブロブ参照を本文に展開したデータを返す"""
+        if is_blob_ref(data):
+            return self.get(data)
+        if isinstance(data, dict):
+            return {key: self.expand(value) for key, value in data.items()}
+        if isinstance(data, list):
+            return [self.expand(item) for item in data]
+        return data
+
+
+if __name__ == "__main__":
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join("public", "data")
+    store = BlobStore(os.path.join(data_dir, "blobs"))
+    before = after = 0
+    for path in sorted(glob.glob(os.path.join(data_dir, "????-??-??_????.json"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        before += os.path.getsize(path)
+        packed = store.pack(store.expand(data))
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(packed, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        after += os.path.getsize(path)
+    blob_bytes = sum(os.path.getsize(p) for p in glob.glob(store.path_for("*")))
+    print(f"✓ Packed data JSON: {before} -> {after} bytes (+ {blob_bytes} bytes of blobs)")
@@ -0,0 +1,99 @@
+"""
+生成物ごとの入力ハッシュを記録するビルドマニフェスト（state/build-manifest.json）
+
+出力ファイル（アーカイブ・履歴ページ・index.html）ごとに、描画に使った入力
+（データJSON・TEMPLATE.html・レジストリ由来の値・レンダラーのソースなど）のハッシュを保存する。
+前回と入力が同じで出力ファイルが存在すれば、描画も書き込みも省略できる。
+"""
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+_file_hash_cache = {}
+
+
+def hash_value(value):
+    """JSON化できる値のハッシュ（キー順に依存しない）"""
+    data = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def hash_file(path):
+    """ファイル内容のハッシュ（同一プロセス内では更新時刻・サイズが変わるまでキャッシュ）"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _file_hash_cache:
+        with open(path, 'rb') as f:
+            _file_hash_cache[key] = hashlib.sha256(f.read()).hexdigest()
+    return _file_hash_cache[key]
+
+
+class BuildManifest:
+    """出力ファイル → 入力ハッシュ の対応表"""
+
+    def __init__(self, path, root):
+        self.path = path
+        self.root = root
+        self.outputs = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path, root):
+        """マニフェストを読み込む（無い・壊れている・バージョン違いの場合は空）"""
+        manifest = cls(path, root)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                try:
+                    data = json.load(f)
+                except json.JSONDecodeError:
+                    data = {}
+            if data.get('version') == MANIFEST_VERSION:
+                manifest.outputs = data.get('outputs', {})
+        return manifest
+
+    def _key(self, output_path):
+        return os.path.relpath(output_path, self.root).replace(os.sep, '/')
+
+    def inputs_for(self, output_path):
+        """前回記録した入力ハッシュ（無ければNone）"""
+        return self.outputs.get(self._key(output_path))
+
+    def is_fresh(self, output_path, inputs):
+        """出力が存在し、入力が前回と同じならTrue"""
+        return os.path.exists(output_path) and self.inputs_for(output_path) == inputs
+
+    def record(self, output_path, inputs):
+        """出力の入力ハッシュを記録"""
+        key = self._key(output_path)
+        if self.outputs.get(key) != inputs:
+            self.outputs[key] = inputs
+            self.dirty = True
+
+    def forget(self, output_path):
+        """出力の記録を削除"""
+        if self.outputs.pop(self._key(output_path), None) is not None:
+            self.dirty = True
+
+    def write_if_stale(self, output_path, inputs, render):
+        """入力が変わっていればrender()の結果を書き出して記録する。書き出したらTrue"""
+        if self.is_fresh(output_path, inputs):
+            return False
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(render())
+        self.record(output_path, inputs)
+        return True
+
+    def save(self):
+        """変更があればアトミックに保存"""
+        if not self.dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(
+                {"version": MANIFEST_VERSION, "outputs": dict(sorted(self.outputs.items()))},
+                f, ensure_ascii=False, indent=1
+            )
+        os.replace(tmp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,126 @@
+"""
+機能モジュール（public/features/）のビルド時バンドル
+
+デフォルトで有効な機能と必須機能を1つのスクリプト（features/bundle.js）にまとめ、
+ローダー用のマニフェスト（features/bundle.json）を書き出す。
+loader.js はマニフェストを読み、バンドルを1回のリクエストで読み込んだ後、
+ユーザーが設定ページで追加した機能だけを個別に読み込む。
+
+各モジュールの直後に window.__morphoBundled へIDを追加するため、
+バンドルの途中でエラーが起きても、実行されなかったモジュールはローダーが個別に読み込み直す。
+"""
+import json
+import os
+import re
+
+from build_manifest import hash_file, hash_value
+
+FEATURE_BUNDLE_FILE = "bundle.js"
+FEATURE_BUNDLE_MANIFEST_FILE = "bundle.json"
+BUNDLE_MANIFEST_VERSION = 1
+
+_BACKTICK = re.compile(r'(?<!\\)`')
+
+
+def minify_js(source):
+    """行単位の控えめなJS圧縮（インデント・空行・行コメント・ブロックコメントを除去）
+
+    改行は残すので自動セミコロン挿入の挙動は変わらない。
+    テンプレートリテラルの中の行はそのまま残す。
+    ブロックコメントは行頭から始まるものだけを除去し、閉じた後に続くコードは残す。
+    """
+    lines = []
+    in_template = False
+    in_comment = False
+    for line in source.splitlines():
+        if in_template:
+            lines.append(line)
+            if len(_BACKTICK.findall(line)) % 2 == 1:
+                in_template = False
+            continue
+        stripped = line.strip()
+        if in_comment:
+            end = stripped.find('*/')
+            if end < 0:
+                continue
+            in_comment = False
+            stripped = stripped[end + 2:].lstrip()
+        while stripped.startswith('/*'):
+            end = stripped.find('*/', 2)
+            if end < 0:
+                in_comment = True
+                stripped = ''
+                break
+            stripped = stripped[end + 2:].lstrip()
+        if not stripped or stripped.startswith('//'):
+            continue
+        lines.append(stripped)
+        if len(_BACKTICK.findall(stripped)) % 2 == 1:
+            in_template = True
+    return "\n".join(lines) + "\n"
+
+
+def select_bundled_features(registry):
+    """バンドルに含める機能（必須またはデフォルトで有効）"""
+    return [f for f in registry.get('features', []) if f.get('required') or f.get('enabled')]
+
+
+def feature_table(registry):
+    """ローダーが有効判定に使う全機能の一覧（features.jsonの必要な項目のみ）"""
+    return [
+        {key: feature.get(key) for key in ('id', 'name', 'file', 'enabled', 'required')}
+        for feature in registry.get('features', [])
+    ]
+
+
+def render_feature_bundle(features_dir, features):
+    """バンドル本体のJSを作る"""
+    parts = ["/* MorphoNews feature bundle (generated by scripts/generator.py) */\n"]
+    for feature in features:
+        with open(os.path.join(features_dir, feature['file']), 'r', encoding='utf-8') as f:
+            source = f.read()
+        parts.append(f"/* {feature['id']}: {feature['file']} */\n")
+        parts.append(minify_js(source))
+        parts.append(f";(window.__morphoBundled = window.__morphoBundled || []).push({json.dumps(feature['id'])});\n")
+    return "".join(parts)
+
+
+def existing_bundled_features(features_dir, registry):
+    """バンドルに含める機能のうち、ファイルが存在するもの"""
+    return [
+        f for f in select_bundled_features(registry)
+        if os.path.exists(os.path.join(features_dir, f['file']))
+    ]
+
+
+def feature_bundle_manifest(features_dir, registry):
+    """ローダー用のマニフェスト（bundle.json の内容。アーカイブHTMLにも埋め込む）"""
+    bundle_path = os.path.join(features_dir, FEATURE_BUNDLE_FILE)
+    return {
+        "version": BUNDLE_MANIFEST_VERSION,
+        "bundle": FEATURE_BUNDLE_FILE,
+        "hash": hash_file(bundle_path)[:12] if os.path.exists(bundle_path) else "",
+        "modules": [f['id'] for f in existing_bundled_features(features_dir, registry)],
+        "features": feature_table(registry),
+    }
+
+
+def build_feature_bundle(features_dir, registry, build_manifest):
+    """bundle.js と bundle.json を（入力が変わっていれば）書き出し、(書き出したか, マニフェスト) を返す"""
+    features = existing_bundled_features(features_dir, registry)
+    bundle_path = os.path.join(features_dir, FEATURE_BUNDLE_FILE)
+    bundle_inputs = {
+        'modules': hash_value([[f['id'], hash_file(os.path.join(features_dir, f['file']))] for f in features]),
+        'bundler': hash_file(__file__),
+    }
+    bundle_written = build_manifest.write_if_stale(
+        bundle_path, bundle_inputs, lambda: render_feature_bundle(features_dir, features)
+    )
+
+    manifest = feature_bundle_manifest(features_dir, registry)
+    manifest_path = os.path.join(features_dir, FEATURE_BUNDLE_MANIFEST_FILE)
+    manifest_written = build_manifest.write_if_stale(
+        manifest_path, {'manifest': hash_value(manifest)},
+        lambda: json.dumps(manifest, ensure_ascii=False, separators=(',', ':'))
+    )
+    return bundle_written or manifest_written, manifest
@@ -0,0 +1,185 @@
+"""
+テーマ・レイアウトCSSとベースCSSの処理ステージ（public/styles/dist/）
+
+LLMが生成した styles/themes/*.css と layouts/*.css はコメントや重複した宣言を含んだまま保存される。
+元ファイルは読みやすさのためそのまま残し、処理済みのコピーを styles/dist/ に書き出す。
+- themes/{id}.css, layouts/{id}.css: 圧縮し、同じブロック内の完全に同じ宣言を1つにまとめたもの
+- base.{hash}.css, archive-base.{hash}.css: ベースCSSを同様に処理し、内容のハッシュを名前に含めたもの
+  （名前が内容で決まるため長期キャッシュでき、過去のアーカイブが参照する古い版も残る）
+- css.json: 元のベースCSS名 → dist/ 内のファイル名 の対応表
+
+同じプロパティでも値が違う宣言（`height: 100vh; height: 100dvh;` のようなフォールバック）は残す。
+宣言を ";" で分ける前に、文字列と括弧の中（`url(data:image/png;base64,...)` など）を退避する。
+"""
+import hashlib
+import json
+import os
+import re
+
+from build_manifest import hash_file, hash_value
+
+CSS_DIST_DIR = "dist"
+CSS_MAP_FILE = "css.json"
+# 内容のハッシュをファイル名に含めるベースCSS（styles/ からの相対パス）
+BASE_STYLESHEETS = ("base.css", "archive-base.css")
+CSS_HASH_CHARS = 10
+CSS_MAP_VERSION = 1
+
+# 文字列リテラルとコメント（文字列の中の /* は文字列として扱う）
+_CSS_STRINGS_AND_COMMENTS = re.compile(r'("(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\')|/\*.*?\*/', re.S)
+_STRING_SLOT = re.compile(r'\x00(\d+)\x00')
+_PAREN_GROUP = re.compile(r'\([^()]*\)')
+_GROUP_SLOT = re.compile(r'\x01(\d+)\x01')
+# 宣言のプロパティ名の後の空白（"color :red"）
+_PROPERTY_SPACE = re.compile(r'^([\w-]+) :')
+_INNER_BLOCK = re.compile(r'\{([^{}]*)\}')
+_EMPTY_RULE = re.compile(r'(?<=[{};])[^{};]+\{\}')
+
+
+def _protect_strings(css):
+    """コメントを除去し、文字列リテラルを退避して (本文, 文字列のリスト) を返す"""
+    strings = []
+
+    def replace(match):
+        if match.group(1) is None:
+            return ' '
+        strings.append(match.group(1))
+        return f"\x00{len(strings) - 1}\x00"
+
+    return _CSS_STRINGS_AND_COMMENTS.sub(replace, css), strings
+
+
+def _protect_groups(text):
+    """括弧の中を内側から退避して (本文, 括弧のリスト) を返す（同じ内容には同じ番号を振り、重複判定を保つ）"""
+    groups = []
+    numbers = {}
+
+    def replace(match):
+        group = match.group(0)
+        if group not in numbers:
+            numbers[group] = len(groups)
+            groups.append(group)
+        return f"\x01{numbers[group]}\x01"
+
+    while True:
+        text, count = _PAREN_GROUP.subn(replace, text)
+        if not count:
+            return text, groups
+
+
+def _restore_groups(text, groups):
+    # 外側の括弧の中に内側の番号が残るため、番号がなくなるまで戻す
+    while _GROUP_SLOT.search(text):
+        text = _GROUP_SLOT.sub(lambda m: groups[int(m.group(1))], text)
+    return text
+
+
+def _dedupe_block(match):
+    """1つのブロック内で完全に同じ宣言は最後の1つだけ残す（後の宣言が優先されるため結果は同じ）"""
+    declarations = [_PROPERTY_SPACE.sub(r'\1:', d) for d in match.group(1).split(';') if d]
+    seen = set()
+    kept = []
+    for declaration in reversed(declarations):
+        if declaration not in seen:
+            seen.add(declaration)
+            kept.append(declaration)
+    return '{' + ';'.join(reversed(kept)) + '}'
+
+
+def minify_css(css):
+    """コメント・余分な空白・重複した宣言・空のルールを除去"""
+    text, strings = _protect_strings(css)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r' ?([{};,>]) ?', r'\1', text)
+    # 空白の前の ":" はセレクタ（"a :hover"）で意味が変わるため、後ろの空白だけを除く
+    text = re.sub(r': ', ':', text)
+    text, groups = _protect_groups(text)
+    text = _INNER_BLOCK.sub(_dedupe_block, text)
+    text = text.replace(';}', '}')
+    # 空になったルールを除去（@media の中が空になった場合に備えて2回）
+    for _ in range(2):
+        text = _EMPTY_RULE.sub('', '}' + text)[1:]
+    text = _restore_groups(text.strip(), groups)
+    text = _STRING_SLOT.sub(lambda m: strings[int(m.group(1))], text)
+    return text + "\n"
+
+
+def minify_css_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return minify_css(f.read())
+
+
+def hashed_name(filename, content):
+    """base.css → base.{内容のハッシュ}.css"""
+    stem, ext = os.path.splitext(filename)
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:CSS_HASH_CHARS]
+    return f"{stem}.{digest}{ext}"
+
+
+def dist_dir(styles_dir):
+    return os.path.join(styles_dir, CSS_DIST_DIR)
+
+
+def load_css_map(styles_dir):
+    """css.json を読み込む（無ければ空）"""
+    path = os.path.join(dist_dir(styles_dir), CSS_MAP_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('files', {})
+
+
+def process_sources(source_dir, target_dir, build_manifest):
+    """source_dir直下の*.cssを処理してtarget_dirに書き出し、(書き出した数, 合計サイズ前, 後) を返す"""
+    os.makedirs(target_dir, exist_ok=True)
+    written = 0
+    before = after = 0
+    sources = sorted(f for f in os.listdir(source_dir) if f.endswith('.css'))
+    for filename in sources:
+        source = os.path.join(source_dir, filename)
+        target = os.path.join(target_dir, filename)
+        inputs = {'source': hash_file(source), 'pipeline': hash_file(__file__)}
+        if build_manifest.write_if_stale(target, inputs, lambda: minify_css_file(source)):
+            written += 1
+        before += os.path.getsize(source)
+        after += os.path.getsize(target)
+    # 元ファイルが無くなった処理済みファイルを削除
+    for filename in os.listdir(target_dir):
+        if filename.endswith('.css') and filename not in sources:
+            os.remove(os.path.join(target_dir, filename))
+            build_manifest.forget(os.path.join(target_dir, filename))
+    return written, before, after
+
+
+def process_stylesheets(styles_dir, layouts_dir, build_manifest):
+    """テーマ・レイアウト・ベースCSSを処理し、処理結果の概要を返す"""
+    out_dir = dist_dir(styles_dir)
+    summary = {'written': 0, 'before': 0, 'after': 0}
+    for source_dir, name in ((os.path.join(styles_dir, 'themes'), 'themes'), (layouts_dir, 'layouts')):
+        written, before, after = process_sources(source_dir, os.path.join(out_dir, name), build_manifest)
+        summary['written'] += written
+        summary['before'] += before
+        summary['after'] += after
+
+    files = {}
+    for filename in BASE_STYLESHEETS:
+        source = os.path.join(styles_dir, filename)
+        if not os.path.exists(source):
+            continue
+        minified = minify_css_file(source)
+        name = hashed_name(filename, minified)
+        target = os.path.join(out_dir, name)
+        # ファイル名が内容のハッシュなので、存在すれば同じ内容
+        if not os.path.exists(target):
+            with open(target, 'w', encoding='utf-8') as f:
+                f.write(minified)
+            summary['written'] += 1
+        files[filename] = f"{CSS_DIST_DIR}/{name}"
+    summary['files'] = files
+
+    css_map = {"version": CSS_MAP_VERSION, "files": files}
+    summary['written'] += build_manifest.write_if_stale(
+        os.path.join(out_dir, CSS_MAP_FILE), {'map': hash_value(css_map)},
+        lambda: json.dumps(css_map, ensure_ascii=False, indent=2)
+    )
+    return summary
@@ -0,0 +1,121 @@
+"""
+内容のハッシュを含むファイル名へのアセットのコピー（public/assets/dist/）とアセットマップ（public/asset-map.json）
+
+テーマ・レイアウト・機能モジュールは themes/{id}.css や modules/{id}.js のような固定の名前で上書きされるため、
+そのままでは長期キャッシュできない。このステージでは各ファイルを
+assets/dist/{元のパス}.{hash}.{拡張子} にコピーし、論理パス → コピー先 の対応表を asset-map.json に書き出す。
+- 論理パスは public/ からの相対パス（styles/themes/{id}.css, layouts/{file}, features/modules/{id}.js など）
+- テーマ・レイアウトは styles/dist/ の処理済みCSSをコピーする
+- ベースCSSは css_pipeline.py がすでにハッシュ付きの名前で書き出しているので、コピーせずそのまま対応表に載せる
+
+生成するHTMLとJSのローダーは対応表を通してURLを決めるため、HTML以外（assets/dist/ と styles/dist/ のハッシュ付きCSS）は
+遠い将来までのキャッシュヘッダーで配信できる。対応表から外れた古いコピーは、どのHTMLからも参照されなくなった時点で削除する
+（過去のアーカイブを rerender_archives.py で描き直すと、次の実行で古い版が消える）。
+"""
+import json
+import os
+import re
+import shutil
+
+from build_manifest import hash_file, hash_value
+from css_pipeline import load_css_map
+
+ASSET_DIR = "assets/dist"
+ASSET_MAP_FILE = "asset-map.json"
+ASSET_MAP_VERSION = 1
+ASSET_HASH_CHARS = 10
+# (論理パスのディレクトリ, 内容を取るディレクトリ, 拡張子)（public/ からの相対パス）
+FINGERPRINT_SOURCES = (
+    ("styles/themes", "styles/dist/themes", ".css"),
+    ("layouts", "styles/dist/layouts", ".css"),
+    ("features", "features", ".js"),
+    ("js", "js", ".js"),
+)
+# HTMLに書かれたハッシュ付きのパス
+ASSET_REFERENCE = re.compile(re.escape(ASSET_DIR) + r'/[^"\'\s)?#]+')
+
+
+def iter_fingerprint_sources(public_dir):
+    """(論理パス, 元ファイルのパス) を列挙"""
+    for logical_dir, source_dir, ext in FINGERPRINT_SOURCES:
+        root = os.path.join(public_dir, source_dir)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                if not filename.endswith(ext):
+                    continue
+                path = os.path.join(dirpath, filename)
+                relative = os.path.relpath(path, root).replace(os.sep, '/')
+                yield f"{logical_dir}/{relative}", path
+
+
+def fingerprinted_path(logical_path, digest):
+    """styles/themes/ocean.css → assets/dist/styles/themes/ocean.{hash}.css"""
+    stem, ext = os.path.splitext(logical_path)
+    return f"{ASSET_DIR}/{stem}.{digest}{ext}"
+
+
+def load_asset_map(public_dir):
+    """asset-map.json を読み込む（無ければ空）"""
+    path = os.path.join(public_dir, ASSET_MAP_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('assets', {})
+
+
+def fingerprint_assets(public_dir, build_manifest):
+    """アセットをハッシュ付きの名前にコピーして asset-map.json を更新し、(コピーした数, 対応表) を返す"""
+    assets = {}
+    copied = 0
+    for logical_path, source in iter_fingerprint_sources(public_dir):
+        target_path = fingerprinted_path(logical_path, hash_file(source)[:ASSET_HASH_CHARS])
+        target = os.path.join(public_dir, target_path)
+        # ファイル名が内容のハッシュなので、存在すれば同じ内容
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_path = f"{target}.tmp"
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, target)
+            copied += 1
+        assets[logical_path] = target_path
+
+    styles_dir = os.path.join(public_dir, "styles")
+    for name, dist_path in load_css_map(styles_dir).items():
+        assets[f"styles/{name}"] = f"styles/{dist_path}"
+
+    asset_map = {"version": ASSET_MAP_VERSION, "assets": dict(sorted(assets.items()))}
+    build_manifest.write_if_stale(
+        os.path.join(public_dir, ASSET_MAP_FILE), {'map': hash_value(asset_map)},
+        lambda: json.dumps(asset_map, ensure_ascii=False, indent=1)
+    )
+    return copied, asset_map['assets']
+
+
+def referenced_assets(public_dir):
+    """public/ 以下のHTMLが参照している assets/dist/ のパス"""
+    referenced = set()
+    for dirpath, _, filenames in os.walk(public_dir):
+        for filename in filenames:
+            if filename.endswith('.html'):
+                with open(os.path.join(dirpath, filename), 'r', encoding='utf-8') as f:
+                    referenced.update(ASSET_REFERENCE.findall(f.read()))
+    return referenced
+
+
+def prune_assets(public_dir, assets):
+    """対応表から外れ、どのHTMLからも参照されていないコピーを削除し、削除したパスを返す
+
+    圧縮版（.gz / .br）は precompress.remove_orphans が元ファイルに合わせて削除する。
+    """
+    keep = set(assets.values()) | referenced_assets(public_dir)
+    removed = []
+    for dirpath, _, filenames in os.walk(os.path.join(public_dir, ASSET_DIR)):
+        for filename in sorted(filenames):
+            if filename.endswith(('.gz', '.br')):
+                continue
+            path = os.path.join(dirpath, filename)
+            relative = os.path.relpath(path, public_dir).replace(os.sep, '/')
+            if relative not in keep:
+                os.remove(path)
+                removed.append(relative)
+    return removed
@@ -1,19 +1,40 @@
 import os
 import json
+import hashlib
 import html as html_module
+import itertools
 import feedparser
-import google.generativeai as genai
+import requests
+from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timezone, timedelta
 import time
 import re
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from llm_backend import StreamingResponse, create_backend, make_response
+from history_renderer import write_history_pages
+from history_store import HistoryStore
+import template_engine
+from template_engine import CompiledTemplate, StreamingRenderer, load_template, placeholder_variants_pattern
+from build_manifest import BuildManifest, hash_file, hash_value
+from blob_store import BlobStore
+from precompress import PRECOMPRESS_MANIFEST_FILE, format_result, precompress_public, remove_orphans
+from bundler import build_feature_bundle, feature_bundle_manifest
+from css_pipeline import process_stylesheets
+from fingerprint import fingerprint_assets, load_asset_map, prune_assets
+from service_worker import write_service_worker
+from resilience import CircuitBreaker, ResilientCaller
+from tracing import Tracer
 
 # --- 設定 ---
 API_KEY = os.environ.get("OPENAI_API_KEY")
-if API_KEY:
-    genai.configure(api_key=API_KEY)
-    
 MODEL_NAME = "gemini-3-flash-preview"
 
+# LLMバックエンド: 'gemini'（本番） / 'mock'（mock_llm_server.pyを使ったオフライン計測）
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "gemini")
+LLM_MOCK_URL = os.environ.get("LLM_MOCK_URL", "http://127.0.0.1:8765")
+
 # 生成モード設定: 
 # 'ai': AIによる機能・スタイル・レイアウトの個別進化
 # 'full-evolve': AIによるHTML全体の再構築（完全自律進化）
@@ -21,17 +42,67 @@ MODEL_NAME = "gemini-3-flash-preview"
 # 'news-only': ニュースデータの取得のみ
 GENERATION_MODE = os.environ.get("GENERATION_MODE", "ai")
 
+# LLMレスポンスキャッシュ（GENERATION_MODEとは独立）:
+# 'bypass': キャッシュを使わず毎回APIを呼ぶ
+# 'record': キャッシュにあれば再利用し、なければAPIを呼んで保存
+# 'replay': キャッシュのみを使用（ミス時はエラー、APIは呼ばない）
+LLM_CACHE_MODE = os.environ.get("LLM_CACHE_MODE", "bypass")
+LLM_CACHE_DIR = os.environ.get("LLM_CACHE_DIR", os.path.join(".cache", "llm"))
+LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+# LLM呼び出しのタイムアウト・再試行・サーキットブレーカー（scripts/resilience.py）
+LLM_CALL_TIMEOUT_SEC = float(os.environ.get("LLM_CALL_TIMEOUT_SEC", "180"))
+LLM_STREAM_IDLE_TIMEOUT_SEC = float(os.environ.get("LLM_STREAM_IDLE_TIMEOUT_SEC", "60"))
+LLM_MAX_ATTEMPTS = int(os.environ.get("LLM_MAX_ATTEMPTS", "3"))
+LLM_BACKOFF_BASE_SEC = 2.0
+LLM_BACKOFF_MAX_SEC = 30.0
+LLM_BREAKER_THRESHOLD = 5
+LLM_BREAKER_RESET_SEC = 60.0
+# '1' のとき、応答がp95レイテンシを超えたら同じリクエストをもう1本送る（APIコストが増えるためデフォルトは無効）
+LLM_HEDGE = os.environ.get("LLM_HEDGE", "0") == "1"
+
+# プロンプトに載せるカタログ要約のサイズ（カタログが増えても一定）
+CATALOG_DIGEST_MAX_CLUSTERS = 8
+CATALOG_DIGEST_EXAMPLES = 3
+CATALOG_DIGEST_RECENT = 5
+
+# ステージごとのプロンプト入力トークン予算（推定値）
+PROMPT_TOKEN_BUDGETS = {
+    "summary": 12000,
+    "feature": 3000,
+    "style": 3000,
+    "layout": 6000,
+    "full_evolve": 10000,
+}
+
 # ディレクトリ構成
 PUBLIC_DIR = "public"
+# 生成処理の内部状態（コミットして次回の実行に引き継ぐが、GitHub Pagesには配信しない）
+STATE_DIR = "state"
 ARCHIVE_DIR = os.path.join(PUBLIC_DIR, "archives")
 DATA_DIR = os.path.join(PUBLIC_DIR, "data")
+# アーカイブのプロンプト開示パネルが開かれたときに読み込むJSON
+PROMPTS_DIR = os.path.join(DATA_DIR, "prompts")
+# プロンプト本文の共有ブロブストア（データJSONにはハッシュ参照のみを書く）
+BLOB_DIR = os.path.join(DATA_DIR, "blobs")
 FEATURES_DIR = os.path.join(PUBLIC_DIR, "features")
 STYLES_DIR = os.path.join(PUBLIC_DIR, "styles")
 LAYOUTS_DIR = os.path.join(PUBLIC_DIR, "layouts")
 HISTORY_FILE = os.path.join(PUBLIC_DIR, "history.json")
+HISTORY_LOG_FILE = os.path.join(STATE_DIR, "history.log.jsonl")
+HISTORY_INDEX_FILE = os.path.join(STATE_DIR, "history.index.json")
+# 生成物ごとの入力ハッシュ（入力が変わっていない出力は書き直さない。パスは public/ からの相対）
+BUILD_MANIFEST_FILE = os.path.join(STATE_DIR, "build-manifest.json")
+# 事前圧縮の記録（圧縮ファイルはコミットせず、ワークフローのキャッシュで引き継ぐ）
+PRECOMPRESS_MANIFEST = os.path.join(STATE_DIR, PRECOMPRESS_MANIFEST_FILE)
 FEATURES_FILE = os.path.join(FEATURES_DIR, "features.json")
 STYLES_FILE = os.path.join(STYLES_DIR, "styles.json")
 LAYOUTS_FILE = os.path.join(LAYOUTS_DIR, "layouts.json")
+FEATURES_DIGEST_FILE = os.path.join(FEATURES_DIR, "features.digest.json")
+STYLES_DIGEST_FILE = os.path.join(STYLES_DIR, "styles.digest.json")
+LAYOUTS_DIGEST_FILE = os.path.join(LAYOUTS_DIR, "layouts.digest.json")
+FEED_CACHE_FILE = os.path.join(STATE_DIR, "feed_cache.json")
+SEEN_ARTICLES_FILE = os.path.join(STATE_DIR, "seen_articles.json")
 
 # JST タイムゾーン
 JST = timezone(timedelta(hours=9))
@@ -65,62 +136,111 @@ RSS_FEEDS = [
     "https://blog.google/technology/ai/rss/",
     "https://ai.meta.com/blog/rss/",
 ]
+# ベンチマーク用にフィードを差し替える（カンマ区切り）
+if os.environ.get("MORPHO_RSS_FEEDS"):
+    RSS_FEEDS = [url.strip() for url in os.environ["MORPHO_RSS_FEEDS"].split(",") if url.strip()]
 
 ARTICLES_PER_FEED = 3
 TOP_NEWS_COUNT = 10
 
+# RSS取得の並列設定
+FEED_MAX_WORKERS = 8           # 同時取得数の上限
+FEED_TIMEOUT_SEC = 10          # フィード1件あたりの取得時間の上限（接続から本文の受信完了まで）
+FEED_READ_TIMEOUT_SEC = 5      # 接続・1回の読み込みで待つ上限（締め切りを過ぎてから打ち切るまでの最大の遅れ）
+FEED_READ_CHUNK_BYTES = 16 * 1024
+FEED_TOTAL_DEADLINE_SEC = 30   # 全フィード取得の締め切り
+FEED_USER_AGENT = "MorphoNews/1.0 (+https://github.com/soramk/morphonews)"
+FEED_CACHE_MAX_ENTRIES = 10    # キャッシュに保持するフィードあたりの記事数
+
+# 記事の重複排除設定
+SEEN_TTL_DAYS = 3              # 過去の実行で要約済みの記事を除外する期間
+TITLE_SIMHASH_DISTANCE = 3     # タイトルを類似とみなすSimHashのハミング距離
+# 記事の正規化設定（プロンプト入力の圧縮）
+ARTICLE_SUMMARY_MAX_TOKENS = 80   # 記事要約1件あたりの推定トークン上限
+LEGACY_SUMMARY_CHARS = 200        # 旧方式（生HTMLの先頭200文字）との比較用
+TRACKING_QUERY_PARAMS = {"fbclid", "gclid", "ref", "ref_src", "mc_cid", "mc_eid", "ncid", "guccounter"}
+
 
 # =============================================================================
 # ヘルパー関数
 # =============================================================================
 
+blob_store = BlobStore(BLOB_DIR)
+# 実行ごとのトレース（data/{ID}.trace.json に Chrome トレース形式で書き出す）
+tracer = Tracer()
+
 def load_json(filepath, default=None):
-    """JSONファイルを読み込む"""
+    """JSONファイルを読み込む（ブロブ参照は本文に展開）"""
     if os.path.exists(filepath):
         with open(filepath, 'r', encoding='utf-8') as f:
             try:
-                return json.load(f)
+                return blob_store.expand(json.load(f))
             except:
                 pass
     return default if default is not None else {}
 
 def save_json(filepath, data):
-    """JSONファイルを保存"""
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-def load_history():
-    """履歴を読み込む"""
-    data = load_json(HISTORY_FILE, {"entries": [], "version": 2})
-    if isinstance(data, list):
-        return {"entries": [{"id": h} for h in data], "version": 2}
-    return data
-
-def save_history(history):
-    """履歴を保存"""
-    save_json(HISTORY_FILE, history)
-
-def add_history_entry(history, entry_data):
-    """履歴にエントリを追加"""
-    existing_ids = {e['id'] for e in history['entries']}
-    if entry_data['id'] not in existing_ids:
-        history['entries'].append(entry_data)
-        history['entries'] = sorted(history['entries'], key=lambda x: x['id'])
-    return history
-
-def get_prev_link(current_id, history):
+    """JSONファイルを保存（一時ファイル経由で置き換え）"""
+    with tracer.span("save_json", "io", path=filepath):
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, filepath)
+
+# features.json / styles.json / layouts.json の読み込み→追記→保存を直列化するロック
+registry_lock = threading.Lock()
+
+def run_stages(stages):
+    """独立したステージを並列実行し、全ての完了を待って結果を返す
+    
+    stages: {名前: (関数, 引数タプル)} 。戻り値は {名前: 結果} 。
+    例外を送出したステージの結果はNoneになる。
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(stages) or 1) as executor:
+        futures = {name: executor.submit(fn, *args) for name, (fn, args) in stages.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"  ⚠ Stage '{name}' failed: {e}")
+                results[name] = None
+    return results
+
+def open_history_store():
+    """履歴ストアを開く（初回はhistory.jsonから移行）"""
+    return HistoryStore.open(HISTORY_LOG_FILE, HISTORY_INDEX_FILE, HISTORY_FILE)
+
+def get_prev_link(current_id, history_store):
     """前のアーカイブリンクを取得"""
-    sorted_entries = sorted(history['entries'], key=lambda x: x['id'])
-    past_ids = [e['id'] for e in sorted_entries if e['id'] < current_id]
-    if past_ids:
-        return f"./{past_ids[-1]}.html"
+    prev_id = history_store.prev_id(current_id)
+    if prev_id:
+        return f"./{prev_id}.html"
     return "#"
 
 def sanitize_id(text):
     """IDを安全な形式に変換"""
     return re.sub(r'[^a-zA-Z0-9_-]', '_', text.lower())
 
+def estimate_tokens(text):
+    """トークン数の簡易見積もり（CJKは1文字≒1トークン、それ以外は4文字≒1トークン）"""
+    cjk = len(re.findall(r'[\u3000-\u30ff\u3400-\u9fff\uf900-\ufaff\uff00-\uffef]', text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+def truncate_to_tokens(text, max_tokens):
+    """推定トークン数がmax_tokensに収まるように末尾を切り詰める"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low].rstrip() + "…"
+
 def get_previous_archive_html(prev_link, max_chars=5000):
     """前回のアーカイブHTMLを読み込む（進化参照用）"""
     if not prev_link or prev_link == '#':
@@ -141,34 +261,475 @@ def get_previous_archive_html(prev_link, max_chars=5000):
     return None
 
 
+# =============================================================================
+# LLM呼び出し（レスポンスキャッシュ付き）
+# =============================================================================
+
+llm_cache_lock = threading.Lock()
+llm_backend_lock = threading.Lock()
+llm_backend = None
+llm_caller = ResilientCaller(
+    timeout=LLM_CALL_TIMEOUT_SEC,
+    max_attempts=LLM_MAX_ATTEMPTS,
+    base_delay=LLM_BACKOFF_BASE_SEC,
+    max_delay=LLM_BACKOFF_MAX_SEC,
+    breaker=CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET_SEC),
+    hedge=LLM_HEDGE,
+    retryable=lambda error: get_llm_backend().is_transient(error),
+)
+
+def get_llm_backend():
+    """LLM_BACKEND設定に応じたバックエンドを（初回のみ）生成して返す"""
+    global llm_backend
+    with llm_backend_lock:
+        if llm_backend is None:
+            llm_backend = create_backend(LLM_BACKEND, MODEL_NAME, api_key=API_KEY, mock_url=LLM_MOCK_URL)
+        return llm_backend
+
+def llm_cache_key(model_name, generation_config, prompt):
+    """モデル名・生成設定・プロンプトから決定的なキャッシュキーを作る"""
+    payload = json.dumps(
+        {"model": model_name, "generation_config": generation_config or {}, "prompt": prompt},
+        ensure_ascii=False,
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def load_cached_response(key):
+    """キャッシュからレスポンスを読み込む（ヒット時はLRU用にmtimeを更新）"""
+    cache_path = os.path.join(LLM_CACHE_DIR, f"{key}.json")
+    cached = load_json(cache_path, None)
+    if not cached:
+        return None
+    os.utime(cache_path)
+    usage = cached.get('usage', {})
+    return make_response(cached['text'], usage.get('input', 0), usage.get('output', 0), usage.get('total', 0))
+
+def store_cached_response(key, response):
+    """レスポンスをキャッシュに保存し、上限サイズを超えたら古いものから削除"""
+    with llm_cache_lock:
+        save_json(os.path.join(LLM_CACHE_DIR, f"{key}.json"), {
+            "text": response.text,
+            "usage": {
+                "input": response.usage_metadata.prompt_token_count,
+                "output": response.usage_metadata.candidates_token_count,
+                "total": response.usage_metadata.total_token_count
+            },
+            "cached_at": datetime.now(JST).strftime('%Y-%m-%d %H:%M:%S')
+        })
+        
+        entries = []
+        for name in os.listdir(LLM_CACHE_DIR):
+            path = os.path.join(LLM_CACHE_DIR, name)
+            if name.endswith('.json'):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= LLM_CACHE_MAX_BYTES:
+                break
+            os.remove(path)
+            total_size -= size
+
+def generate_content(prompt, generation_config=None):
+    """LLMにプロンプトを送信する（LLM_CACHE_MODEに応じてキャッシュを利用）"""
+    key = llm_cache_key(MODEL_NAME, generation_config, prompt)
+    
+    with tracer.span("llm.generate", "llm", cache_mode=LLM_CACHE_MODE, prompt_chars=len(prompt)) as span:
+        if LLM_CACHE_MODE in ("record", "replay"):
+            cached = load_cached_response(key)
+            span['cache_hit'] = bool(cached)
+            if cached:
+                print(f"  [CACHE] LLM response replayed ({key[:12]})")
+                return cached
+            if LLM_CACHE_MODE == "replay":
+                raise RuntimeError(f"LLM cache miss in replay mode ({key[:12]})")
+        
+        response = llm_caller.call(get_llm_backend().generate, prompt, generation_config)
+        span['input_tokens'] = response.usage_metadata.prompt_token_count
+        span['output_tokens'] = response.usage_metadata.candidates_token_count
+        
+        if LLM_CACHE_MODE == "record":
+            store_cached_response(key, response)
+        return response
+
+def generate_json(prompt):
+    """JSON出力を要求し、(パース済みデータ, レスポンス) を返す"""
+    response = generate_content(prompt, {"response_mime_type": "application/json"})
+    return json.loads(response.text), response
+
+def stream_content(prompt, generation_config=None):
+    """ストリーミングで生成し、StreamingResponseを返す
+
+    キャッシュを使うモード（record / replay）ではgenerate_content経由の応答を1チャンクとして返す。
+    それ以外では最初のチャンクまでは再試行し、その後はチャンク間のタイムアウトを掛ける（途中からの再試行はしない）。
+    """
+    if LLM_CACHE_MODE in ("record", "replay"):
+        response = generate_content(prompt, generation_config)
+        return StreamingResponse(iter([response.text, response.usage_metadata]))
+    return StreamingResponse(llm_caller.stream(
+        open_llm_stream, prompt, generation_config, idle_timeout=LLM_STREAM_IDLE_TIMEOUT_SEC
+    ))
+
+def open_llm_stream(prompt, generation_config):
+    """バックエンドのストリーミング応答を開き、テキストチャンクの後にusage_metadataを返す"""
+    response = get_llm_backend().stream(prompt, generation_config)
+    yield from response
+    yield response.usage_metadata
+
+
+# =============================================================================
+# プロンプトのトークン予算
+# =============================================================================
+
+def budget_section(text, priority, shrink=None):
+    """予算計画の対象となるプロンプトの可変部分
+    
+    priorityが小さいものから順に切り詰める。shrinkは (text, max_tokens) -> text 。
+    """
+    return {"text": text, "priority": priority, "shrink": shrink or truncate_to_tokens}
+
+def shrink_articles(articles):
+    """各ソースの上位記事を優先して残すshrink関数を作る（元の順序は維持）"""
+    def shrink(_text, max_tokens):
+        rank_in_source = {}
+        ranked = []
+        for index, article in enumerate(articles):
+            rank = rank_in_source.get(article.get('source'), 0)
+            rank_in_source[article.get('source')] = rank + 1
+            ranked.append((rank, index))
+        kept = set()
+        for _, index in sorted(ranked):
+            candidate = kept | {index}
+            if estimate_tokens(json.dumps([articles[i] for i in sorted(candidate)], ensure_ascii=False)) > max_tokens:
+                break
+            kept = candidate
+        return json.dumps([articles[i] for i in sorted(kept)], ensure_ascii=False)
+    return shrink
+
+def plan_prompt(stage, build, sections):
+    """予算内に収まるようにプロンプトを組み立てる
+    
+    build(**{名前: テキスト}) でプロンプト全体を生成し、推定トークン数が
+    PROMPT_TOKEN_BUDGETS[stage] を超える間、優先度の低いセクションから切り詰める。
+    戻り値は (プロンプト, 予算計画) 。
+    """
+    budget = PROMPT_TOKEN_BUDGETS.get(stage)
+    texts = {name: section['text'] for name, section in sections.items()}
+    prompt = build(**texts)
+    estimated = original = estimate_tokens(prompt)
+    trimmed = []
+    
+    if budget:
+        for name, section in sorted(sections.items(), key=lambda item: item[1]['priority']):
+            if estimated <= budget:
+                break
+            section_tokens = estimate_tokens(texts[name])
+            texts[name] = section['shrink'](texts[name], max(0, section_tokens - (estimated - budget)))
+            prompt = build(**texts)
+            estimated = estimate_tokens(prompt)
+            trimmed.append(name)
+    
+    return prompt, {
+        "budget": budget,
+        "original_estimate": original,
+        "estimated": estimated,
+        "trimmed": trimmed
+    }
+
+def log_token_budget(stage, plan, response):
+    """推定トークン数と実際の入力トークン数を並べて記録する"""
+    plan['actual'] = response.usage_metadata.prompt_token_count
+    trimmed = f", trimmed={','.join(plan['trimmed'])}" if plan['trimmed'] else ""
+    print(f"  [BUDGET] {stage}: estimated={plan['estimated']} actual={plan['actual']} budget={plan['budget']}{trimmed}")
+    return plan
+
+
 # =============================================================================
 # 1. ニュース収集
 # =============================================================================
 
+def load_feed_cache():
+    """フィードキャッシュ（ETag/Last-Modified/記事）を読み込む"""
+    return load_json(FEED_CACHE_FILE, {"version": 1, "feeds": {}})
+
+def save_feed_cache(cache):
+    """フィードキャッシュを保存"""
+    save_json(FEED_CACHE_FILE, cache)
+
+def fetch_feed(url, cached=None):
+    """フィードを1件取得する（URLと結果のステータスをトレースに記録）"""
+    with tracer.span("fetch_feed", "feed", url=url) as span:
+        result = request_feed(url, cached)
+        span['status'] = result['status']
+        return result
+
+class FeedDeadlineExceeded(TimeoutError):
+    """フィード1件の取得がFEED_TIMEOUT_SECを超えた"""
+
+def read_body_before(response, deadline):
+    """本文を少しずつ読み、deadline（time.time()の値）を過ぎたらFeedDeadlineExceededを送出する
+    
+    requestsのtimeoutは1回の読み込みの間隔にしか効かないため、少しずつ送り続けるサーバーは
+    それだけでは打ち切れない。
+    """
+    body = bytearray()
+    for chunk in response.iter_content(FEED_READ_CHUNK_BYTES):
+        body += chunk
+        if time.time() > deadline:
+            raise FeedDeadlineExceeded(f"feed took longer than {FEED_TIMEOUT_SEC}s")
+    return bytes(body)
+
+def request_feed(url, cached=None):
+    """フィードを1件取得してパースする（タイムアウト・条件付きGET付き）
+    
+    cachedに前回のETag/Last-Modifiedがあれば条件付きリクエストを送り、
+    304の場合はキャッシュ済みの記事をそのまま返す。
+    接続から本文の受信完了までをFEED_TIMEOUT_SECで打ち切る（結果のstatusは "timeout"）。
+    """
+    start = time.time()
+    deadline = start + FEED_TIMEOUT_SEC
+    headers = {"User-Agent": FEED_USER_AGENT}
+    if cached:
+        if cached.get('etag'):
+            headers["If-None-Match"] = cached['etag']
+        if cached.get('last_modified'):
+            headers["If-Modified-Since"] = cached['last_modified']
+    
+    try:
+        with requests.get(url, timeout=FEED_READ_TIMEOUT_SEC, headers=headers, stream=True) as response:
+            content = read_body_before(response, deadline)
+        if response.status_code == 304 and cached:
+            return {
+                "url": url,
+                "status": "not_modified",
+                "title": cached.get('title', 'Unknown'),
+                "entries": cached.get('entries', []),
+                "cache": cached,
+                "latency_sec": round(time.time() - start, 2)
+            }
+        response.raise_for_status()
+        
+        feed = feedparser.parse(content)
+        entries = [
+            {
+                "title": entry.title,
+                "link": entry.link,
+                "summary": entry.get('summary', '')
+            }
+            for entry in feed.entries[:FEED_CACHE_MAX_ENTRIES]
+            if 'title' in entry and 'link' in entry
+        ]
+        title = feed.feed.get('title', 'Unknown')
+        return {
+            "url": url,
+            "status": "ok",
+            "title": title,
+            "entries": entries,
+            "cache": {
+                "etag": response.headers.get('ETag'),
+                "last_modified": response.headers.get('Last-Modified'),
+                "title": title,
+                "entries": entries,
+                "fetched_at": datetime.now(JST).strftime('%Y-%m-%d %H:%M:%S')
+            },
+            "latency_sec": round(time.time() - start, 2)
+        }
+    except FeedDeadlineExceeded as e:
+        return {"url": url, "status": "timeout", "error": str(e), "latency_sec": round(time.time() - start, 2)}
+    except Exception as e:
+        return {"url": url, "status": "error", "error": str(e), "latency_sec": round(time.time() - start, 2)}
+
+def fetch_all_feeds(urls, feed_cache=None):
+    """全フィードを並列取得し、urlsと同じ順序で結果を返す"""
+    cached_feeds = (feed_cache or {}).get('feeds', {})
+    executor = ThreadPoolExecutor(max_workers=FEED_MAX_WORKERS)
+    futures = [executor.submit(fetch_feed, url, cached_feeds.get(url)) for url in urls]
+    wait(futures, timeout=FEED_TOTAL_DEADLINE_SEC)
+    # 締め切りを過ぎたフィードは待たずに打ち切る
+    executor.shutdown(wait=False, cancel_futures=True)
+    
+    results = []
+    for url, future in zip(urls, futures):
+        if future.done() and not future.cancelled():
+            results.append(future.result())
+        else:
+            results.append({"url": url, "status": "deadline_exceeded", "latency_sec": FEED_TOTAL_DEADLINE_SEC})
+    return results
+
+def html_to_text(raw):
+    """フィードのHTML断片からタグ・エンティティを除去し、空白を詰めたテキストにする"""
+    if not raw:
+        return ""
+    text = BeautifulSoup(raw, "html.parser").get_text(" ")
+    # 二重エスケープされたエンティティ（&amp;amp; など）も戻す
+    text = html_module.unescape(text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+def normalize_articles(articles):
+    """プロンプト入力用に記事を正規化し、削減できたトークン数を集計する"""
+    legacy = [{**a, "summary": a['summary'][:LEGACY_SUMMARY_CHARS] + "..."} for a in articles]
+    normalized = [
+        {
+            **a,
+            "title": html_to_text(a['title']),
+            "summary": truncate_to_tokens(html_to_text(a['summary']), ARTICLE_SUMMARY_MAX_TOKENS)
+        }
+        for a in articles
+    ]
+    legacy_tokens = estimate_tokens(json.dumps(legacy, ensure_ascii=False))
+    normalized_tokens = estimate_tokens(json.dumps(normalized, ensure_ascii=False))
+    stats = {
+        "legacy_tokens_est": legacy_tokens,
+        "normalized_tokens_est": normalized_tokens,
+        "saved_tokens_est": legacy_tokens - normalized_tokens
+    }
+    return normalized, stats
+
+def canonicalize_url(url):
+    """比較用にURLを正規化（スキーム・www・トラッキングパラメータ・末尾スラッシュ・フラグメントを除去）"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_QUERY_PARAMS
+    )
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(("", host, path, urlencode(query), ""))
+
+def title_simhash(title):
+    """タイトルの64bit SimHash（文字3-gramベース。日本語タイトルにも対応）"""
+    text = re.sub(r'\s+', ' ', title.lower()).strip()
+    grams = [text[i:i + 3] for i in range(max(1, len(text) - 2))]
+    weights = [0] * 64
+    for gram in grams:
+        h = int.from_bytes(hashlib.md5(gram.encode('utf-8')).digest()[:8], 'big')
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+def is_near_duplicate(simhash, known_hashes):
+    """既知のSimHashのいずれかとハミング距離が閾値以下か"""
+    return any(bin(simhash ^ known).count('1') <= TITLE_SIMHASH_DISTANCE for known in known_hashes)
+
+def load_seen_index(now):
+    """要約済み記事のインデックスを読み込み、TTL切れのエントリを除去"""
+    index = load_json(SEEN_ARTICLES_FILE, {"version": 1, "urls": {}, "titles": {}})
+    cutoff = (now - timedelta(days=SEEN_TTL_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+    for key in ("urls", "titles"):
+        index[key] = {k: seen_at for k, seen_at in index.get(key, {}).items() if seen_at >= cutoff}
+    return index
+
+def save_seen_index(index):
+    """要約済み記事のインデックスを保存"""
+    save_json(SEEN_ARTICLES_FILE, index)
+
+def dedupe_articles(articles, seen_index, now):
+    """フィード間・実行間の重複記事を除外する
+    
+    URL正規化とタイトルのSimHashで同一記事を判定し、過去の実行で要約済みの記事も除く。
+    残りがTOP_NEWS_COUNT件未満になる場合は、要約済みの記事で補充する。
+    採用した記事はseen_indexに記録する（保存は呼び出し側で行う）。
+    """
+    seen_at = now.strftime('%Y-%m-%d %H:%M:%S')
+    seen_title_hashes = [int(h, 16) for h in seen_index['titles']]
+    run_urls = set()
+    run_title_hashes = []
+    fresh = []
+    previously_seen = []
+    stats = {"input": len(articles), "duplicate_urls": 0, "near_duplicate_titles": 0, "seen_before": 0, "backfilled": 0}
+    
+    for article in articles:
+        url_key = canonicalize_url(article['link'])
+        simhash = title_simhash(article['title'])
+        if url_key in run_urls:
+            stats['duplicate_urls'] += 1
+            continue
+        if is_near_duplicate(simhash, run_title_hashes):
+            stats['near_duplicate_titles'] += 1
+            continue
+        run_urls.add(url_key)
+        run_title_hashes.append(simhash)
+        
+        if url_key in seen_index['urls'] or is_near_duplicate(simhash, seen_title_hashes):
+            stats['seen_before'] += 1
+            previously_seen.append(article)
+            continue
+        fresh.append(article)
+        seen_index['urls'][url_key] = seen_at
+        seen_index['titles'][f"{simhash:016x}"] = seen_at
+    
+    if len(fresh) < TOP_NEWS_COUNT:
+        backfill = previously_seen[:TOP_NEWS_COUNT - len(fresh)]
+        stats['backfilled'] = len(backfill)
+        fresh.extend(backfill)
+    
+    stats['output'] = len(fresh)
+    return fresh, stats
+
+@tracer.traced()
 def fetch_and_summarize_news(timestamp_id):
-    """RSSフィードからニュースを取得し、AIで要約"""
+    """RSSフィードからニュースを取得し、AIで要約
+
+    (データ, 要約済み記事のインデックス) を返す。インデックスは実行全体が成功してから呼び出し側で保存する。
+    """
     print("Step 1: Fetching news...")
     start_time = datetime.now(JST)
     fetch_start = time.time()
     
     articles = []
     source_urls = []
+    feed_stats = []
+    feed_cache = load_feed_cache()
     
-    for url in RSS_FEEDS:
-        try:
-            feed = feedparser.parse(url)
-            source_urls.append(url)
-            for entry in feed.entries[:ARTICLES_PER_FEED]:
-                articles.append({
-                    "title": entry.title,
-                    "link": entry.link,
-                    "summary": entry.get('summary', '')[:200] + "...",
-                    "source": feed.feed.get('title', 'Unknown')
-                })
-        except Exception as e:
-            print(f"Error fetching {url}: {e}")
-
-    summary_prompt = f"""
+    with tracer.span("fetch_all_feeds", "feed", feeds=len(RSS_FEEDS)):
+        feed_results = fetch_all_feeds(RSS_FEEDS, feed_cache)
+    for result in feed_results:
+        url = result['url']
+        stat = {"url": url, "status": result['status'], "latency_sec": result['latency_sec'], "entries": 0}
+        if result['status'] not in ("ok", "not_modified"):
+            stat['error'] = result.get('error', result['status'])
+            print(f"Error fetching {url}: {stat['error']}")
+            feed_stats.append(stat)
+            continue
+        
+        feed_cache['feeds'][url] = result['cache']
+        source_urls.append(url)
+        for entry in result['entries'][:ARTICLES_PER_FEED]:
+            articles.append({
+                "title": entry['title'],
+                "link": entry['link'],
+                "summary": entry['summary'],
+                "source": result['title']
+            })
+            stat['entries'] += 1
+        feed_stats.append(stat)
+    
+    save_feed_cache(feed_cache)
+    
+    feed_fetch_time = time.time() - fetch_start
+    ok_count = sum(1 for s in feed_stats if s['status'] in ("ok", "not_modified"))
+    cached_count = sum(1 for s in feed_stats if s['status'] == "not_modified")
+    print(f"  ✓ Fetched {ok_count}/{len(RSS_FEEDS)} feeds in {feed_fetch_time:.2f}s ({cached_count} not modified)")
+    
+    # 正規化（HTML除去・エンティティ復元・空白圧縮・トークン数での切り詰め）
+    with tracer.span("normalize_articles", "stage", articles=len(articles)):
+        articles, normalization_stats = normalize_articles(articles)
+    print(f"  ✓ Normalized: ~{normalization_stats['legacy_tokens_est']} → ~{normalization_stats['normalized_tokens_est']} input tokens "
+          f"(saved ~{normalization_stats['saved_tokens_est']})")
+    
+    # 重複排除（フィード間・実行間）
+    seen_index = load_seen_index(start_time)
+    with tracer.span("dedupe_articles", "stage", articles=len(articles)):
+        articles, dedup_stats = dedupe_articles(articles, seen_index, start_time)
+    print(f"  ✓ Dedup: {dedup_stats['input']} → {dedup_stats['output']} articles "
+          f"(url={dedup_stats['duplicate_urls']}, title={dedup_stats['near_duplicate_titles']}, "
+          f"seen={dedup_stats['seen_before']}, backfilled={dedup_stats['backfilled']})")
+    
+    def build_summary_prompt(articles_json):
+        return f"""
     ITジャーナリストとして、以下の記事リストからWeb記事コンテンツを作成してください。
     
     【要件】
@@ -176,7 +737,7 @@ def fetch_and_summarize_news(timestamp_id):
     2. 注目ニュース{TOP_NEWS_COUNT}選をピックアップ。重複や類似トピックは避け、多様な分野をカバー。
     3. 出力はJSON形式。
     
-    入力: {json.dumps(articles, ensure_ascii=False)}
+    入力: {articles_json}
     
     出力Schema:
     {{
@@ -186,17 +747,17 @@ def fetch_and_summarize_news(timestamp_id):
     }}
     """
     
+    summary_prompt, budget_plan = plan_prompt("summary", build_summary_prompt, {
+        "articles_json": budget_section(json.dumps(articles, ensure_ascii=False), 1, shrink_articles(articles)),
+    })
+    
     print(f"Requesting AI summarization ({MODEL_NAME})...")
     summary_gen_start = time.time()
     
-    model = genai.GenerativeModel(
-        model_name=MODEL_NAME,
-        generation_config={"response_mime_type": "application/json"}
-    )
-    response = model.generate_content(summary_prompt)
+    with tracer.span("summarize", "stage"):
+        content_json, response = generate_json(summary_prompt)
     summary_gen_time = time.time() - summary_gen_start
-    
-    content_json = json.loads(response.text)
+    log_token_budget("summary", budget_plan, response)
     
     # メタデータ
     content_json['meta'] = {
@@ -212,7 +773,13 @@ def fetch_and_summarize_news(timestamp_id):
             'total': response.usage_metadata.total_token_count
         },
         'summary_generation_time_sec': round(summary_gen_time, 2),
-        'article_count': len(articles)
+        'article_count': len(articles),
+        'feed_fetch_time_sec': round(feed_fetch_time, 2),
+        'feed_cache_hits': cached_count,
+        'dedup': dedup_stats,
+        'normalization': normalization_stats,
+        'token_budget': {'summary': budget_plan},
+        'feed_stats': feed_stats
     }
     
     total_fetch_time = time.time() - fetch_start
@@ -221,9 +788,83 @@ def fetch_and_summarize_news(timestamp_id):
     # JSONデータの保存
     os.makedirs(DATA_DIR, exist_ok=True)
     json_path = os.path.join(DATA_DIR, f"{timestamp_id}.json")
-    save_json(json_path, content_json)
+    save_json(json_path, blob_store.pack(content_json))
         
-    return content_json
+    return content_json, seen_index
+
+
+# =============================================================================
+# カタログ要約（プロンプト用）
+# =============================================================================
+
+def feature_cluster(item):
+    """機能はカテゴリで分類"""
+    return item.get('category', 'ui')
+
+def style_cluster(item):
+    """テーマはIDの先頭語（agentic / pragmatic など）で分類"""
+    return item['id'].split('-')[0]
+
+def layout_cluster(item):
+    """レイアウトはグリッドタイプで分類"""
+    return item.get('preview', {}).get('gridType', 'unknown')
+
+CATALOGS = {
+    "feature": {"file": FEATURES_FILE, "digest_file": FEATURES_DIGEST_FILE, "key": "features", "cluster": feature_cluster},
+    "style": {"file": STYLES_FILE, "digest_file": STYLES_DIGEST_FILE, "key": "themes", "cluster": style_cluster},
+    "layout": {"file": LAYOUTS_FILE, "digest_file": LAYOUTS_DIGEST_FILE, "key": "layouts", "cluster": layout_cluster},
+}
+
+def add_to_digest(digest, kind, item):
+    """カタログ要約に1件追加（クラスタの件数・代表例・直近IDを更新）"""
+    cluster_name = CATALOGS[kind]['cluster'](item)
+    cluster = digest['clusters'].setdefault(cluster_name, {"count": 0, "examples": []})
+    cluster['count'] += 1
+    cluster['examples'] = ([item.get('name', item['id'])] + cluster['examples'])[:CATALOG_DIGEST_EXAMPLES]
+    digest['recent'] = (digest['recent'] + [item['id']])[-CATALOG_DIGEST_RECENT:]
+    digest['count'] += 1
+    return digest
+
+def build_catalog_digest(kind, items):
+    """レジストリ全体からカタログ要約を作り直す"""
+    digest = {"version": 1, "kind": kind, "count": 0, "clusters": {}, "recent": []}
+    for item in items:
+        add_to_digest(digest, kind, item)
+    return digest
+
+def load_catalog_digest(kind):
+    """カタログ要約を読み込む（無い・レジストリと件数が合わない場合は再構築）"""
+    catalog = CATALOGS[kind]
+    with registry_lock:
+        items = load_json(catalog['file'], {}).get(catalog['key'], [])
+        digest = load_json(catalog['digest_file'], None)
+        if not digest or digest.get('count') != len(items):
+            digest = build_catalog_digest(kind, items)
+            save_json(catalog['digest_file'], digest)
+    return digest
+
+def update_catalog_digest(kind, item):
+    """レジストリへの追加に合わせてカタログ要約を差分更新（registry_lock内で呼ぶ）"""
+    catalog = CATALOGS[kind]
+    digest = load_json(catalog['digest_file'], None)
+    items = load_json(catalog['file'], {}).get(catalog['key'], [])
+    if digest and digest.get('count') == len(items) - 1:
+        digest = add_to_digest(digest, kind, item)
+    else:
+        digest = build_catalog_digest(kind, items)
+    save_json(catalog['digest_file'], digest)
+
+def format_catalog_digest(digest):
+    """プロンプト用にカタログ要約を整形（大きいクラスタから最大CATALOG_DIGEST_MAX_CLUSTERS件）"""
+    clusters = sorted(digest['clusters'].items(), key=lambda c: -c[1]['count'])
+    lines = [f"合計{digest['count']}件"]
+    for name, cluster in clusters[:CATALOG_DIGEST_MAX_CLUSTERS]:
+        lines.append(f"- {name}（{cluster['count']}件）: 例 {', '.join(cluster['examples'])}")
+    others = clusters[CATALOG_DIGEST_MAX_CLUSTERS:]
+    if others:
+        lines.append(f"- その他{len(others)}分類（{sum(c['count'] for _, c in others)}件）")
+    lines.append(f"直近に追加: {', '.join(digest['recent'])}")
+    return "\n".join(lines)
 
 
 # =============================================================================
@@ -244,13 +885,15 @@ def get_existing_feature_ids():
     features = load_features()
     return [f['id'] for f in features.get('features', [])]
 
+@tracer.traced()
 def generate_new_feature(mood_keyword, timestamp_id):
     """AIに新しい機能を生成させる"""
     print("Step 2a: Generating new feature...")
     
     existing_ids = get_existing_feature_ids()
     
-    feature_prompt = f"""
+    def build_feature_prompt(catalog_digest):
+        return f"""
 あなたはWebフロントエンド開発者です。MorphoNewsという進化型ニュースサイトに新しい機能を追加してください。
 
 【プロジェクト概要】
@@ -258,8 +901,8 @@ MorphoNewsは「自己進化するWebページ」です。毎回の実行で新
 
 【今日のムード】{mood_keyword}
 
-【既存の機能】
-{json.dumps(existing_ids, ensure_ascii=False)}
+【既存の機能（カテゴリ別の要約）】
+{catalog_digest}
 
 【要件】
 1. 既存の機能と重複しない、新しいユーザー体験を提供する機能を1つ考案
@@ -278,14 +921,15 @@ MorphoNewsは「自己進化するWebページ」です。毎回の実行で新
 
 コードのみ。説明不要。
 """
+    
+    feature_prompt, budget_plan = plan_prompt("feature", build_feature_prompt, {
+        "catalog_digest": budget_section(format_catalog_digest(load_catalog_digest("feature")), 1),
+    })
 
     try:
-        model = genai.GenerativeModel(
-            model_name=MODEL_NAME,
-            generation_config={"response_mime_type": "application/json"}
-        )
-        response = model.generate_content(feature_prompt)
+        response = generate_content(feature_prompt, {"response_mime_type": "application/json"})
         print(f"  [DEBUG] Feature response received, length: {len(response.text)}")
+        log_token_budget("feature", budget_plan, response)
         
         feature_data = json.loads(response.text)
         
@@ -320,7 +964,6 @@ MorphoNewsは「自己進化するWebページ」です。毎回の実行で新
             f.write(js_content)
         
         # features.jsonに登録
-        features = load_features()
         new_feature = {
             "id": feature_id,
             "name": feature_data['name'],
@@ -332,13 +975,17 @@ MorphoNewsは「自己進化するWebページ」です。毎回の実行で新
             "addedDate": datetime.now(JST).strftime('%Y-%m-%d'),
             "author": "ai"
         }
-        features['features'].append(new_feature)
-        save_features(features)
+        with registry_lock:
+            features = load_features()
+            features['features'].append(new_feature)
+            save_features(features)
+            update_catalog_digest("feature", new_feature)
         
         print(f"  ✓ Generated feature: {feature_data['name']} ({feature_id})")
         return {
             **new_feature,
             "prompt": feature_prompt.strip(),
+            "budget": budget_plan,
             "tokens": {
                 "input": response.usage_metadata.prompt_token_count,
                 "output": response.usage_metadata.candidates_token_count,
@@ -375,19 +1022,21 @@ def get_existing_style_ids():
     styles = load_styles()
     return [s['id'] for s in styles.get('themes', [])]
 
+@tracer.traced()
 def generate_new_style(mood_keyword, timestamp_id):
     """AIに新しいスタイル（テーマ）を生成させる"""
     print("Step 2b: Generating new style...")
     
     existing_ids = get_existing_style_ids()
     
-    style_prompt = f"""
+    def build_style_prompt(catalog_digest):
+        return f"""
 あなたはWebデザイナーです。MorphoNewsという進化型ニュースサイトに新しいカラーテーマを作成してください。
 
 【今日のムード】{mood_keyword}
 
-【既存のテーマ】
-{json.dumps(existing_ids, ensure_ascii=False)}
+【既存のテーマ（系統別の要約）】
+{catalog_digest}
 
 【要件】
 1. 今日のムードを反映した、新しいカラーテーマを作成
@@ -422,14 +1071,15 @@ def generate_new_style(mood_keyword, timestamp_id):
 
 CSSのみ。説明不要。
 """
+    
+    style_prompt, budget_plan = plan_prompt("style", build_style_prompt, {
+        "catalog_digest": budget_section(format_catalog_digest(load_catalog_digest("style")), 1),
+    })
 
     try:
-        model = genai.GenerativeModel(
-            model_name=MODEL_NAME,
-            generation_config={"response_mime_type": "application/json"}
-        )
-        response = model.generate_content(style_prompt)
+        response = generate_content(style_prompt, {"response_mime_type": "application/json"})
         print(f"  [DEBUG] Style response received, length: {len(response.text)}")
+        log_token_budget("style", budget_plan, response)
         
         style_data = json.loads(response.text)
         
@@ -465,7 +1115,6 @@ CSSのみ。説明不要。
             f.write(css_content)
         
         # styles.jsonに登録
-        styles = load_styles()
         new_style = {
             "id": style_id,
             "name": style_data['name'],
@@ -476,13 +1125,17 @@ CSSのみ。説明不要。
             "author": "ai",
             "mood": mood_keyword
         }
-        styles['themes'].append(new_style)
-        save_styles(styles)
+        with registry_lock:
+            styles = load_styles()
+            styles['themes'].append(new_style)
+            save_styles(styles)
+            update_catalog_digest("style", new_style)
         
         print(f"  ✓ Generated style: {style_data['name']} ({style_id})")
         return {
             **new_style,
             "prompt": style_prompt.strip(),
+            "budget": budget_plan,
             "tokens": {
                 "input": response.usage_metadata.prompt_token_count,
                 "output": response.usage_metadata.candidates_token_count,
@@ -519,6 +1172,7 @@ def get_existing_layout_ids():
     layouts = load_layouts()
     return [l['id'] for l in layouts.get('layouts', [])]
 
+@tracer.traced()
 def generate_new_layout(mood_keyword, timestamp_id, prev_link=None, generation_count=1):
     """AIに新しいレイアウト（ページ構造）を生成させる - 進化型"""
     print("Step 2c: Generating new layout (enhanced evolution)...")
@@ -527,7 +1181,8 @@ def generate_new_layout(mood_keyword, timestamp_id, prev_link=None, generation_c
     layouts = load_layouts()
     
     # 前回のレイアウト情報を取得
-    prev_layout_info = ""
+    last_layout = None
+    prev_css = ""
     if len(layouts.get('layouts', [])) > 0:
         last_layout = layouts['layouts'][-1]
         last_layout_path = os.path.join(LAYOUTS_DIR, last_layout.get('file', ''))
@@ -535,7 +1190,16 @@ def generate_new_layout(mood_keyword, timestamp_id, prev_link=None, generation_c
             try:
                 with open(last_layout_path, 'r', encoding='utf-8') as f:
                     prev_css = f.read()[:3000]
-                prev_layout_info = f"""
+            except:
+                pass
+    
+    # 前回のHTMLを取得（進化の参照用）
+    prev_html = (get_previous_archive_html(prev_link, 3000) if prev_link else None) or ""
+    
+    def build_layout_prompt(catalog_digest, prev_css, prev_html):
+        prev_layout_info = ""
+        if prev_css:
+            prev_layout_info = f"""
 【前回のレイアウト参考】
 名前: {last_layout.get('name', 'Unknown')}
 タイプ: {last_layout.get('preview', {}).get('gridType', 'Unknown')}
@@ -543,21 +1207,15 @@ def generate_new_layout(mood_keyword, timestamp_id, prev_link=None, generation_c
 {prev_css}
 ```
 """
-            except:
-                pass
-    
-    # 前回のHTMLを取得（進化の参照用）
-    prev_html = get_previous_archive_html(prev_link, 3000) if prev_link else None
-    prev_html_context = ""
-    if prev_html:
-        prev_html_context = f"""
+        prev_html_context = ""
+        if prev_html:
+            prev_html_context = f"""
 【前回のページ構造参考（HTML抜粋）】
 ```html
 {prev_html}
 ```
 """
-    
-    layout_prompt = f"""
+        return f"""
 あなたは世界最高の前衛的Webデザイナー兼UIリサーチャーです。
 MorphoNewsは「自己進化するWebページ」をコンセプトとした実験プロジェクトです。
 あなたの役割は、毎回のレイアウトでWebデザインの新しい可能性を探求し、進化を続けることです。
@@ -568,8 +1226,8 @@ MorphoNewsは「自己進化するWebページ」をコンセプトとした実
 【今日のムード】{mood_keyword}
 【これまでのレイアウト数】{len(existing_ids)}件
 
-【既存のレイアウトID】
-{json.dumps(existing_ids, ensure_ascii=False)}
+【既存のレイアウト（グリッドタイプ別の要約）】
+{catalog_digest}
 {prev_layout_info}
 {prev_html_context}
 
@@ -632,14 +1290,18 @@ JSON形式で出力してください：
 
 創造的で斬新なレイアウトを生成してください。前回との差異を明確にしてください。
 """
+    
+    # 優先度: カタログ要約 < 前回のHTML < 前回のCSS
+    layout_prompt, budget_plan = plan_prompt("layout", build_layout_prompt, {
+        "catalog_digest": budget_section(format_catalog_digest(load_catalog_digest("layout")), 1),
+        "prev_html": budget_section(prev_html, 2),
+        "prev_css": budget_section(prev_css, 3),
+    })
 
     try:
-        model = genai.GenerativeModel(
-            model_name=MODEL_NAME,
-            generation_config={"response_mime_type": "application/json"}
-        )
-        response = model.generate_content(layout_prompt)
+        response = generate_content(layout_prompt, {"response_mime_type": "application/json"})
         print(f"  [DEBUG] Layout response received, length: {len(response.text)}")
+        log_token_budget("layout", budget_plan, response)
         
         layout_data = json.loads(response.text)
         
@@ -678,7 +1340,6 @@ JSON形式で出力してください：
             f.write(css_content)
         
         # layouts.jsonに登録
-        layouts = load_layouts()
         new_layout = {
             "id": layout_id,
             "name": layout_data['name'],
@@ -691,14 +1352,18 @@ JSON形式で出力してください：
             "mood": mood_keyword,
             "generation": generation_count
         }
-        layouts['layouts'].append(new_layout)
-        save_layouts(layouts)
+        with registry_lock:
+            layouts = load_layouts()
+            layouts['layouts'].append(new_layout)
+            save_layouts(layouts)
+            update_catalog_digest("layout", new_layout)
         
         print(f"  ✓ Generated layout: {layout_data['name']} ({layout_id})")
         print(f"    Evolution: {evolution_note}")
         return {
             **new_layout,
             "prompt": layout_prompt.strip(),
+            "budget": budget_plan,
             "tokens": {
                 "input": response.usage_metadata.prompt_token_count,
                 "output": response.usage_metadata.candidates_token_count,
@@ -721,21 +1386,54 @@ JSON形式で出力してください：
 # 3c. HTML全体生成 (full-evolveモード) - 完全自律型進化
 # =============================================================================
 
+# AIが出力するHTML内のプレースホルダー
+FULL_EVOLVE_PLACEHOLDERS = placeholder_variants_pattern(
+    ['DESIGN_TOKENS', 'DESIGN_TIME', 'DESIGN_PROMPT', 'TOTAL_TIME']
+)
+# 生成が終わるまで値が決まらないプレースホルダー（それ以外は受信しながら置換する）
+FULL_EVOLVE_DEFERRED = ('DESIGN_TOKENS', 'DESIGN_TIME', 'TOTAL_TIME')
+# 受信中のHTMLを書き出す一時ファイルの置き場所（生成に失敗した場合は途中までの出力が残る）
+FULL_EVOLVE_PARTIAL_DIR = os.path.join(".cache", "full-evolve")
+
+def strip_code_fence_stream(chunks):
+    """先頭の ```html / ``` と末尾の ``` 、前後の空白をチャンクを受け取りながら除去する"""
+    chunks = iter(chunks)
+    head = ""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= len("```html"):
+            break
+    if head.startswith("```html"):
+        head = head[7:]
+    if head.startswith("```"):
+        head = head[3:]
+    
+    started = False
+    tail = ""
+    for chunk in itertools.chain([head], chunks):
+        text = tail + chunk
+        if not started:
+            text = text.lstrip()
+            started = bool(text)
+        # 末尾の空白とバッククォートは閉じのフェンスかもしれないので次のチャンクまで保留
+        keep = len(text) - len(text.rstrip(" \t\r\n`"))
+        tail = text[len(text) - keep:]
+        if len(text) > keep:
+            yield text[:len(text) - keep]
+    tail = tail.rstrip()
+    if tail.endswith("```"):
+        tail = tail[:-3].rstrip()
+    if tail and started:
+        yield tail
+
+@tracer.traced()
 def generate_full_evolve_html(news_data, current_id, prev_link, generation_count):
     """AIにHTML全体を生成させる - 完全自律型進化モード"""
-    print("Step 3: Generating FULL EVOLVE HTML (AI-driven complete redesign)...")
+    print("Step 2: Generating FULL EVOLVE HTML (AI-driven complete redesign)...")
     gen_start = time.time()
     
     # 前回のHTMLを取得
-    prev_html = get_previous_archive_html(prev_link, 5000)
-    prev_html_context = ""
-    if prev_html:
-        prev_html_context = f"""
-【前回のデザイン参考（先頭5000文字）】
-```html
-{prev_html}
-```
-"""
+    prev_html = get_previous_archive_html(prev_link, 5000) or ""
     
     display_date = news_data['meta']['display_date']
     mood_keyword = news_data.get('mood_keyword', 'neutral')
@@ -750,7 +1448,16 @@ def generate_full_evolve_html(news_data, current_id, prev_link, generation_count
     top_news = news_data.get('top_news', [])
     daily_summary = news_data.get('daily_summary', '')
     
-    design_prompt = f"""あなたは世界最高の前衛的Webデザイナー兼UIリサーチャーです。
+    def build_design_prompt(prev_html, summary_excerpt):
+        prev_html_context = ""
+        if prev_html:
+            prev_html_context = f"""
+【前回のデザイン参考（先頭5000文字）】
+```html
+{prev_html}
+```
+"""
+        return f"""あなたは世界最高の前衛的Webデザイナー兼UIリサーチャーです。
 MorphoNewsは「自己進化するWebページ」をコンセプトとした実験プロジェクトです。
 あなたの役割は、毎回のデザインでWebデザインの新しい可能性を探求し、進化を続けることです。
 
@@ -817,7 +1524,7 @@ D) プロンプト開示セクション:
    `<details>` タグで折りたたみ表示：
    - 「要約AIプロンプト」: 
    ```
-   {summary_prompt[:1000]}...
+   {summary_excerpt}...
    ```
    - 「デザインAIプロンプト」: {{{{ DESIGN_PROMPT }}}}
 
@@ -831,53 +1538,68 @@ E) 進化ログセクション（推奨）:
 - 外部JSライブラリは最小限に（アイコンにLucideを使う場合のみ許可: https://unpkg.com/lucide@latest）
 - 完全なHTMLを出力してください
 """
-
+    
+    # 優先度: 前回のHTML < 要約プロンプト抜粋
+    design_prompt, budget_plan = plan_prompt("full_evolve", build_design_prompt, {
+        "prev_html": budget_section(prev_html, 1),
+        "summary_excerpt": budget_section(summary_prompt[:1000], 2),
+    })
+
+    # 受信したチャンクはフェンス除去・プレースホルダー置換をしながら一時ファイルに書き出す
+    os.makedirs(FULL_EVOLVE_PARTIAL_DIR, exist_ok=True)
+    partial_path = os.path.join(FULL_EVOLVE_PARTIAL_DIR, f"{current_id}.html.partial")
+    renderer = StreamingRenderer(
+        FULL_EVOLVE_PLACEHOLDERS,
+        # DESIGN_PROMPTは長いのでエスケープして置換
+        {'DESIGN_PROMPT': design_prompt[:3000] + "..."},
+        deferred=FULL_EVOLVE_DEFERRED,
+        escaped={'DESIGN_PROMPT'}
+    )
+    
     try:
-        model = genai.GenerativeModel(
-            model_name=MODEL_NAME
-        )
-        response = model.generate_content(design_prompt)
+        request_start = time.time()
+        response = stream_content(design_prompt)
+        with tracer.span("llm.stream", "llm", prompt_chars=len(design_prompt)) as span, \
+                open(partial_path, 'w', encoding='utf-8') as f:
+            for chunk in strip_code_fence_stream(response):
+                f.write(renderer.feed(chunk))
+                f.flush()
+            f.write(renderer.flush())
+            span['ttft_ms'] = round((response.first_chunk_at - request_start) * 1000) if response.first_chunk_at else None
         gen_time = round(time.time() - gen_start, 2)
+        ttft = round(response.first_chunk_at - request_start, 2) if response.first_chunk_at else None
+        log_token_budget("full_evolve", budget_plan, response)
         
-        html_output = response.text
-        
-        # マークダウンのコードブロックを除去
-        if html_output.startswith("```html"):
-            html_output = html_output[7:]
-        if html_output.startswith("```"):
-            html_output = html_output[3:]
-        if html_output.endswith("```"):
-            html_output = html_output[:-3]
-        html_output = html_output.strip()
-        
-        # プレースホルダーを置換
-        design_tokens = f"入力={response.usage_metadata.prompt_token_count}, 出力={response.usage_metadata.candidates_token_count}, 合計={response.usage_metadata.total_token_count}"
-        html_output = html_output.replace("{{ DESIGN_TOKENS }}", design_tokens)
-        html_output = html_output.replace("{{DESIGN_TOKENS}}", design_tokens)
-        html_output = html_output.replace("{DESIGN_TOKENS}", design_tokens)
-        
-        html_output = html_output.replace("{{ DESIGN_TIME }}", str(gen_time))
-        html_output = html_output.replace("{{DESIGN_TIME}}", str(gen_time))
-        html_output = html_output.replace("{DESIGN_TIME}", str(gen_time))
-        
-        # DESIGN_PROMPTは長いのでエスケープして置換
-        escaped_prompt = html_module.escape(design_prompt[:3000] + "...")
-        html_output = html_output.replace("{{ DESIGN_PROMPT }}", escaped_prompt)
-        html_output = html_output.replace("{{DESIGN_PROMPT}}", escaped_prompt)
-        html_output = html_output.replace("{DESIGN_PROMPT}", escaped_prompt)
+        # 生成完了後に決まる値（トークン数・時間）を置換
+        usage = response.usage_metadata
+        total_time = round(
+            news_data['meta']['total_fetch_time_sec'] +
+            news_data['meta']['summary_generation_time_sec'] +
+            gen_time, 2
+        )
+        html_output = renderer.finish({
+            'DESIGN_TOKENS': f"入力={usage.prompt_token_count}, 出力={usage.candidates_token_count}, 合計={usage.total_token_count}",
+            'DESIGN_TIME': gen_time,
+            'TOTAL_TIME': total_time,
+        })
+        os.remove(partial_path)
         
-        print(f"  ✓ Full evolve HTML generated ({gen_time}s)")
+        print(f"  ✓ Full evolve HTML generated ({gen_time}s, first token {ttft}s)")
         print(f"    Design tokens: {response.usage_metadata.total_token_count}")
         
         return html_output, {
             'design_tokens': response.usage_metadata.total_token_count,
             'design_time': gen_time,
-            'design_prompt': design_prompt
+            'design_ttft': ttft,
+            'design_prompt': design_prompt,
+            'budget': budget_plan
         }
         
     except Exception as e:
         import traceback
         print(f"  ⚠ Full evolve generation failed: {e}")
+        if os.path.exists(partial_path):
+            print(f"    Partial output kept at {partial_path}")
         traceback.print_exc()
         return None, None
 
@@ -886,15 +1608,57 @@ E) 進化ログセクション（推奨）:
 # 4. HTML生成
 # =============================================================================
 
-def generate_archive_html(news_data, current_id, prev_link, generation_count, new_feature=None, new_style=None, new_layout=None):
-    """テンプレートからアーカイブHTMLを生成"""
-    print("Step 3: Generating archive HTML...")
-    
-    # テンプレートを読み込み
-    template_path = os.path.join(ARCHIVE_DIR, 'TEMPLATE.html')
-    with open(template_path, 'r', encoding='utf-8') as f:
-        html_template = f.read()
-    
+# HTMLエスケープして埋め込むスロット（それ以外は生成済みHTML・数値をそのまま埋め込む）
+ARCHIVE_ESCAPED_SLOTS = frozenset({
+    'DISPLAY_DATE', 'MOOD_KEYWORD', 'THEME_ID', 'LAYOUT_ID', 'DAILY_SUMMARY',
+    'FETCH_TIME_JST', 'MODEL_NAME',
+    'NEW_FEATURE_NAME', 'NEW_STYLE_NAME', 'NEW_LAYOUT_NAME',
+})
+
+
+@tracer.traced()
+def build_stylesheets(build_manifest):
+    """テーマ・レイアウト・ベースCSSを styles/dist/ に処理する（アーカイブは処理済みのCSSを参照する）"""
+    summary = process_stylesheets(STYLES_DIR, LAYOUTS_DIR, build_manifest)
+    ratio = f"{summary['after'] / summary['before']:.0%}" if summary['before'] else "-"
+    print(f"  ✓ Stylesheets processed ({summary['written']} files written, themes/layouts {ratio} of source)")
+    return summary
+
+
+@tracer.traced()
+def build_fingerprinted_assets(build_manifest):
+    """アセットをハッシュ付きの名前にコピーし、asset-map.json を更新する（参照されなくなった古いコピーは削除）"""
+    copied, assets = fingerprint_assets(PUBLIC_DIR, build_manifest)
+    removed = prune_assets(PUBLIC_DIR, assets)
+    print(f"  ✓ Assets fingerprinted ({copied} copied, {len(removed)} superseded removed, {len(assets)} in asset map)")
+    return assets
+
+
+def build_registry_snapshot(theme_id, layout_id, linked_paths, assets):
+    """ページの描画に必要な分だけのマニフェスト（アーカイブに埋め込み、ローダーが取得を待たずに使う）
+
+    機能の一覧・レイアウトの一覧・アセットマップ全体は埋め込まない（ユーザー設定で必要になった時にローダーが取得する）。
+    埋め込むアセットマップは、ページが読み込むファイル（linked_paths）とバンドルの分だけ。
+    """
+    with registry_lock:
+        features = load_features()
+    bundle = feature_bundle_manifest(FEATURES_DIR, features)
+    referenced = [*linked_paths, f"features/{bundle['bundle']}"]
+    return {
+        'theme': theme_id,
+        'layout': layout_id,
+        'features': {key: bundle[key] for key in ('bundle', 'hash', 'modules')},
+        'assets': {path: assets[path] for path in referenced if path in assets},
+    }
+
+
+def embed_json(value):
+    """<script type="application/json"> に埋め込むJSON（</script> で閉じないように / をエスケープ）"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+
+def build_archive_values(news_data, current_id, prev_link, generation_count, new_feature=None, new_style=None, new_layout=None):
+    """TEMPLATE.htmlの各プレースホルダーに埋め込む値（エスケープ前）"""
     display_date = news_data['meta']['display_date']
     mood_keyword = news_data.get('mood_keyword', 'neutral')
     
@@ -904,16 +1668,6 @@ def generate_archive_html(news_data, current_id, prev_link, generation_count, ne
     # 新しいレイアウトがあればそれを使用、なければdefault
     layout_id = new_layout['id'] if new_layout else 'default'
     
-    # プレースホルダーを置換
-    html = html_template
-    html = html.replace('{ARTICLE_ID}', current_id)
-    html = html.replace('{DISPLAY_DATE}', html_module.escape(display_date))
-    html = html.replace('{GENERATION_NUMBER}', str(generation_count))
-    html = html.replace('{MOOD_KEYWORD}', html_module.escape(mood_keyword))
-    html = html.replace('{THEME_ID}', html_module.escape(theme_id))
-    html = html.replace('{LAYOUT_ID}', html_module.escape(layout_id))
-    html = html.replace('{DAILY_SUMMARY}', html_module.escape(news_data.get('daily_summary', '')))
-    
     # ニュースカードの静的生成
     news_cards_html = ""
     for index, news in enumerate(news_data.get('top_news', [])):
@@ -930,7 +1684,6 @@ def generate_archive_html(news_data, current_id, prev_link, generation_count, ne
           </div>
         </article>
         '''
-    html = html.replace('{NEWS_CARDS}', news_cards_html)
     
     # Previous link
     if prev_link and prev_link != '#':
@@ -944,40 +1697,117 @@ def generate_archive_html(news_data, current_id, prev_link, generation_count, ne
             prev_link_html = ''
     else:
         prev_link_html = ''
-    html = html.replace('{PREV_ARTICLE_LINK}', prev_link_html)
-    html = html.replace('{PREV_LINK}', prev_link if prev_link else '#')
     
     # メタ情報
     meta = news_data['meta']
-    html = html.replace('{FETCH_TIME_JST}', html_module.escape(meta.get('fetch_time_jst', '')))
-    html = html.replace('{ARTICLE_COUNT}', str(meta.get('article_count', 0)))
-    html = html.replace('{MODEL_NAME}', html_module.escape(meta.get('model_name', '')))
-    
     summary_tokens = meta.get('summary_tokens', {})
-    html = html.replace('{SUMMARY_TOKENS}', 
-        f"入力={summary_tokens.get('input', 0)}, 出力={summary_tokens.get('output', 0)}, 合計={summary_tokens.get('total', 0)}")
-    html = html.replace('{SUMMARY_TIME}', str(meta.get('summary_generation_time_sec', 0)))
-    html = html.replace('{TOTAL_PROCESSING_TIME}', str(meta.get('total_processing_time_sec', 0)))
     
-    # プロンプト
-    html = html.replace('{SUMMARY_PROMPT}', html_module.escape(meta.get('summary_prompt', '')))
+    # CSS・JSはアセットマップでハッシュ付きの名前に解決する（未登録なら元のパス）
+    assets = load_asset_map(PUBLIC_DIR)
+    linked = {
+        'BASE_CSS': 'styles/base.css',
+        'THEME_CSS': f'styles/themes/{theme_id}.css',
+        'LAYOUT_CSS': f'layouts/{layout_id}.css',
+        'LOADER_JS': 'features/core/loader.js',
+        'LAYOUT_LOADER_JS': 'features/core/layout-loader.js',
+        'NEWS_RENDERER_JS': 'features/core/news-renderer.js',
+    }
     
-    # 拡張プロンプト
-    feature_meta = f"【新機能プロンプト】\n{meta.get('feature_prompt', 'N/A')}\n\n【トークン】{meta.get('feature_tokens', 'N/A')}"
-    style_meta = f"【新スタイルプロンプト】\n{meta.get('style_prompt', 'N/A')}\n\n【トークン】{meta.get('style_tokens', 'N/A')}"
-    layout_meta = f"【新レイアウトプロンプト】\n{meta.get('layout_prompt', 'N/A')}\n\n【トークン】{meta.get('layout_tokens', 'N/A')}"
+    return {
+        'ARTICLE_ID': current_id,
+        **{slot: assets.get(path, path) for slot, path in linked.items()},
+        'DISPLAY_DATE': display_date,
+        'GENERATION_NUMBER': generation_count,
+        'MOOD_KEYWORD': mood_keyword,
+        'THEME_ID': theme_id,
+        'LAYOUT_ID': layout_id,
+        'REGISTRY_SNAPSHOT': embed_json(build_registry_snapshot(theme_id, layout_id, linked.values(), assets)),
+        'DAILY_SUMMARY': news_data.get('daily_summary', ''),
+        'NEWS_CARDS': news_cards_html,
+        'PREV_ARTICLE_LINK': prev_link_html,
+        'PREV_LINK': prev_link if prev_link else '#',
+        'FETCH_TIME_JST': meta.get('fetch_time_jst', ''),
+        'ARTICLE_COUNT': meta.get('article_count', 0),
+        'MODEL_NAME': meta.get('model_name', ''),
+        'SUMMARY_TOKENS': f"入力={summary_tokens.get('input', 0)}, 出力={summary_tokens.get('output', 0)}, 合計={summary_tokens.get('total', 0)}",
+        'SUMMARY_TIME': meta.get('summary_generation_time_sec', 0),
+        'TOTAL_PROCESSING_TIME': meta.get('total_processing_time_sec', 0),
+        # 進化ログ
+        'NEW_FEATURE_NAME': new_feature['name'] if new_feature else 'なし（既存機能を使用）',
+        'NEW_STYLE_NAME': new_style['name'] if new_style else 'デフォルト',
+        'NEW_LAYOUT_NAME': new_layout['name'] if new_layout else 'クラシック',
+    }
+
+
+def build_prompt_disclosure(news_data):
+    """アーカイブのプロンプト開示パネルに表示する内容（data-prompt属性のキーごと）"""
+    meta = news_data['meta']
+    return {
+        'summary': meta.get('summary_prompt', ''),
+        'feature': f"【新機能プロンプト】\n{meta.get('feature_prompt', 'N/A')}\n\n【トークン】{meta.get('feature_tokens', 'N/A')}",
+        'style': f"【新スタイルプロンプト】\n{meta.get('style_prompt', 'N/A')}\n\n【トークン】{meta.get('style_tokens', 'N/A')}",
+        'layout': f"【新レイアウトプロンプト】\n{meta.get('layout_prompt', 'N/A')}\n\n【トークン】{meta.get('layout_tokens', 'N/A')}",
+    }
+
+
+@tracer.traced()
+def write_prompt_disclosure(current_id, news_data):
+    """public/data/prompts/{id}.json を書き出す（内容が同じなら書き換えない）。書き出したらTrue
+
+    長いプロンプトはデータJSONと同じブロブ参照で書くため、本文が重複して保存されることはない。
+    """
+    os.makedirs(PROMPTS_DIR, exist_ok=True)
+    path = os.path.join(PROMPTS_DIR, f"{current_id}.json")
+    prompts = build_prompt_disclosure(news_data)
+    content = json.dumps(blob_store.pack(prompts, fields=prompts.keys()), ensure_ascii=False, separators=(',', ':'))
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def archive_build_inputs(values):
+    """アーカイブHTMLの入力ハッシュ（ビルドマニフェスト用）
+
+    valuesはデータJSON・履歴・レジストリから求めた埋め込み値なので、それらの変更もここに反映される。
+    テンプレートに無いスロットの値は描画に使われないため含めない。
+    """
+    template_path = os.path.join(ARCHIVE_DIR, 'TEMPLATE.html')
+    names = load_template(template_path).names
+    return {
+        'values': hash_value({name: value for name, value in values.items() if name in names}),
+        'template': hash_file(template_path),
+        'engine': hash_file(template_engine.__file__),
+    }
+
+
+@tracer.traced()
+def render_archive_html(values):
+    """埋め込み値からアーカイブHTMLを描画（ログ出力なし。rerender_archives.pyからも使用）"""
+    # テンプレートを読み込み（コンパイル結果はキャッシュされる）
+    template = load_template(os.path.join(ARCHIVE_DIR, 'TEMPLATE.html'))
     
-    html = html.replace('{FEATURE_PROMPT}', html_module.escape(feature_meta))
-    html = html.replace('{STYLE_PROMPT}', html_module.escape(style_meta))
-    html = html.replace('{LAYOUT_PROMPT}', html_module.escape(layout_meta))
+    # プレースホルダーを1パスで置換（エスケープはARCHIVE_ESCAPED_SLOTSで指定）
+    return template.render(values, escaped=ARCHIVE_ESCAPED_SLOTS)
+
+
+@tracer.traced()
+def generate_archive_html(news_data, current_id, prev_link, generation_count, new_feature=None, new_style=None, new_layout=None, build_manifest=None):
+    """テンプレートからアーカイブHTMLを生成（build_manifestを渡すと入力ハッシュを記録）
+
+    埋め込むバンドルのハッシュとアセットマップは、先に bundle_features / fingerprint_public_assets で更新しておく。
+    """
+    print("Step 3: Generating archive HTML...")
     
-    # 進化ログ
-    new_feature_name = new_feature['name'] if new_feature else 'なし（既存機能を使用）'
-    new_style_name = new_style['name'] if new_style else 'デフォルト'
-    new_layout_name = new_layout['name'] if new_layout else 'クラシック'
-    html = html.replace('{NEW_FEATURE_NAME}', html_module.escape(new_feature_name))
-    html = html.replace('{NEW_STYLE_NAME}', html_module.escape(new_style_name))
-    html = html.replace('{NEW_LAYOUT_NAME}', html_module.escape(new_layout_name))
+    values = build_archive_values(news_data, current_id, prev_link, generation_count, new_feature, new_style, new_layout)
+    html = render_archive_html(values)
+    # プロンプトはHTMLに埋め込まず、パネルを開いたときに読み込む
+    write_prompt_disclosure(current_id, news_data)
+    if build_manifest is not None:
+        build_manifest.record(os.path.join(ARCHIVE_DIR, f"{current_id}.html"), archive_build_inputs(values))
     
     print(f"  ✓ Archive HTML generated")
     return html
@@ -987,237 +1817,78 @@ def generate_archive_html(news_data, current_id, prev_link, generation_count, ne
 # 5. 履歴ページ生成
 # =============================================================================
 
-def generate_history_page(history):
-    """履歴一覧HTMLを生成"""
+@tracer.traced()
+def generate_history_page(entries, new_entry_id=None, build_manifest=None):
+    """履歴一覧HTMLを生成（ページ分割・入力が変わったページのみ書き換え）"""
     print("Step 4: Generating history page...")
-    
-    entries_html = ""
-    sorted_entries = sorted(history['entries'], key=lambda x: x['id'], reverse=True)
-    
-    for entry in sorted_entries:
-        mood = entry.get('mood_keyword', 'Unknown')
-        summary = entry.get('daily_summary', '')[:150] + '...' if len(entry.get('daily_summary', '')) > 150 else entry.get('daily_summary', '')
-        fetch_time = entry.get('fetch_time_jst', entry.get('id', 'Unknown'))
-        tokens = entry.get('total_tokens', 'N/A')
-        model = entry.get('model_name', 'N/A')
-        
-        entries_html += f"""
-            <article class="history-card" data-mood="{mood.lower()}">
-                <div class="card-header">
-                    <time class="card-date">
-                        <i data-lucide="clock" style="width: 14px; height: 14px;"></i>
-                        {fetch_time}
-                    </time>
-                    <span class="card-mood">{mood}</span>
-                </div>
-                <p class="card-summary">{summary}</p>
-                <div class="card-meta">
-                    <span class="meta-item">
-                        <i data-lucide="cpu" style="width: 14px; height: 14px;"></i>
-                        {model}
-                    </span>
-                    <span class="meta-item">
-                        <i data-lucide="hash" style="width: 14px; height: 14px;"></i>
-                        {tokens} tokens
-                    </span>
-                </div>
-                <div class="card-actions">
-                    <a href="./archives/{entry['id']}.html" class="btn-view">
-                        <i data-lucide="newspaper" style="width: 16px; height: 16px;"></i>
-                        記事を見る
-                    </a>
-                    <a href="./data/{entry['id']}.json" class="btn-data">
-                        <i data-lucide="file-json" style="width: 16px; height: 16px;"></i>
-                        JSONデータ
-                    </a>
-                </div>
-            </article>
-        """
-    
-    history_html = f"""<!DOCTYPE html>
-<html lang="ja">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>MorphoNews Archive | 進化するニュースの記録</title>
-    <meta name="description" content="MorphoNewsの過去のニュースアーカイブ一覧。AIが自動生成した日々のテックニュースを振り返ることができます。">
-    <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+JP:wght@400;500;700&family=Fira+Code:wght@400;500&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="./styles/base.css">
-    <script src="https://unpkg.com/lucide@latest"></script>
-    <style>
-        .history-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(350px, 1fr));
-            gap: 1.5rem;
-            padding: 2rem;
-            max-width: 1200px;
-            margin: 0 auto;
-        }}
-        .history-card {{
-            background: var(--morpho-bg-card);
-            border: 1px solid var(--morpho-border-color);
-            border-radius: 16px;
-            padding: 1.5rem;
-            transition: all 0.2s ease;
-        }}
-        .history-card:hover {{
-            transform: translateY(-4px);
-            box-shadow: var(--morpho-shadow-lg);
-        }}
-        .card-header {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 1rem;
-        }}
-        .card-date {{
-            font-family: var(--morpho-font-mono);
-            font-size: 0.85rem;
-            color: var(--morpho-text-secondary);
-            display: flex;
-            align-items: center;
-            gap: 0.5rem;
-        }}
-        .card-mood {{
-            background: var(--morpho-accent-gradient);
-            color: white;
-            padding: 0.25rem 0.75rem;
-            border-radius: 999px;
-            font-size: 0.75rem;
-            font-weight: 500;
-        }}
-        .card-summary {{
-            color: var(--morpho-text-secondary);
-            font-size: 0.9rem;
-            line-height: 1.6;
-            margin-bottom: 1rem;
-        }}
-        .card-meta {{
-            display: flex;
-            gap: 1rem;
-            margin-bottom: 1rem;
-            font-size: 0.8rem;
-            color: var(--morpho-text-secondary);
-        }}
-        .meta-item {{
-            display: flex;
-            align-items: center;
-            gap: 0.25rem;
-        }}
-        .card-actions {{
-            display: flex;
-            gap: 0.5rem;
-        }}
-        .btn-view, .btn-data {{
-            flex: 1;
-            padding: 0.5rem;
-            border-radius: 8px;
-            text-align: center;
-            font-size: 0.85rem;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            gap: 0.5rem;
-            transition: all 0.2s ease;
-        }}
-        .btn-view {{
-            background: var(--morpho-accent-gradient);
-            color: white;
-        }}
-        .btn-view:hover {{
-            transform: scale(1.02);
-        }}
-        .btn-data {{
-            background: var(--morpho-bg-primary);
-            color: var(--morpho-text-primary);
-            border: 1px solid var(--morpho-border-color);
-        }}
-        .btn-data:hover {{
-            border-color: var(--morpho-accent-primary);
-        }}
-        .page-header {{
-            text-align: center;
-            padding: 2rem;
-        }}
-        .page-header h1 {{
-            font-size: 2rem;
-            background: var(--morpho-accent-gradient);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-        }}
-        .stats {{
-            display: flex;
-            justify-content: center;
-            gap: 2rem;
-            margin-top: 1rem;
-        }}
-        .stat {{
-            text-align: center;
-        }}
-        .stat-value {{
-            font-size: 1.5rem;
-            font-weight: 700;
-            color: var(--morpho-accent-primary);
-        }}
-        .stat-label {{
-            font-size: 0.8rem;
-            color: var(--morpho-text-secondary);
-        }}
-    </style>
-</head>
-<body>
-    <header class="morpho-header">
-        <div class="morpho-header-content">
-            <div class="morpho-logo">
-                <h1>🦋 MorphoNews</h1>
-                <span>Archive</span>
-            </div>
-            <nav class="morpho-nav">
-                <a href="./index.html">
-                    <i data-lucide="home" style="width: 18px; height: 18px;"></i>
-                    最新
-                </a>
-                <a href="./settings.html">
-                    <i data-lucide="settings" style="width: 18px; height: 18px;"></i>
-                    設定
-                </a>
-            </nav>
-        </div>
-    </header>
-    
-    <div class="page-header">
-        <h1>📚 ニュースアーカイブ</h1>
-        <p style="color: var(--morpho-text-secondary); margin-top: 0.5rem;">
-            AIが進化させてきたニュースの記録
-        </p>
-        <div class="stats">
-            <div class="stat">
-                <div class="stat-value">{len(sorted_entries)}</div>
-                <div class="stat-label">アーカイブ数</div>
-            </div>
-        </div>
-    </div>
-    
-    <main class="history-grid">
-        {entries_html}
-    </main>
-    
-    <script>
-        document.addEventListener('DOMContentLoaded', () => {{
-            if (typeof lucide !== 'undefined') {{
-                lucide.createIcons();
-            }}
-        }});
-    </script>
-</body>
-</html>"""
+    written = write_history_pages(entries, PUBLIC_DIR, new_entry_id, build_manifest)
+    print(f"  ✓ History page generated ({len(written)} files written)")
 
-    history_path = os.path.join(PUBLIC_DIR, "history.html")
-    with open(history_path, 'w', encoding='utf-8') as f:
-        f.write(history_html)
-    
-    print(f"  ✓ History page generated")
+
+# =============================================================================
+# 6. 機能モジュールのバンドル
+# =============================================================================
+
+@tracer.traced()
+def bundle_features(build_manifest):
+    """デフォルトで有効な機能と必須機能を features/bundle.js にまとめる"""
+    print("Step 2d: Bundling feature modules...")
+    with registry_lock:
+        registry = load_features()
+    written, manifest = build_feature_bundle(FEATURES_DIR, registry, build_manifest)
+    status = "updated" if written else "unchanged"
+    print(f"  ✓ Feature bundle {status} ({len(manifest['modules'])} modules, {manifest['hash']})")
+
+
+# =============================================================================
+# 7. アセットのフィンガープリント
+# =============================================================================
+
+@tracer.traced()
+def fingerprint_public_assets(build_manifest):
+    """CSSを処理し、バンドル後のアセットも含めてハッシュ付きの名前にコピーする（HTML以外を長期キャッシュ可能にする）"""
+    print("Step 2e: Fingerprinting assets...")
+    build_stylesheets(build_manifest)
+    build_fingerprinted_assets(build_manifest)
+
+
+# =============================================================================
+# 8. サービスワーカー
+# =============================================================================
+
+@tracer.traced()
+def generate_service_worker(build_manifest):
+    """最新のアーカイブと共有アセットをプリキャッシュする sw.js とマニフェストを書き出す"""
+    print("Step 5: Generating service worker...")
+    written, manifest = write_service_worker(PUBLIC_DIR, build_manifest)
+    status = "updated" if written else "unchanged"
+    print(f"  ✓ Service worker {status} ({len(manifest['entries'])} precached files, version {manifest['version']})")
+
+
+# =============================================================================
+# 9. 事前圧縮（.gz / .br）
+# =============================================================================
+
+@tracer.traced()
+def precompress_assets(precompress_manifest):
+    """変更されたテキストアセットの圧縮版を書き出し、ファイルごとの圧縮率を表示"""
+    print("Step 6: Precompressing text assets...")
+    removed = remove_orphans(PUBLIC_DIR, precompress_manifest)
+    results = precompress_public(PUBLIC_DIR, precompress_manifest)
+    for result in results:
+        print(f"    {format_result(result, PUBLIC_DIR)}")
+    original = sum(result['size'] for result in results if '.gz' in result)
+    compressed = sum(result['.gz'] for result in results if '.gz' in result)
+    ratio = f", gz {compressed / original:.0%}" if original else ""
+    print(f"  ✓ Precompressed {len(results)} files ({len(removed)} stale removed{ratio})")
+
+def write_trace(timestamp_id, run_start, error=None):
+    """実行全体のスパンを記録し、トレースを data/{ID}.trace.json に書き出す"""
+    tracer.record("run", "run", run_start, tracer.now(), {"mode": GENERATION_MODE, "error": error})
+    trace_path = os.path.join(DATA_DIR, f"{timestamp_id}.trace.json")
+    count = tracer.write(trace_path, {"id": timestamp_id, "mode": GENERATION_MODE, "model": MODEL_NAME})
+    slowest = ", ".join(f"{e['name']} {e['dur'] / 1e6:.2f}s" for e in tracer.slowest(3, cat="stage"))
+    print(f"  ✓ Trace written to {trace_path} ({count} spans; slowest stages: {slowest})")
 
 
 # =============================================================================
@@ -1225,22 +1896,23 @@ def generate_history_page(history):
 # =============================================================================
 
 if __name__ == "__main__":
+    # タイムスタンプID（失敗時もトレースを書き出すためtryの外で決める）
+    timestamp_id = datetime.now(JST).strftime("%Y-%m-%d_%H%M")
+    run_start = tracer.now()
     try:
         print(f"=== MorphoNews Generator ===")
         print(f"Mode: {GENERATION_MODE}")
         print(f"Model: {MODEL_NAME}")
         print()
         
-        # タイムスタンプID
-        timestamp_id = datetime.now(JST).strftime("%Y-%m-%d_%H%M")
-        
         # 1. 履歴のロードと前のリンク取得
-        history = load_history()
-        prev_link = get_prev_link(timestamp_id, history)
-        generation_count = len(history.get('entries', [])) + 1
+        history_store = open_history_store()
+        build_manifest = BuildManifest.load(BUILD_MANIFEST_FILE, PUBLIC_DIR)
+        prev_link = get_prev_link(timestamp_id, history_store)
+        generation_count = history_store.count() + 1
         
         # 2. ニュース取得
-        daily_content = fetch_and_summarize_news(timestamp_id)
+        daily_content, seen_index = fetch_and_summarize_news(timestamp_id)
         mood_keyword = daily_content.get('mood_keyword', 'neutral')
         
         # 3. モードに応じた生成処理
@@ -1262,27 +1934,24 @@ if __name__ == "__main__":
             
             if html_output is None:
                 print("⚠ Full evolve failed, falling back to template mode")
-                html_output = generate_archive_html(
-                    daily_content, timestamp_id, prev_link, generation_count
-                )
-            else:
-                # TOTAL_TIMEプレースホルダーを置換
-                total_time = round(
-                    daily_content['meta']['total_fetch_time_sec'] + 
-                    daily_content['meta']['summary_generation_time_sec'] +
-                    (design_meta.get('design_time', 0) if design_meta else 0), 2
-                )
-                html_output = html_output.replace("{{ TOTAL_TIME }}", str(total_time))
-                html_output = html_output.replace("{{TOTAL_TIME}}", str(total_time))
-                html_output = html_output.replace("{TOTAL_TIME}", str(total_time))
         
         elif GENERATION_MODE == "ai":
-            # AIモード：機能・スタイル・レイアウトを個別生成
-            new_feature = generate_new_feature(mood_keyword, timestamp_id)
-            new_style = generate_new_style(mood_keyword, timestamp_id)
-            new_layout = generate_new_layout(mood_keyword, timestamp_id, prev_link, generation_count)
+            # AIモード：機能・スタイル・レイアウトを並列生成
+            stage_start = time.time()
+            stage_results = run_stages({
+                'feature': (generate_new_feature, (mood_keyword, timestamp_id)),
+                'style': (generate_new_style, (mood_keyword, timestamp_id)),
+                'layout': (generate_new_layout, (mood_keyword, timestamp_id, prev_link, generation_count)),
+            })
+            new_feature = stage_results['feature']
+            new_style = stage_results['style']
+            new_layout = stage_results['layout']
+            daily_content['meta']['evolution_stage_time_sec'] = round(time.time() - stage_start, 2)
             
             # アーカイブHTML生成前にメタデータを追加
+            for stage, result in (('feature', new_feature), ('style', new_style), ('layout', new_layout)):
+                if result:
+                    daily_content['meta']['token_budget'][stage] = result['budget']
             if new_feature:
                 daily_content['meta']['feature_prompt'] = new_feature.get('prompt', '')
                 daily_content['meta']['feature_tokens'] = f"入力={new_feature['tokens']['input']}, 出力={new_feature['tokens']['output']}, 合計={new_feature['tokens']['total']}"
@@ -1292,7 +1961,13 @@ if __name__ == "__main__":
             if new_layout:
                 daily_content['meta']['layout_prompt'] = new_layout.get('prompt', '')
                 daily_content['meta']['layout_tokens'] = f"入力={new_layout['tokens']['input']}, 出力={new_layout['tokens']['output']}, 合計={new_layout['tokens']['total']}"
-
+        
+        # アーカイブに埋め込むバンドルのハッシュとアセットマップが今回の内容になるよう、HTML生成より前に行う
+        bundle_features(build_manifest)
+        fingerprint_public_assets(build_manifest)
+        
+        if GENERATION_MODE != "news-only" and html_output is None:
+            # テンプレートベース（aiモード・モジュラーモード・full-evolveの失敗時）
             html_output = generate_archive_html(
                 daily_content, 
                 timestamp_id, 
@@ -1300,16 +1975,8 @@ if __name__ == "__main__":
                 generation_count,
                 new_feature,
                 new_style,
-                new_layout
-            )
-        
-        elif GENERATION_MODE != "news-only":
-            # モジュラーモード：テンプレートベース
-            html_output = generate_archive_html(
-                daily_content, 
-                timestamp_id, 
-                prev_link, 
-                generation_count
+                new_layout,
+                build_manifest
             )
         
         # 4. HTML保存
@@ -1318,7 +1985,7 @@ if __name__ == "__main__":
             os.makedirs(ARCHIVE_DIR, exist_ok=True)
             archive_filename = f"{timestamp_id}.html"
             archive_path = os.path.join(ARCHIVE_DIR, archive_filename)
-            with open(archive_path, "w", encoding="utf-8") as f:
+            with tracer.span("write_archive", "io", path=archive_path), open(archive_path, "w", encoding="utf-8") as f:
                 f.write(html_output)
             
             # index.html リダイレクト
@@ -1336,8 +2003,7 @@ if __name__ == "__main__":
     <p><a href="./archives/{archive_filename}" style="color:#8b5cf6;">Click here if not redirected.</a></p>
 </body>
 </html>"""
-            with open(index_path, "w", encoding="utf-8") as f:
-                f.write(redirect_html)
+            build_manifest.write_if_stale(index_path, {'content': hash_value(redirect_html)}, lambda: redirect_html)
             
             print(f"\n✅ Success! Archived to {archive_path}")
         else:
@@ -1375,18 +2041,36 @@ if __name__ == "__main__":
                 entry_data['design_tokens'] = design_meta.get('design_tokens', 0)
                 entry_data['design_time'] = design_meta.get('design_time', 0)
             
-            history = add_history_entry(history, entry_data)
-            save_history(history)
+            history_store.append(entry_data)
+            # 公開用のhistory.json（設定ページが参照）は、前回書き出した後にログが変わった時だけ書き出す
+            history_store.materialize(HISTORY_FILE)
             
-            # 履歴ページ生成
-            generate_history_page(history)
+            # 履歴ページ生成（描画するページの分だけログから読む）
+            generate_history_page(history_store.view(), timestamp_id, build_manifest)
             
             # JSONデータを更新
             if design_meta:
                 daily_content['meta']['design_tokens'] = design_meta.get('design_tokens', 0)
                 daily_content['meta']['design_time'] = design_meta.get('design_time', 0)
+                daily_content['meta']['design_ttft'] = design_meta.get('design_ttft')
                 daily_content['design_prompt'] = design_meta.get('design_prompt', '')
-            save_json(os.path.join(DATA_DIR, f"{timestamp_id}.json"), daily_content)
+                daily_content['meta']['token_budget']['full_evolve'] = design_meta.get('budget')
+        
+        # LLMの使用量と再試行の集計は、news-onlyモードを含めてデータJSONに記録する
+        daily_content['meta']['llm_usage'] = get_llm_backend().usage_summary()
+        daily_content['meta']['llm_resilience'] = llm_caller.stats()
+        save_json(os.path.join(DATA_DIR, f"{timestamp_id}.json"), blob_store.pack(daily_content))
+        
+        # 要約済みの記事は、データJSONまで保存できてから記録する
+        # （途中で失敗した実行をやり直すと、同じ記事から同じプロンプトが作られ、recordモードのキャッシュも使える）
+        save_seen_index(seen_index)
+        
+        generate_service_worker(build_manifest)
+        precompress_manifest = BuildManifest.load(PRECOMPRESS_MANIFEST, PUBLIC_DIR)
+        precompress_assets(precompress_manifest)
+        precompress_manifest.save()
+        build_manifest.save()
+        write_trace(timestamp_id, run_start)
         
         print(f"\n📊 Summary:")
         print(f"  - Mode: {GENERATION_MODE}")
@@ -1401,9 +2085,14 @@ if __name__ == "__main__":
         if design_meta:
             print(f"  - Design tokens: {design_meta.get('design_tokens', 'N/A')}")
             print(f"  - Design time: {design_meta.get('design_time', 'N/A')}s")
+            print(f"  - Design first token: {design_meta.get('design_ttft', 'N/A')}s")
+        resilience = llm_caller.stats()
+        if resilience['retries'] or resilience['failures']:
+            print(f"  - LLM retries: {resilience['retries']} (waited {resilience['backoff_wait_sec']}s, failed {resilience['failures']})")
 
     except Exception as e:
         import traceback
         print(f"Fatal Error: {e}")
         traceback.print_exc()
+        write_trace(timestamp_id, run_start, error=str(e))
         exit(1)
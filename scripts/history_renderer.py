@@ -0,0 +1,384 @@
+"""
+履歴ページ（history.html とページ分割されたアーカイブ一覧）のレンダラー
+
+generator.py と migrate_history.py の共通実装。
+- public/history.html: 最新 HISTORY_PAGE_SIZE 件 + ページ一覧
+- public/history/page-NNNN.html: 古い順に HISTORY_PAGE_SIZE 件ずつ固定で分割したページ
+
+固定サイズで分割しているため、エントリ追加時に書き換えるのは
+最新ページ（と新しいページを開始した場合の直前ページ）と history.html のみ。
+"""
+import bisect
+import html
+import os
+
+from build_manifest import hash_file, hash_value
+from fingerprint import load_asset_map
+
+HISTORY_PAGE_SIZE = 50
+HISTORY_PAGES_DIRNAME = "history"
+HISTORY_BASE_CSS = "styles/base.css"
+
+HISTORY_STYLE = """
+        .history-grid {
+            display: grid;
+            grid-template-columns: repeat(auto-fill, minmax(350px, 1fr));
+            gap: 1.5rem;
+            padding: 2rem;
+            max-width: 1200px;
+            margin: 0 auto;
+        }
+        .history-card {
+            background: var(--morpho-bg-card);
+            border: 1px solid var(--morpho-border-color);
+            border-radius: 16px;
+            padding: 1.5rem;
+            transition: all 0.2s ease;
+        }
+        .history-card:hover {
+            transform: translateY(-4px);
+            box-shadow: var(--morpho-shadow-lg);
+        }
+        .card-header {
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+            margin-bottom: 1rem;
+        }
+        .card-date {
+            font-family: var(--morpho-font-mono);
+            font-size: 0.85rem;
+            color: var(--morpho-text-secondary);
+            display: flex;
+            align-items: center;
+            gap: 0.5rem;
+        }
+        .card-mood {
+            background: var(--morpho-accent-gradient);
+            color: white;
+            padding: 0.25rem 0.75rem;
+            border-radius: 999px;
+            font-size: 0.75rem;
+            font-weight: 500;
+        }
+        .card-summary {
+            color: var(--morpho-text-secondary);
+            font-size: 0.9rem;
+            line-height: 1.6;
+            margin-bottom: 1rem;
+        }
+        .card-meta {
+            display: flex;
+            gap: 1rem;
+            margin-bottom: 1rem;
+            font-size: 0.8rem;
+            color: var(--morpho-text-secondary);
+        }
+        .meta-item {
+            display: flex;
+            align-items: center;
+            gap: 0.25rem;
+        }
+        .card-actions {
+            display: flex;
+            gap: 0.5rem;
+        }
+        .btn-view, .btn-data {
+            flex: 1;
+            padding: 0.5rem;
+            border-radius: 8px;
+            text-align: center;
+            font-size: 0.85rem;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            gap: 0.5rem;
+            transition: all 0.2s ease;
+        }
+        .btn-view {
+            background: var(--morpho-accent-gradient);
+            color: white;
+        }
+        .btn-view:hover {
+            transform: scale(1.02);
+        }
+        .btn-data {
+            background: var(--morpho-bg-primary);
+            color: var(--morpho-text-primary);
+            border: 1px solid var(--morpho-border-color);
+        }
+        .btn-data:hover {
+            border-color: var(--morpho-accent-primary);
+        }
+        .page-header {
+            text-align: center;
+            padding: 2rem;
+        }
+        .page-header h1 {
+            font-size: 2rem;
+            background: var(--morpho-accent-gradient);
+            -webkit-background-clip: text;
+            -webkit-text-fill-color: transparent;
+            background-clip: text;
+        }
+        .stats {
+            display: flex;
+            justify-content: center;
+            gap: 2rem;
+            margin-top: 1rem;
+        }
+        .stat {
+            text-align: center;
+        }
+        .stat-value {
+            font-size: 1.5rem;
+            font-weight: 700;
+            color: var(--morpho-accent-primary);
+        }
+        .stat-label {
+            font-size: 0.8rem;
+            color: var(--morpho-text-secondary);
+        }
+        .history-pager {
+            display: flex;
+            flex-wrap: wrap;
+            justify-content: center;
+            gap: 0.5rem;
+            padding: 0 2rem 2rem;
+        }
+        .history-pager a {
+            padding: 0.4rem 0.9rem;
+            border-radius: 8px;
+            border: 1px solid var(--morpho-border-color);
+            color: var(--morpho-text-primary);
+            font-size: 0.85rem;
+        }
+        .history-pager a:hover {
+            border-color: var(--morpho-accent-primary);
+        }
+"""
+
+
+def page_count(entry_count):
+    """エントリ数からページ数を計算"""
+    return max(1, (entry_count + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE)
+
+
+def page_filename(page_number):
+    """ページ番号（1始まり、古い順）からファイル名を作る"""
+    return f"page-{page_number:04d}.html"
+
+
+def render_history_card(entry, root):
+    """履歴カード1件のHTML（rootはpublic/への相対パス）"""
+    daily_summary = entry.get('daily_summary', '')
+    summary = daily_summary[:150] + '...' if len(daily_summary) > 150 else daily_summary
+    mood = str(entry.get('mood_keyword', 'Unknown'))
+    fetch_time = entry.get('fetch_time_jst', entry.get('id', 'Unknown'))
+    tokens = entry.get('total_tokens', 'N/A')
+    model = entry.get('model_name', 'N/A')
+    entry_id = html.escape(entry['id'])
+
+    return f"""
+            <article class="history-card" data-mood="{html.escape(mood.lower())}">
+                <div class="card-header">
+                    <time class="card-date">
+                        <i data-lucide="clock" style="width: 14px; height: 14px;"></i>
+                        {html.escape(str(fetch_time))}
+                    </time>
+                    <span class="card-mood">{html.escape(mood)}</span>
+                </div>
+                <p class="card-summary">{html.escape(summary)}</p>
+                <div class="card-meta">
+                    <span class="meta-item">
+                        <i data-lucide="cpu" style="width: 14px; height: 14px;"></i>
+                        {html.escape(str(model))}
+                    </span>
+                    <span class="meta-item">
+                        <i data-lucide="hash" style="width: 14px; height: 14px;"></i>
+                        {html.escape(str(tokens))} tokens
+                    </span>
+                </div>
+                <div class="card-actions">
+                    <a href="{root}archives/{entry_id}.html" class="btn-view">
+                        <i data-lucide="newspaper" style="width: 16px; height: 16px;"></i>
+                        記事を見る
+                    </a>
+                    <a href="{root}data/{entry_id}.json" class="btn-data">
+                        <i data-lucide="file-json" style="width: 16px; height: 16px;"></i>
+                        JSONデータ
+                    </a>
+                </div>
+            </article>
+        """
+
+
+def render_history_html(entries, root, title, header_html, pager_html, base_css=HISTORY_BASE_CSS):
+    """履歴ページ全体のHTML（entriesは新しい順、base_cssはpublic/からの相対パス）"""
+    entries_html = "".join(render_history_card(entry, root) for entry in entries)
+    return f"""<!DOCTYPE html>
+<html lang="ja">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    <meta name="description" content="MorphoNewsの過去のニュースアーカイブ一覧。AIが自動生成した日々のテックニュースを振り返ることができます。">
+    <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+JP:wght@400;500;700&family=Fira+Code:wght@400;500&display=swap" rel="stylesheet">
+    <link rel="stylesheet" href="{root}{base_css}">
+    <script src="https://unpkg.com/lucide@latest"></script>
+    <style>{HISTORY_STYLE}    </style>
+</head>
+<body>
+    <header class="morpho-header">
+        <div class="morpho-header-content">
+            <div class="morpho-logo">
+                <h1>🦋 MorphoNews</h1>
+                <span>Archive</span>
+            </div>
+            <nav class="morpho-nav">
+                <a href="{root}index.html">
+                    <i data-lucide="home" style="width: 18px; height: 18px;"></i>
+                    最新
+                </a>
+                <a href="{root}settings.html">
+                    <i data-lucide="settings" style="width: 18px; height: 18px;"></i>
+                    設定
+                </a>
+            </nav>
+        </div>
+    </header>
+
+    <div class="page-header">
+        {header_html}
+    </div>
+
+    <main class="history-grid">
+        {entries_html}
+    </main>
+
+    <nav class="history-pager">
+        {pager_html}
+    </nav>
+
+    <script>
+        document.addEventListener('DOMContentLoaded', () => {{
+            if (typeof lucide !== 'undefined') {{
+                lucide.createIcons();
+            }}
+        }});
+    </script>
+</body>
+</html>"""
+
+
+def render_index_page(sorted_entries, base_css=HISTORY_BASE_CSS):
+    """history.html: 最新HISTORY_PAGE_SIZE件と全ページへのリンク"""
+    latest = list(reversed(sorted_entries[-HISTORY_PAGE_SIZE:]))
+    header_html = f"""<h1>📚 ニュースアーカイブ</h1>
+        <p style="color: var(--morpho-text-secondary); margin-top: 0.5rem;">
+            AIが進化させてきたニュースの記録
+        </p>
+        <div class="stats">
+            <div class="stat">
+                <div class="stat-value">{len(sorted_entries)}</div>
+                <div class="stat-label">アーカイブ数</div>
+            </div>
+        </div>"""
+    pager_html = ""
+    if len(sorted_entries) > HISTORY_PAGE_SIZE:
+        pager_html = "\n        ".join(
+            f'<a href="./{HISTORY_PAGES_DIRNAME}/{page_filename(n)}">{n}</a>'
+            for n in range(page_count(len(sorted_entries)), 0, -1)
+        )
+    return render_history_html(
+        latest, "./", "MorphoNews Archive | 進化するニュースの記録", header_html, pager_html, base_css
+    )
+
+
+def render_numbered_page(sorted_entries, page_number, base_css=HISTORY_BASE_CSS):
+    """page-NNNN.html: 古い順に固定サイズで分割した1ページ分"""
+    start = (page_number - 1) * HISTORY_PAGE_SIZE
+    page_entries = list(reversed(sorted_entries[start:start + HISTORY_PAGE_SIZE]))
+    last_page = page_count(len(sorted_entries))
+    first_id = page_entries[-1]['id'] if page_entries else ''
+    last_id = page_entries[0]['id'] if page_entries else ''
+
+    header_html = f"""<h1>📚 ニュースアーカイブ #{page_number}</h1>
+        <p style="color: var(--morpho-text-secondary); margin-top: 0.5rem;">
+            {html.escape(first_id)} 〜 {html.escape(last_id)}
+        </p>"""
+    links = []
+    if page_number < last_page:
+        links.append(f'<a href="./{page_filename(page_number + 1)}">← 新しいページ</a>')
+    links.append('<a href="../history.html">最新のアーカイブ</a>')
+    if page_number > 1:
+        links.append(f'<a href="./{page_filename(page_number - 1)}">古いページ →</a>')
+    return render_history_html(
+        page_entries, "../", f"MorphoNews Archive #{page_number} | 進化するニュースの記録",
+        header_html, "\n        ".join(links), base_css
+    )
+
+
+def page_inputs(sorted_entries, page_number, base_css=HISTORY_BASE_CSS):
+    """page-NNNN.html の入力ハッシュ（ビルドマニフェスト用）"""
+    start = (page_number - 1) * HISTORY_PAGE_SIZE
+    return {
+        "entries": hash_value([sorted_entries[start:start + HISTORY_PAGE_SIZE], page_number, page_count(len(sorted_entries))]),
+        "base_css": base_css,
+        "renderer": hash_file(__file__),
+    }
+
+
+def index_page_inputs(sorted_entries, base_css=HISTORY_BASE_CSS):
+    """history.html の入力ハッシュ（ビルドマニフェスト用）"""
+    return {
+        "entries": hash_value([sorted_entries[-HISTORY_PAGE_SIZE:], len(sorted_entries)]),
+        "base_css": base_css,
+        "renderer": hash_file(__file__),
+    }
+
+
+def write_history_pages(sorted_entries, public_dir, new_entry_id=None, manifest=None):
+    """履歴ページを書き出し、書き換えたファイルのパスを返す
+
+    sorted_entriesはID順のエントリのシーケンス（HistoryStore.view() を渡すと、描画するページの分だけログから読む）。
+    new_entry_idを渡すと、そのエントリを含むページ以降（新しいページを開始した場合は直前のページも）
+    と history.html のみを書き換える。省略時やページが欠けている場合は全ページを再生成する。
+    manifest（BuildManifest）を渡すと、入力が前回と同じページの書き込みも省略する。
+    """
+    # ベースCSSはアセットマップでハッシュ付きの名前に解決する
+    base_css = load_asset_map(public_dir).get(HISTORY_BASE_CSS, HISTORY_BASE_CSS)
+    pages_dir = os.path.join(public_dir, HISTORY_PAGES_DIRNAME)
+    last_page = page_count(len(sorted_entries))
+
+    first_dirty = 1
+    if new_entry_id is not None:
+        index = bisect.bisect_left(sorted_entries, new_entry_id, key=lambda entry: entry['id'])
+        if index < len(sorted_entries) and sorted_entries[index]['id'] == new_entry_id:
+            first_dirty = index // HISTORY_PAGE_SIZE + 1
+            if index % HISTORY_PAGE_SIZE == 0:
+                # 新しいページを開始した場合は直前のページに「新しいページ」リンクを追加
+                first_dirty = max(1, first_dirty - 1)
+        if any(not os.path.exists(os.path.join(pages_dir, page_filename(n))) for n in range(1, first_dirty)):
+            first_dirty = 1
+
+    def write(path, inputs, render):
+        if manifest is not None:
+            return manifest.write_if_stale(path, inputs, render)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(render())
+        return True
+
+    os.makedirs(pages_dir, exist_ok=True)
+    written = []
+    for page_number in range(first_dirty, last_page + 1):
+        path = os.path.join(pages_dir, page_filename(page_number))
+        if write(path, page_inputs(sorted_entries, page_number, base_css),
+                 lambda: render_numbered_page(sorted_entries, page_number, base_css)):
+            written.append(path)
+
+    index_path = os.path.join(public_dir, "history.html")
+    if write(index_path, index_page_inputs(sorted_entries, base_css),
+             lambda: render_index_page(sorted_entries, base_css)):
+        written.append(index_path)
+    return written
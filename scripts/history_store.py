@@ -0,0 +1,210 @@
+"""
+履歴ストア（追記専用のJSONLログ + ソート済みインデックス）
+
+- state/history.log.jsonl: 1行1エントリの追記専用ログ（正本。配信しない）
+- state/history.index.json: IDのソート済みリストとログ内のバイトオフセット（配信しない）
+
+前後のエントリ検索は二分探索（O(log n)）、世代数はインデックスの件数で求める。
+履歴ページは view() で必要なエントリだけをログから読んで描画する。
+公開用の history.json は materialize() で、前回書き出した後にログが変わった時だけ書き出す。
+"""
+import bisect
+import json
+import os
+from collections.abc import Sequence
+
+
+class HistoryStore:
+    """追記専用ログとソート済みインデックスによる履歴ストア"""
+
+    def __init__(self, log_path, index_path):
+        self.log_path = log_path
+        self.index_path = index_path
+        self.ids = []
+        self.offsets = []
+        self.log_size = 0
+        # 最後にhistory.jsonを書き出した時点のログのサイズ
+        self.materialized_log_size = None
+
+    @classmethod
+    def open(cls, log_path, index_path, legacy_history_path=None):
+        """ストアを開く（ログが無ければ旧history.jsonから移行、インデックスが古ければ再構築）"""
+        store = cls(log_path, index_path)
+        if not os.path.exists(log_path) and legacy_history_path and os.path.exists(legacy_history_path):
+            store._migrate(legacy_history_path)
+        store._load_index()
+        return store
+
+    def count(self):
+        """エントリ数"""
+        return len(self.ids)
+
+    def __contains__(self, entry_id):
+        i = bisect.bisect_left(self.ids, entry_id)
+        return i < len(self.ids) and self.ids[i] == entry_id
+
+    def prev_id(self, entry_id):
+        """entry_idより前（古い）の直近エントリID"""
+        i = bisect.bisect_left(self.ids, entry_id)
+        return self.ids[i - 1] if i > 0 else None
+
+    def next_id(self, entry_id):
+        """entry_idより後（新しい）の直近エントリID"""
+        i = bisect.bisect_right(self.ids, entry_id)
+        return self.ids[i] if i < len(self.ids) else None
+
+    def get(self, entry_id):
+        """IDでエントリを取得"""
+        i = bisect.bisect_left(self.ids, entry_id)
+        if i >= len(self.ids) or self.ids[i] != entry_id:
+            return None
+        return self.read([self.offsets[i]])[0]
+
+    def read(self, offsets):
+        """ログ内のオフセットにあるエントリを順に読む"""
+        if not offsets:
+            return []
+        with open(self.log_path, 'rb') as f:
+            entries = []
+            for offset in offsets:
+                f.seek(offset)
+                entries.append(json.loads(f.readline()))
+            return entries
+
+    def view(self):
+        """エントリをID順に並べた読み取り専用のシーケンス（要素はアクセスした時にログから読む）"""
+        return HistoryEntries(self)
+
+    def append(self, entry):
+        """エントリをログに追記しインデックスを更新（既存IDは無視）。追加したらTrue"""
+        if entry['id'] in self:
+            return False
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode('utf-8')
+        os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+        with open(self.log_path, 'ab') as f:
+            offset = f.tell()
+            f.write(line)
+        i = bisect.bisect_left(self.ids, entry['id'])
+        self.ids.insert(i, entry['id'])
+        self.offsets.insert(i, offset)
+        self.log_size = offset + len(line)
+        self._save_index()
+        return True
+
+    def entries(self):
+        """全エントリをID順に返す"""
+        if not self.ids:
+            return []
+        by_offset = {}
+        with open(self.log_path, 'rb') as f:
+            for offset, line in self._iter_lines(f):
+                by_offset[offset] = json.loads(line)
+        return [by_offset[offset] for offset in self.offsets]
+
+    def materialize(self, history_path):
+        """公開用のhistory.jsonを、前回書き出した後にログが変わっていれば書き出す。書き出したらTrue
+
+        ログの各行はすでにJSONなので、パースせずにID順に並べて連結する。
+        """
+        if self.materialized_log_size == self.log_size and os.path.exists(history_path):
+            return False
+        lines = []
+        if self.ids:
+            with open(self.log_path, 'rb') as f:
+                data = f.read(self.log_size)
+            for offset in self.offsets:
+                end = data.find(b"\n", offset)
+                lines.append(data[offset:end if end >= 0 else len(data)].rstrip(b"\r"))
+        tmp_path = f"{history_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(b'{"version": 2, "entries": [\n' + b",\n".join(lines) + b"\n]}\n")
+        os.replace(tmp_path, history_path)
+        self.materialized_log_size = self.log_size
+        self._save_index()
+        return True
+
+    @staticmethod
+    def _iter_lines(f):
+        offset = 0
+        for line in f:
+            if line.strip():
+                yield offset, line
+            offset += len(line)
+
+    def _migrate(self, legacy_history_path):
+        with open(legacy_history_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        entries = data if isinstance(data, list) else data.get('entries', [])
+        entries = [{"id": e} if isinstance(e, str) else e for e in entries]
+        os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+        with open(self.log_path, 'w', encoding='utf-8') as f:
+            seen = set()
+            for entry in sorted(entries, key=lambda x: x['id']):
+                if entry['id'] not in seen:
+                    seen.add(entry['id'])
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _load_index(self):
+        log_size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        index = None
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                try:
+                    index = json.load(f)
+                except json.JSONDecodeError:
+                    index = None
+        if index:
+            self.materialized_log_size = index.get('materialized_log_size')
+        if index and index.get('log_size') == log_size:
+            self.ids = [entry_id for entry_id, _ in index['entries']]
+            self.offsets = [offset for _, offset in index['entries']]
+            self.log_size = log_size
+            return
+        self._rebuild_index(log_size)
+
+    def _rebuild_index(self, log_size):
+        pairs = []
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                for offset, line in self._iter_lines(f):
+                    pairs.append((json.loads(line)['id'], offset))
+        # 同じIDが複数あれば最初のものを採用
+        unique = {}
+        for entry_id, offset in pairs:
+            unique.setdefault(entry_id, offset)
+        ordered = sorted(unique.items())
+        self.ids = [entry_id for entry_id, _ in ordered]
+        self.offsets = [offset for _, offset in ordered]
+        self.log_size = log_size
+        self._save_index()
+
+    def _save_index(self):
+        os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(
+                {
+                    "version": 1,
+                    "log_size": self.log_size,
+                    "materialized_log_size": self.materialized_log_size,
+                    "entries": [[i, o] for i, o in zip(self.ids, self.offsets)],
+                },
+                f,
+                separators=(',', ':')
+            )
+        os.replace(tmp_path, self.index_path)
+
+
+class HistoryEntries(Sequence):
+    """HistoryStore.view() の戻り値。len() とインデックス・スライスでのアクセスだけでログ全体を読まずに済む"""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __len__(self):
+        return len(self._store.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._store.read(self._store.offsets[index])
+        return self._store.read([self._store.offsets[index]])[0]
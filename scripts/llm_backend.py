@@ -0,0 +1,216 @@
+"""
+LLMバックエンドの抽象化
+
+generator.pyはこのモジュール経由でLLMを呼び出す。
+- GeminiBackend: Google Gemini API（本番）
+- MockBackend: mock_llm_server.py などHTTP互換のローカルスタンドイン（ベンチマーク・負荷試験用）
+"""
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+
+import requests
+
+from resilience import is_transient, is_transient_status
+
+
+def make_response(text, prompt_tokens, output_tokens, total_tokens):
+    """generate_contentのレスポンスと同じ属性（text / usage_metadata）を持つオブジェクトを作る"""
+    return SimpleNamespace(
+        text=text,
+        usage_metadata=SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=total_tokens
+        )
+    )
+
+
+class StreamingResponse:
+    """ストリーミング応答。反復するとテキストチャンクを返し、終了後にtext/usage_metadataが確定する
+
+    first_chunk_at には最初のテキストチャンクを受け取った時刻（time.time()）を記録する。
+    """
+
+    def __init__(self, chunks, on_complete=None):
+        self._chunks = chunks
+        self._on_complete = on_complete
+        self._parts = []
+        self.usage_metadata = None
+        self.first_chunk_at = None
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            if isinstance(chunk, str):
+                if self.first_chunk_at is None:
+                    self.first_chunk_at = time.time()
+                self._parts.append(chunk)
+                yield chunk
+            else:
+                # str以外は最終的なusage_metadata
+                self.usage_metadata = chunk
+        if self._on_complete:
+            self._on_complete(self)
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+
+class LLMBackend(ABC):
+    """LLMバックエンドの共通インターフェース"""
+
+    name = "base"
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self._usage_lock = threading.Lock()
+        self._usage = {"calls": 0, "input": 0, "output": 0, "total": 0}
+
+    def generate(self, prompt, generation_config=None):
+        """プロンプトを送信し、text / usage_metadata を持つレスポンスを返す"""
+        response = self._generate(prompt, generation_config)
+        self.record_usage(response)
+        return response
+
+    def stream(self, prompt, generation_config=None):
+        """ストリーミングで生成し、StreamingResponseを返す"""
+        return StreamingResponse(self._stream(prompt, generation_config), on_complete=self.record_usage)
+
+    def record_usage(self, response):
+        """トークン使用量を集計"""
+        usage = response.usage_metadata
+        if usage is None:
+            return
+        with self._usage_lock:
+            self._usage["calls"] += 1
+            self._usage["input"] += usage.prompt_token_count or 0
+            self._usage["output"] += usage.candidates_token_count or 0
+            self._usage["total"] += usage.total_token_count or 0
+
+    def is_transient(self, error):
+        """再試行してよい一時的な失敗か（タイムアウト・接続エラー・HTTPステータス429・5xx）"""
+        return is_transient(error)
+
+    def usage_summary(self):
+        """これまでの呼び出し回数・トークン数の合計"""
+        with self._usage_lock:
+            return {"backend": self.name, "model": self.model_name, **self._usage}
+
+    @abstractmethod
+    def _generate(self, prompt, generation_config):
+        """1回分の生成（text / usage_metadata を持つレスポンスを返す）"""
+
+    @abstractmethod
+    def _stream(self, prompt, generation_config):
+        """テキストチャンクを順に返し、最後にusage_metadataを返すジェネレーター"""
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini API"""
+
+    name = "gemini"
+
+    def __init__(self, model_name, api_key=None):
+        super().__init__(model_name)
+        import google.generativeai as genai
+        if api_key:
+            genai.configure(api_key=api_key)
+        self._genai = genai
+
+    def is_transient(self, error):
+        from google.api_core import exceptions
+        if isinstance(error, exceptions.GoogleAPICallError) and error.code is not None:
+            return is_transient_status(int(error.code))
+        return super().is_transient(error)
+
+    def _model(self, generation_config):
+        return self._genai.GenerativeModel(
+            model_name=self.model_name,
+            generation_config=generation_config
+        )
+
+    def _generate(self, prompt, generation_config):
+        return self._model(generation_config).generate_content(prompt)
+
+    def _stream(self, prompt, generation_config):
+        response = self._model(generation_config).generate_content(prompt, stream=True)
+        for chunk in response:
+            text = self._chunk_text(chunk)
+            if text:
+                yield text
+        yield response.usage_metadata
+
+    @staticmethod
+    def _chunk_text(chunk):
+        """チャンクのテキスト部分を連結する
+
+        セーフティ判定や終了理由だけのチャンクにはテキストのパートが無く、chunk.text は例外を送出するため、
+        先頭の候補のパートから直接読む。
+        """
+        candidates = getattr(chunk, 'candidates', None) or []
+        if not candidates:
+            return ""
+        parts = getattr(getattr(candidates[0], 'content', None), 'parts', None) or []
+        return "".join(getattr(part, 'text', '') or '' for part in parts)
+
+
+class MockBackend(LLMBackend):
+    """HTTP互換のローカルスタンドイン（mock_llm_server.py）"""
+
+    name = "mock"
+
+    def __init__(self, model_name, base_url, timeout=120):
+        super().__init__(model_name)
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def is_transient(self, error):
+        # requests の Timeout / ConnectionError は組み込みの TimeoutError / ConnectionError の派生ではない
+        if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+            return True
+        return super().is_transient(error)
+
+    def _post(self, prompt, generation_config, stream):
+        response = requests.post(
+            f"{self.base_url}/v1/models/{self.model_name}:generate",
+            json={"prompt": prompt, "generation_config": generation_config or {}, "stream": stream},
+            timeout=self.timeout,
+            stream=stream
+        )
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _usage_from(data):
+        usage = data.get("usage", {})
+        return make_response("", usage.get("input", 0), usage.get("output", 0), usage.get("total", 0)).usage_metadata
+
+    def _generate(self, prompt, generation_config):
+        data = self._post(prompt, generation_config, stream=False).json()
+        usage = self._usage_from(data)
+        return make_response(data["text"], usage.prompt_token_count, usage.candidates_token_count, usage.total_token_count)
+
+    def _stream(self, prompt, generation_config):
+        response = self._post(prompt, generation_config, stream=True)
+        for line in response.iter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            if "error" in data:
+                raise RuntimeError(f"Mock LLM stream error: {data['error']}")
+            if "text" in data:
+                yield data["text"]
+            if "usage" in data:
+                yield self._usage_from(data)
+
+
+def create_backend(kind, model_name, api_key=None, mock_url=None):
+    """LLM_BACKEND設定に対応するバックエンドを生成"""
+    if kind == "gemini":
+        return GeminiBackend(model_name, api_key)
+    if kind == "mock":
+        return MockBackend(model_name, mock_url or "http://127.0.0.1:8765")
+    raise ValueError(f"Unknown LLM backend: {kind}")
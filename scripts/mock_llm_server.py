@@ -0,0 +1,218 @@
+"""
+ベンチマーク・負荷試験用のローカルLLMスタンドイン
+
+MockBackend（LLM_BACKEND=mock）から呼ばれるHTTPサーバー。
+遅延・スループット・失敗率を設定でき、オフラインで再現性のある計測ができる。
+ニュース取得もオフラインにできるよう、/feeds/<n>.xml でダミーのRSSも返す。
+RSSにはETagを付け、If-None-Matchが一致すれば304を返す（条件付きGETのフィードキャッシュの検証用）。
+
+使い方:
+    python scripts/mock_llm_server.py --port 8765 --latency 0.5 --throughput 200 --failure-rate 0.05
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MOCK_FEED_COUNT = 23
+
+
+def estimate_tokens(text):
+    """ざっくりしたトークン数の見積もり"""
+    return max(1, len(text) // 3)
+
+
+def mock_summary():
+    return {
+        "daily_summary": "モックサーバーが生成したテックトレンド要約です。" * 20,
+        "top_news": [
+            {
+                "title": f"モックニュース {i + 1}",
+                "description": f"ベンチマーク用のダミー記事 {i + 1} の説明です。",
+                "link": f"https://example.com/mock/{i + 1}"
+            }
+            for i in range(10)
+        ],
+        "mood_keyword": "Benchmark"
+    }
+
+
+def mock_feature(seq):
+    return {
+        "id": f"mock-feature-{seq}",
+        "name": f"モック機能 {seq}",
+        "description": "ベンチマーク用のダミー機能",
+        "category": "ui",
+        "code": "(function() {\n    console.log('mock feature');\n})();"
+    }
+
+
+def mock_style(seq):
+    return {
+        "id": f"mock-style-{seq}",
+        "name": f"モックテーマ {seq}",
+        "description": "ベンチマーク用のダミーテーマ",
+        "preview": {"primary": "#6366f1", "secondary": "#8b5cf6", "background": "#f8fafc", "text": "#1e293b"},
+        "css": ":root {\n    --morpho-bg-primary: #f8fafc;\n    --morpho-text-primary: #1e293b;\n}"
+    }
+
+
+def mock_layout(seq):
+    return {
+        "id": f"mock-layout-{seq}",
+        "name": f"モックレイアウト {seq}",
+        "description": "ベンチマーク用のダミーレイアウト",
+        "preview": {"gridType": "list", "cardStyle": "minimal", "animation": "fade"},
+        "evolution_note": "mock",
+        "css": ":root {\n    --layout-max-width: 960px;\n    --layout-news-columns: 1;\n}"
+    }
+
+
+def mock_html():
+    return (
+        "```html\n<!DOCTYPE html>\n<html lang=\"ja\">\n<head><meta charset=\"UTF-8\"><title>Mock</title></head>\n<body>\n"
+        + "<p>mock design</p>\n" * 200
+        + "<footer>{{ DESIGN_TOKENS }} / {{ DESIGN_TIME }}秒 / {{ TOTAL_TIME }}秒</footer>\n"
+        + "<details><pre>{{ DESIGN_PROMPT }}</pre></details>\n</body>\n</html>\n```"
+    )
+
+
+def mock_feed(n):
+    items = "".join(
+        f"<item><title>Mock feed {n} article {i}</title>"
+        f"<link>https://example.com/feed/{n}/{i}</link>"
+        f"<description>&lt;p&gt;Mock summary for feed {n} article {i}.&lt;/p&gt;</description></item>"
+        for i in range(5)
+    )
+    return f"<?xml version=\"1.0\"?><rss version=\"2.0\"><channel><title>Mock Feed {n}</title>{items}</channel></rss>"
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """LLM呼び出しとダミーRSSに応答するハンドラ"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/feeds/"):
+            n = self.path.split("/")[-1].replace(".xml", "")
+            body = mock_feed(n).encode("utf-8")
+            etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_error(404)
+
+    def do_POST(self):
+        config = self.server.config
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        time.sleep(config["latency"])
+        with self.server.lock:
+            self.server.seq += 1
+            seq = self.server.seq
+            failed = self.server.rng.random() < config["failure_rate"]
+        if failed:
+            self._send_json(503, {"error": "injected failure"})
+            return
+
+        text = self._response_text(request, seq)
+        usage = {"input": estimate_tokens(request.get("prompt", "")), "output": estimate_tokens(text)}
+        usage["total"] = usage["input"] + usage["output"]
+
+        if request.get("stream"):
+            self._stream(text, usage)
+        else:
+            self._throttle(usage["output"])
+            self._send_json(200, {"text": text, "usage": usage})
+
+    def _response_text(self, request, seq):
+        prompt = request.get("prompt", "")
+        if request.get("generation_config", {}).get("response_mime_type") != "application/json":
+            return mock_html()
+        if "daily_summary" in prompt:
+            data = mock_summary()
+        elif "--layout-max-width" in prompt:
+            data = mock_layout(seq)
+        elif "--morpho-bg-primary" in prompt:
+            data = mock_style(seq)
+        else:
+            data = mock_feature(seq)
+        return json.dumps(data, ensure_ascii=False)
+
+    def _throttle(self, tokens):
+        throughput = self.server.config["throughput"]
+        if throughput > 0:
+            time.sleep(tokens / throughput)
+
+    def _stream(self, text, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        chunk_size = self.server.config["chunk_chars"]
+        for i in range(0, len(text), chunk_size):
+            chunk = text[i:i + chunk_size]
+            self._throttle(estimate_tokens(chunk))
+            self.wfile.write(json.dumps({"text": chunk}, ensure_ascii=False).encode("utf-8") + b"\n")
+            self.wfile.flush()
+        self.wfile.write(json.dumps({"usage": usage}).encode("utf-8") + b"\n")
+
+    def _send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(port=8765, latency=0.5, throughput=200, failure_rate=0.0, seed=0, chunk_chars=200):
+    """バックグラウンドスレッドでモックサーバーを起動して返す"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockLLMHandler)
+    server.config = {
+        "latency": latency,
+        "throughput": throughput,
+        "failure_rate": failure_rate,
+        "chunk_chars": chunk_chars
+    }
+    server.rng = random.Random(seed)
+    server.lock = threading.Lock()
+    server.seq = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def mock_feed_urls(port=8765):
+    """モックサーバーが返すダミーRSSのURL一覧"""
+    return [f"http://127.0.0.1:{port}/feeds/{n}.xml" for n in range(MOCK_FEED_COUNT)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MorphoNews mock LLM server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="応答開始までの遅延（秒）")
+    parser.add_argument("--throughput", type=float, default=200, help="出力トークン/秒（0で無制限）")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="503を返す確率")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.latency, args.throughput, args.failure_rate, args.seed)
+    print(f"Mock LLM server listening on http://127.0.0.1:{args.port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,150 @@
+"""
+public/ のテキストアセットに事前圧縮した .gz / .br を書き出す後処理ステージ
+
+nginx の gzip_static / brotli_static などで、圧縮済みファイルをそのまま配信するためのもの。
+- 対象: PRECOMPRESS_EXTENSIONS の拡張子で PRECOMPRESS_MIN_BYTES 以上のファイル
+- 元ファイル・圧縮ファイルのハッシュと圧縮レベルを state/precompress-manifest.json に記録し、変更されたファイルだけを圧縮する
+  （ビルドマニフェストとは分け、コミットしない圧縮ファイルの記録が生成物の記録に混ざらないようにする）
+- .br は brotli パッケージがインストールされている場合のみ（pip install brotli）
+- 圧縮しても小さくならない場合は書き出さない。元ファイルが消えた圧縮ファイルは削除する
+- 実行ごとに増えるファイル（アーカイブ・データJSON・履歴ページ）は件数が多く、1件あたりのアクセスも少ないため、
+  brotli の品質を下げて圧縮時間を抑える。品質を最大にするのはCSS・JSなどの共有アセットだけ
+- 圧縮ファイルはコミットしない（.gitignore）。ワークフローでは actions/cache で実行間に引き継ぎ、
+  記録と一致する圧縮ファイルがあれば作り直さない（キャッシュが無い・食い違う場合はその分だけ圧縮し直す）
+
+使い方（generator.py の最後に自動で実行される。単独で実行する場合）:
+    python scripts/precompress.py
+"""
+import gzip
+import os
+
+from build_manifest import BuildManifest, hash_file
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PRECOMPRESS_EXTENSIONS = ('.html', '.css', '.js', '.json', '.svg', '.txt', '.xml')
+PRECOMPRESS_MIN_BYTES = 1024
+# 圧縮結果の記録（state/ からの相対パス。記録するパスは public/ からの相対）
+PRECOMPRESS_MANIFEST_FILE = "precompress-manifest.json"
+# 実行ごとの診断用ファイル（data/{ID}.trace.json）
+PRECOMPRESS_EXCLUDE_SUFFIXES = ('.trace.json',)
+# 圧縮後のサイズが元のこの割合を超える場合は書き出さない
+PRECOMPRESS_MAX_RATIO = 0.9
+# 実行ごとに増えるファイルのディレクトリ（public/ 直下）と、それらに使う brotli の品質
+PRECOMPRESS_BULK_DIRS = ('archives', 'data', 'history')
+BROTLI_QUALITY = 11
+BROTLI_BULK_QUALITY = 5
+
+
+def is_bulk_asset(path, public_dir):
+    """実行ごとに増えるファイル（アーカイブ・データJSON・履歴ページ）ならTrue"""
+    top = os.path.relpath(path, public_dir).split(os.sep)[0]
+    return top in PRECOMPRESS_BULK_DIRS
+
+
+def compressors(bulk=False):
+    """利用可能な (拡張子, 圧縮レベル, 圧縮関数) の一覧"""
+    # mtime=0 にして、同じ入力から常に同じ .gz を作る（不要な差分を出さない）
+    available = [('.gz', 9, lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        quality = BROTLI_BULK_QUALITY if bulk else BROTLI_QUALITY
+        available.append(('.br', quality, lambda data: brotli.compress(data, quality=quality)))
+    return available
+
+
+def iter_text_assets(public_dir):
+    """圧縮対象のファイルパスを列挙"""
+    for dirpath, _, filenames in os.walk(public_dir):
+        for filename in sorted(filenames):
+            if filename.endswith(('.tmp', *PRECOMPRESS_EXCLUDE_SUFFIXES)):
+                continue
+            if not filename.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            path = os.path.join(dirpath, filename)
+            if os.path.getsize(path) >= PRECOMPRESS_MIN_BYTES:
+                yield path
+
+
+def remove_orphans(public_dir, manifest):
+    """元ファイルが無くなった圧縮ファイルを削除"""
+    removed = []
+    for dirpath, _, filenames in os.walk(public_dir):
+        for filename in filenames:
+            source, suffix = os.path.splitext(filename)
+            if suffix not in ('.gz', '.br') or not source.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            path = os.path.join(dirpath, filename)
+            if not os.path.exists(os.path.join(dirpath, source)):
+                os.remove(path)
+                manifest.forget(path)
+                removed.append(path)
+    return removed
+
+
+def is_fresh(manifest, target, source_hash, level):
+    """前回と同じ元ファイル・圧縮レベルで作成済み（または圧縮効果が小さく書き出さないと記録済み）ならTrue
+
+    圧縮ファイルはキャッシュから戻したものなので、記録した内容のハッシュと一致する場合だけ使う。
+    """
+    recorded = manifest.inputs_for(target)
+    if not recorded or recorded.get('source') != source_hash or recorded.get('level') != level:
+        return False
+    if recorded.get('skipped', False):
+        return True
+    return os.path.exists(target) and hash_file(target) == recorded.get('output')
+
+
+def precompress_public(public_dir, manifest):
+    """変更されたテキストアセットを圧縮し、ファイルごとの結果のリストを返す"""
+    results = []
+    for path in iter_text_assets(public_dir):
+        source_hash = hash_file(path)
+        stale = [(suffix, level, compress) for suffix, level, compress in compressors(is_bulk_asset(path, public_dir))
+                 if not is_fresh(manifest, path + suffix, source_hash, level)]
+        if not stale:
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        result = {'path': path, 'size': len(data)}
+        for suffix, level, compress in stale:
+            compressed = compress(data)
+            target = path + suffix
+            if len(compressed) > len(data) * PRECOMPRESS_MAX_RATIO:
+                # 圧縮効果が小さいファイルは書き出さない（記録はして次回はスキップ）
+                if os.path.exists(target):
+                    os.remove(target)
+                manifest.record(target, {'source': source_hash, 'level': level, 'skipped': True})
+                continue
+            tmp_path = f"{target}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, target)
+            manifest.record(target, {'source': source_hash, 'level': level, 'output': hash_file(target)})
+            result[suffix] = len(compressed)
+        results.append(result)
+    return results
+
+
+def format_result(result, public_dir):
+    """1ファイル分の圧縮結果を1行で表す"""
+    size = result['size']
+    ratios = [
+        f"{suffix[1:]} {result[suffix] / 1024:.1f}KB ({result[suffix] / size:.0%})"
+        for suffix in ('.gz', '.br') if suffix in result
+    ]
+    return f"{os.path.relpath(result['path'], public_dir)}: {size / 1024:.1f}KB → {', '.join(ratios) or 'skipped (low ratio)'}"
+
+
+if __name__ == "__main__":
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    public_dir = os.path.join(repo_dir, "public")
+    manifest = BuildManifest.load(os.path.join(repo_dir, "state", PRECOMPRESS_MANIFEST_FILE), public_dir)
+    removed = remove_orphans(public_dir, manifest)
+    results = precompress_public(public_dir, manifest)
+    manifest.save()
+    for result in results:
+        print(f"  {format_result(result, public_dir)}")
+    print(f"✓ Precompressed {len(results)} files, removed {len(removed)} orphans (brotli: {'on' if brotli else 'off'})")
@@ -0,0 +1,157 @@
+"""
+public/data/*.json から public/archives/*.html を一括で再生成するスクリプト
+
+generator.py と同じレンダラー（TEMPLATE.html）を使い、プロセスプールで並列に描画する。
+テンプレートやカードのマークアップを変更したときに、過去のアーカイブ全体へ反映するために使う。
+
+- 前の記事へのリンク・世代番号は履歴ストアから求める
+- 新機能・スタイル・レイアウトは履歴エントリのIDからレジストリを引く
+- full-evolveモードのアーカイブ（AIが全体を生成したHTML）は再生成しない
+- generation_modeが記録されていない旧形式のエントリは --include-legacy 指定時のみ再生成する
+- ビルドマニフェストの入力ハッシュが前回と同じアーカイブは描画自体を省略する（--force で無視）
+- 内容が変わらないファイルは書き換えない
+- プロンプト開示用の public/data/prompts/{id}.json も合わせて書き出す
+
+使い方:
+    python scripts/rerender_archives.py --workers 8
+    python scripts/rerender_archives.py 2026-02-01_1004 2026-01-31_1003
+"""
+import argparse
+import glob
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import generator
+from build_manifest import BuildManifest
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPTS_DIR)
+
+ARCHIVE_ID_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}_\d{4}$')
+RERENDER_MODES = ("ai", "modular")
+
+
+def list_edition_ids():
+    """public/data/ にあるエディションIDの一覧（YYYY-MM-DD_HHMM.json のみ）"""
+    ids = []
+    for path in glob.glob(os.path.join(generator.DATA_DIR, "????-??-??_????.json")):
+        entry_id = os.path.splitext(os.path.basename(path))[0]
+        if ARCHIVE_ID_PATTERN.match(entry_id):
+            ids.append(entry_id)
+    return sorted(ids)
+
+
+def load_registry_index():
+    """機能・スタイル・レイアウトのレジストリをIDで引ける辞書にする"""
+    features = generator.load_json(generator.FEATURES_FILE, {"features": []})
+    styles = generator.load_json(generator.STYLES_FILE, {"themes": []})
+    layouts = generator.load_json(generator.LAYOUTS_FILE, {"layouts": []})
+    return {
+        'feature': {item['id']: item for item in features.get('features', [])},
+        'style': {item['id']: item for item in styles.get('themes', [])},
+        'layout': {item['id']: item for item in layouts.get('layouts', [])},
+    }
+
+
+def plan_jobs(entry_ids, history_store, registries, build_manifest, include_legacy=False, force=False):
+    """再生成するジョブと、スキップしたIDとその理由を返す"""
+    positions = {entry_id: i + 1 for i, entry_id in enumerate(history_store.ids)}
+    jobs = []
+    skipped = []
+    for entry_id in entry_ids:
+        entry = history_store.get(entry_id)
+        if entry is None:
+            skipped.append((entry_id, "not in history"))
+            continue
+        mode = entry.get('generation_mode')
+        if mode is None and not include_legacy:
+            skipped.append((entry_id, "legacy"))
+            continue
+        if mode is not None and mode not in RERENDER_MODES:
+            skipped.append((entry_id, mode))
+            continue
+        archive_path = os.path.join(generator.ARCHIVE_DIR, f"{entry_id}.html")
+        previous_inputs = None if force or not os.path.exists(archive_path) else build_manifest.inputs_for(archive_path)
+        jobs.append((
+            entry_id,
+            generator.get_prev_link(entry_id, history_store),
+            positions[entry_id],
+            registries['feature'].get(entry.get('new_feature')),
+            registries['style'].get(entry.get('new_style')),
+            registries['layout'].get(entry.get('new_layout')),
+            previous_inputs,
+        ))
+    return jobs, skipped
+
+
+def rerender_one(job):
+    """1件分を描画して書き出す。(ID, 'fresh' | 'updated' | 'unchanged', 入力ハッシュ) を返す"""
+    entry_id, prev_link, generation_count, new_feature, new_style, new_layout, previous_inputs = job
+    news_data = generator.load_json(os.path.join(generator.DATA_DIR, f"{entry_id}.json"), None)
+    values = generator.build_archive_values(
+        news_data, entry_id, prev_link, generation_count, new_feature, new_style, new_layout
+    )
+    inputs = generator.archive_build_inputs(values)
+    generator.write_prompt_disclosure(entry_id, news_data)
+    if inputs == previous_inputs:
+        return entry_id, "fresh", inputs
+
+    html = generator.render_archive_html(values)
+    archive_path = os.path.join(generator.ARCHIVE_DIR, f"{entry_id}.html")
+    if os.path.exists(archive_path):
+        with open(archive_path, 'r', encoding='utf-8') as f:
+            if f.read() == html:
+                return entry_id, "unchanged", inputs
+    with open(archive_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return entry_id, "updated", inputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-render MorphoNews archives from public/data")
+    parser.add_argument("ids", nargs="*", help="再生成するエディションID（省略時は全件）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--include-legacy", action="store_true", help="generation_mode未記録の旧エントリも再生成する")
+    parser.add_argument("--force", action="store_true", help="ビルドマニフェストを無視して全件描画する")
+    args = parser.parse_args()
+
+    # generator.pyのパスはリポジトリルートからの相対パス
+    os.chdir(REPO_DIR)
+
+    start = time.time()
+    history_store = generator.open_history_store()
+    build_manifest = BuildManifest.load(generator.BUILD_MANIFEST_FILE, generator.PUBLIC_DIR)
+    # アーカイブが参照する機能バンドル・処理済みCSS（styles/dist/）・ハッシュ付きのアセットを先に更新する
+    generator.bundle_features(build_manifest)
+    generator.fingerprint_public_assets(build_manifest)
+    entry_ids = args.ids or list_edition_ids()
+    jobs, skipped = plan_jobs(
+        entry_ids, history_store, load_registry_index(), build_manifest, args.include_legacy, args.force
+    )
+
+    results = {"fresh": 0, "updated": 0, "unchanged": 0}
+    failed = []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {executor.submit(rerender_one, job): job[0] for job in jobs}
+        for future, entry_id in futures.items():
+            try:
+                _, status, inputs = future.result()
+                results[status] += 1
+                build_manifest.record(os.path.join(generator.ARCHIVE_DIR, f"{entry_id}.html"), inputs)
+            except Exception as e:
+                failed.append(entry_id)
+                print(f"  ⚠ {entry_id}: {e}")
+
+    build_manifest.save()
+
+    for entry_id, reason in skipped:
+        print(f"  - skipped {entry_id} ({reason})")
+    print(
+        f"✓ Re-rendered {len(jobs) - len(failed)} archives in {time.time() - start:.2f}s "
+        f"(updated={results['updated']}, unchanged={results['unchanged']}, fresh={results['fresh']}, "
+        f"skipped={len(skipped)}, failed={len(failed)}, workers={args.workers})"
+    )
+    if failed:
+        raise SystemExit(1)
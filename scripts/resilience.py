@@ -0,0 +1,247 @@
+"""
+LLM呼び出しの耐障害性レイヤー（タイムアウト・再試行・サーキットブレーカー・ヘッジ）
+
+- タイムアウト: 呼び出しをデーモンスレッドで実行し、timeout秒で待つのをやめる
+  （止まった呼び出しがGitHub Actionsのジョブ全体を止めないようにする。スレッド自体は終了まで残る）
+- 再試行: ジッター付き指数バックオフ（0〜min(max_delay, base_delay * 2^n) の一様乱数）で max_attempts 回まで。
+  再試行するのは一時的な失敗（retryable で判定。既定はタイムアウト・接続エラーと、HTTPステータス429・5xx）だけで、
+  4xx・認証エラー・応答の解析エラーなどはすぐに送出し、サーキットブレーカーにも数えない
+- サーキットブレーカー: failure_threshold 回連続で失敗したら reset_timeout 秒は呼び出さずに即座に失敗させ、
+  その後の1回が成功したら元に戻す（障害中のAPIに再試行を重ねない）
+- ヘッジ（任意）: 応答が過去の成功時のp95レイテンシを超えたら同じリクエストをもう1本送り、先に返った方を使う
+- ストリーミング: 最初のチャンクが届くまでは通常の呼び出しと同じく再試行し、その後はチャンクの間隔でタイムアウトする
+  （出力を使い始めた後は最初からやり直せないため再試行しない）
+
+再試行回数・待ち時間などの集計は stats() で取得し、データJSONの meta に記録する。
+"""
+import queue
+import random
+import threading
+import time
+
+
+_END = object()
+
+
+def is_transient_status(status):
+    """再試行するHTTPステータス（レート制限とサーバー側のエラー）"""
+    return status == 429 or 500 <= status < 600
+
+
+def is_transient(error):
+    """既定の再試行判定: タイムアウト・接続エラーと、status_code（または response.status_code）が429・5xxのもの"""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return isinstance(status, int) and is_transient_status(status)
+
+
+class CallTimeoutError(TimeoutError):
+    """呼び出しがタイムアウトした"""
+
+
+class CircuitOpenError(RuntimeError):
+    """サーキットブレーカーが開いているため呼び出さなかった"""
+
+
+class CircuitBreaker:
+    """連続失敗回数で開閉するサーキットブレーカー（スレッドセーフ）"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.open_count = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """開いていればCircuitOpenErrorを送出（reset_timeout経過後は試しに1回通す）"""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.time() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"circuit open after {self.failures} consecutive failures")
+            # 半開: 次の結果で閉じるか開き直すかが決まる
+            self.opened_at = None
+            self.failures = self.failure_threshold - 1
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold and self.opened_at is None:
+                self.opened_at = time.time()
+                self.open_count += 1
+
+
+def _start_daemon(fn, args, results, tag):
+    """fn(*args) をデーモンスレッドで実行し、(tag, 成功したか, 結果または例外) を results に入れる"""
+    def run():
+        try:
+            results.put((tag, True, fn(*args)))
+        except BaseException as e:
+            results.put((tag, False, e))
+    threading.Thread(target=run, daemon=True).start()
+
+
+def iter_with_timeout(iterable, timeout):
+    """要素の間隔がtimeout秒を超えたらCallTimeoutErrorを送出するイテレーター（ストリーミング応答用）"""
+    items = queue.Queue()
+    done = object()
+
+    def pump():
+        try:
+            for item in iterable:
+                items.put((True, item))
+            items.put((True, done))
+        except BaseException as e:
+            items.put((False, e))
+    threading.Thread(target=pump, daemon=True).start()
+
+    while True:
+        try:
+            ok, item = items.get(timeout=timeout)
+        except queue.Empty:
+            raise CallTimeoutError(f"no data for {timeout}s") from None
+        if not ok:
+            raise item
+        if item is done:
+            return
+        yield item
+
+
+class ResilientCaller:
+    """タイムアウト・再試行・サーキットブレーカー・ヘッジ付きで関数を呼び出す"""
+
+    def __init__(self, timeout=180.0, max_attempts=3, base_delay=2.0, max_delay=30.0,
+                 breaker=None, hedge=False, hedge_min_samples=5, retryable=is_transient):
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.retryable = retryable
+        self._latencies = []
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0, "attempts": 0, "retries": 0, "failures": 0, "non_retryable": 0,
+            "timeouts": 0, "backoff_wait_sec": 0.0, "hedged": 0, "hedge_wins": 0, "streams": 0,
+        }
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def hedge_delay(self):
+        """ヘッジを送るまでの待ち時間（成功時レイテンシのp95。サンプル不足ならNone）"""
+        with self._lock:
+            if not self.hedge or len(self._latencies) < self.hedge_min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def _attempt(self, fn, args):
+        """1回分の呼び出し（タイムアウトとヘッジ込み）"""
+        results = queue.Queue()
+        start = time.time()
+        _start_daemon(fn, args, results, "primary")
+        running = 1
+        hedge_at = self.hedge_delay()
+        error = None
+        while running:
+            elapsed = time.time() - start
+            if elapsed >= self.timeout:
+                break
+            wait = self.timeout - elapsed
+            if hedge_at is not None:
+                wait = min(wait, max(0.0, hedge_at - elapsed))
+            try:
+                tag, ok, value = results.get(timeout=wait)
+            except queue.Empty:
+                if hedge_at is not None and time.time() - start >= hedge_at:
+                    # p95を超えたので同じリクエストをもう1本送る（1回の呼び出しにつき1本まで）
+                    hedge_at = None
+                    running += 1
+                    self._count("hedged")
+                    _start_daemon(fn, args, results, "hedge")
+                continue
+            running -= 1
+            if ok:
+                with self._lock:
+                    self._latencies.append(time.time() - start)
+                if tag == "hedge":
+                    self._count("hedge_wins")
+                return value
+            error = value
+        if running == 0:
+            raise error
+        self._count("timeouts")
+        raise CallTimeoutError(f"call exceeded {self.timeout}s")
+
+    def call(self, fn, *args):
+        """fn(*args) を呼び出す。一時的でない失敗はすぐに、一時的な失敗はmax_attempts回目に例外を送出する"""
+        self._count("calls")
+        for attempt in range(self.max_attempts):
+            self.breaker.before_call()
+            self._count("attempts")
+            try:
+                result = self._attempt(fn, args)
+            except Exception as e:
+                if not self.retryable(e):
+                    self._count("non_retryable")
+                    self._count("failures")
+                    raise
+                self.breaker.record_failure()
+                if attempt + 1 >= self.max_attempts:
+                    self._count("failures")
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                print(f"  ⚠ LLM call failed ({e}), retrying in {delay:.1f}s ({attempt + 1}/{self.max_attempts - 1})")
+                self._count("retries")
+                self._count("backoff_wait_sec", delay)
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def stream(self, open_stream, *args, idle_timeout=None):
+        """open_stream(*args) が返すストリーミング応答を反復する
+
+        最初の要素が届くまでは call と同じくタイムアウト・再試行・ヘッジを掛け（失敗したらストリームを開き直す）、
+        その後は要素の間隔のタイムアウトだけを掛ける。出力を途中まで使った後では最初からやり直せないため、再試行はしない。
+        """
+        self._count("streams")
+        timeout = idle_timeout or self.timeout
+
+        def open_and_read_first():
+            items = iter_with_timeout(open_stream(*args), timeout)
+            return next(items, _END), items
+
+        first, items = self.call(open_and_read_first)
+        if first is _END:
+            return
+        yield first
+        try:
+            yield from items
+        except Exception as e:
+            if self.retryable(e):
+                self.breaker.record_failure()
+            self._count("failures")
+            raise
+
+    def stats(self):
+        """再試行回数・待ち時間などの集計"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["backoff_wait_sec"] = round(stats["backoff_wait_sec"], 2)
+        stats["circuit_opened"] = self.breaker.open_count
+        return stats
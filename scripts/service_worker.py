@@ -0,0 +1,224 @@
+"""
+サービスワーカー（public/sw.js）とプリキャッシュマニフェスト（public/precache-manifest.json）の生成
+
+「前のニュース」リンクでアーカイブを辿るたびに、ベースCSS・コアローダー・テーマを取り直さないようにする。
+- マニフェスト: 最新 SW_PRECACHE_ARCHIVES 件のアーカイブと、それらが参照するCSS・JS・JSON、
+  ローダーが取得する共有アセット（アセットマップで解決）。各エントリに内容のハッシュ（revision）を持つ
+- sw.js: マニフェスト全体のハッシュ（version）を埋め込むため、内容が変わった実行でだけ書き換わり、
+  ブラウザはそれを検知して更新する。更新時は revision が変わったエントリだけを取り直す
+- キャッシュから先に返すのは、名前にハッシュを含むファイルだけ。
+  アーカイブHTMLは rerender_archives.py で描き直されることがあるため、キャッシュを返しつつ裏で取り直す（stale-while-revalidate）。
+  名前の変わらないJSON（features.json・bundle.json など）はネットワーク優先で、オフライン時だけキャッシュを使う
+
+ハッシュはビルドマニフェストと同じ hash_file（更新時刻・サイズでキャッシュ）で求める。
+"""
+import glob
+import json
+import os
+import re
+
+from build_manifest import hash_file, hash_value
+from fingerprint import load_asset_map
+
+SW_FILE = "sw.js"
+PRECACHE_MANIFEST_FILE = "precache-manifest.json"
+# プリキャッシュする最新アーカイブの件数
+SW_PRECACHE_ARCHIVES = int(os.environ.get("SW_PRECACHE_ARCHIVES", "10"))
+# アーカイブのHTMLには現れないが、ローダーが取得する共有アセット（public/ からの相対パス）
+SW_SHARED_ASSETS = (
+    "asset-map.json",
+    "features/bundle.js",
+    "features/bundle.json",
+    "features/features.json",
+    "layouts/layouts.json",
+)
+SW_REVISION_CHARS = 12
+
+# アーカイブHTMLから参照されるローカルのCSS・JS・JSON（"../" で始まるもの）
+_ARCHIVE_ASSET_REF = re.compile(r'(?:href|src)="\.\./([^"?#{}$]+\.(?:css|js|json))"')
+
+SW_TEMPLATE = """/* MorphoNews service worker (generated by scripts/generator.py) */
+const PRECACHE_VERSION = '__PRECACHE_VERSION__';
+const PRECACHE = 'morpho-precache';
+const RUNTIME = 'morpho-runtime';
+const RUNTIME_LIMIT = 30;
+const MANIFEST_URL = new URL('__PRECACHE_MANIFEST__', self.location).href;
+// 各エントリの revision をキャッシュ内に保存するためのキー
+const REVISIONS_KEY = new URL('__precache-revisions', self.location).href;
+
+const readRevisions = async (cache) => {
+    try {
+        const response = await cache.match(REVISIONS_KEY);
+        return response ? await response.json() : {};
+    } catch {
+        return {};
+    }
+};
+
+// revision が変わったエントリだけを取り直し、マニフェストから消えたエントリを削除
+self.addEventListener('install', (event) => {
+    event.waitUntil((async () => {
+        const response = await fetch(`${MANIFEST_URL}?v=${PRECACHE_VERSION}`, { cache: 'no-store' });
+        const manifest = await response.json();
+        const cache = await caches.open(PRECACHE);
+        const previous = await readRevisions(cache);
+        const revisions = {};
+        await Promise.all(manifest.entries.map(async ({ url, revision }) => {
+            const absolute = new URL(url, self.location).href;
+            if (previous[absolute] === revision && await cache.match(absolute)) {
+                revisions[absolute] = revision;
+                return;
+            }
+            try {
+                const fresh = await fetch(absolute, { cache: 'no-cache' });
+                if (fresh.ok) {
+                    await cache.put(absolute, fresh);
+                    revisions[absolute] = revision;
+                }
+            } catch (error) {
+                console.warn('Precache failed:', url, error);
+            }
+        }));
+        for (const request of await cache.keys()) {
+            if (!(request.url in revisions) && request.url !== REVISIONS_KEY) {
+                await cache.delete(request);
+            }
+        }
+        await cache.put(REVISIONS_KEY, new Response(JSON.stringify(revisions)));
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil((async () => {
+        for (const name of await caches.keys()) {
+            if (name !== PRECACHE && name !== RUNTIME) {
+                await caches.delete(name);
+            }
+        }
+        await self.clients.claim();
+    })());
+});
+
+// 内容が変わらないURL（ハッシュ付きのファイル名）
+const IMMUTABLE_PATHS = [
+    /\\/assets\\/dist\\//,
+    /\\/styles\\/dist\\/.+\\.[0-9a-f]{8,}\\.css$/,
+];
+// 名前は変わらないが描き直されることがあるURL（アーカイブHTML）
+const REVALIDATE_PATHS = [
+    /\\/archives\\/\\d{4}-\\d{2}-\\d{2}_\\d{4}\\.html$/,
+];
+
+// 取得したページを保存し、古いものから RUNTIME_LIMIT 件を超えた分を削除
+const putRuntime = async (request, response) => {
+    const runtime = await caches.open(RUNTIME);
+    await runtime.put(request, response);
+    const keys = await runtime.keys();
+    for (const key of keys.slice(0, Math.max(0, keys.length - RUNTIME_LIMIT))) {
+        await runtime.delete(key);
+    }
+};
+
+// キャッシュ済みのアーカイブHTMLを返し、裏で取り直して同じキャッシュを更新する
+const revalidate = async (event, url) => {
+    const { request } = event;
+    const key = url.origin + url.pathname;
+    const precached = await caches.match(key, { cacheName: PRECACHE });
+    const cached = precached || await caches.match(request, { cacheName: RUNTIME, ignoreSearch: true });
+    if (!cached) return null;
+    event.waitUntil((async () => {
+        try {
+            const fresh = await fetch(request, { cache: 'no-cache' });
+            if (!fresh.ok) return;
+            if (precached) {
+                await (await caches.open(PRECACHE)).put(key, fresh);
+            } else {
+                await putRuntime(request, fresh);
+            }
+        } catch {
+            // オフライン: 次の表示で取り直す
+        }
+    })());
+    return cached;
+};
+
+// 内容が変わらないものはプリキャッシュから、アーカイブHTMLはキャッシュから返して裏で更新する。
+// それ以外（名前の変わらないJSONやページ）はネットワーク優先で、オフライン時はプリキャッシュ・取得済みのページを使う
+self.addEventListener('fetch', (event) => {
+    const { request } = event;
+    const url = new URL(request.url);
+    if (request.method !== 'GET' || url.origin !== self.location.origin) return;
+    event.respondWith((async () => {
+        if (IMMUTABLE_PATHS.some((pattern) => pattern.test(url.pathname))) {
+            const cached = await caches.match(request, { cacheName: PRECACHE, ignoreSearch: true });
+            if (cached) return cached;
+        }
+        if (REVALIDATE_PATHS.some((pattern) => pattern.test(url.pathname))) {
+            const cached = await revalidate(event, url);
+            if (cached) return cached;
+        }
+        try {
+            const response = await fetch(request);
+            if (response.ok && request.mode === 'navigate') {
+                await putRuntime(request, response.clone());
+            }
+            return response;
+        } catch (error) {
+            const fallback = await caches.match(request, { cacheName: PRECACHE, ignoreSearch: true })
+                || await caches.match(request, { cacheName: RUNTIME, ignoreSearch: true });
+            if (fallback) return fallback;
+            throw error;
+        }
+    })());
+});
+"""
+
+
+def latest_archives(archive_dir, count):
+    """最新のアーカイブHTML（新しい順）"""
+    paths = glob.glob(os.path.join(archive_dir, "????-??-??_????.html"))
+    return sorted(paths, reverse=True)[:count]
+
+
+def archive_asset_refs(archive_path):
+    """アーカイブが参照するローカルアセット（public/ からの相対パス）"""
+    with open(archive_path, 'r', encoding='utf-8') as f:
+        return _ARCHIVE_ASSET_REF.findall(f.read())
+
+
+def build_precache_manifest(public_dir, count=SW_PRECACHE_ARCHIVES):
+    """プリキャッシュマニフェスト（存在するファイルのみ、URLは sw.js からの相対パス）"""
+    urls = []
+    for archive_path in latest_archives(os.path.join(public_dir, "archives"), count):
+        urls.append(os.path.relpath(archive_path, public_dir).replace(os.sep, '/'))
+        urls.extend(archive_asset_refs(archive_path))
+    assets = load_asset_map(public_dir)
+    urls.extend(assets.get(path, path) for path in SW_SHARED_ASSETS)
+
+    entries = []
+    for url in dict.fromkeys(urls):
+        path = os.path.join(public_dir, url)
+        if os.path.isfile(path):
+            entries.append({"url": url, "revision": hash_file(path)[:SW_REVISION_CHARS]})
+    return {"version": hash_value(entries)[:SW_REVISION_CHARS], "entries": entries}
+
+
+def render_service_worker(version):
+    return (SW_TEMPLATE
+            .replace('__PRECACHE_VERSION__', version)
+            .replace('__PRECACHE_MANIFEST__', PRECACHE_MANIFEST_FILE))
+
+
+def write_service_worker(public_dir, build_manifest, count=SW_PRECACHE_ARCHIVES):
+    """sw.js と precache-manifest.json を（内容が変わっていれば）書き出し、(書き出したか, マニフェスト) を返す"""
+    manifest = build_precache_manifest(public_dir, count)
+    manifest_written = build_manifest.write_if_stale(
+        os.path.join(public_dir, PRECACHE_MANIFEST_FILE), {'manifest': manifest['version']},
+        lambda: json.dumps(manifest, ensure_ascii=False, indent=1)
+    )
+    sw_written = build_manifest.write_if_stale(
+        os.path.join(public_dir, SW_FILE), {'version': manifest['version'], 'generator': hash_file(__file__)},
+        lambda: render_service_worker(manifest['version'])
+    )
+    return manifest_written or sw_written, manifest
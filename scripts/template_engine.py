@@ -0,0 +1,131 @@
+"""
+プレースホルダー置換のためのシンプルなテンプレートエンジン
+
+テンプレートを一度だけ「リテラル / プレースホルダー」のセグメント列に分解し、
+描画は1回のjoinで行う（str.replaceを繰り返してテンプレート全体を何度もコピーしない）。
+値のHTMLエスケープはスロットごとに指定する。
+LLMのストリーミング出力のように少しずつ届くテキストは StreamingRenderer で逐次置換する。
+"""
+import html
+import os
+import re
+
+# TEMPLATE.html の {NAME} 形式（CSSの { や JSの ${...} には一致しない）
+PLACEHOLDER_PATTERN = re.compile(r'\{([A-Z][A-Z0-9_]*)\}')
+
+
+def placeholder_variants_pattern(names):
+    """LLM出力向け: {{ NAME }} / {{NAME}} / {NAME} のいずれにも一致するパターン"""
+    alternatives = "|".join(re.escape(name) for name in names)
+    return re.compile(r'\{\{ ?(' + alternatives + r') ?\}\}|\{(' + alternatives + r')\}')
+
+
+class CompiledTemplate:
+    """セグメント列に分解済みのテンプレート"""
+
+    def __init__(self, text, pattern=PLACEHOLDER_PATTERN):
+        self.literals = []
+        self.slots = []
+        position = 0
+        for match in pattern.finditer(text):
+            self.literals.append(text[position:match.start()])
+            name = next(group for group in match.groups() if group)
+            self.slots.append((name, match.group(0)))
+            position = match.end()
+        self.literals.append(text[position:])
+
+    @property
+    def names(self):
+        return {name for name, _ in self.slots}
+
+    def render(self, values, escaped=()):
+        """1回のjoinで描画する。valuesに無いプレースホルダーはそのまま残す"""
+        parts = [self.literals[0]]
+        rendered = {}
+        for (name, original), literal in zip(self.slots, self.literals[1:]):
+            if name not in rendered:
+                if name in values:
+                    value = str(values[name])
+                    rendered[name] = html.escape(value) if name in escaped else value
+                else:
+                    rendered[name] = None
+            parts.append(original if rendered[name] is None else rendered[name])
+            parts.append(literal)
+        return "".join(parts)
+
+
+# チャンク境界をまたぐプレースホルダーに備えて次のチャンクまで持ち越す文字数（プレースホルダーの最大長より長くする）
+STREAM_HOLD_CHARS = 64
+
+
+class StreamingRenderer:
+    """チャンク単位で届くテキストのプレースホルダーを逐次置換する
+
+    valuesの値はその場で埋め込む。deferredに含む名前は値が生成の完了後にしか決まらないため、
+    元の表記のまま出力してfinish()で置換する（feed()の戻り値は途中経過の書き出し用）。
+    """
+
+    def __init__(self, pattern, values, deferred=(), escaped=()):
+        self.pattern = pattern
+        self.values = {
+            name: html.escape(str(value)) if name in escaped else str(value)
+            for name, value in values.items()
+        }
+        self.deferred = frozenset(deferred)
+        self.escaped = frozenset(escaped)
+        self.parts = []
+        self.deferred_slots = []
+        self._pending = ""
+
+    def _render(self, text, final):
+        """textのうち確定できる部分を置換してpartsに追加し、追加した文字列を返す"""
+        limit = len(text) if final else len(text) - STREAM_HOLD_CHARS
+        position = 0
+        start = len(self.parts)
+        for match in self.pattern.finditer(text):
+            # limitより後から始まるプレースホルダーは次のチャンクで続きが届く可能性がある
+            if match.start() >= limit:
+                break
+            name = next(group for group in match.groups() if group)
+            self.parts.append(text[position:match.start()])
+            if name in self.deferred:
+                self.deferred_slots.append((len(self.parts), name))
+                self.parts.append(match.group(0))
+            else:
+                self.parts.append(self.values.get(name, match.group(0)))
+            position = match.end()
+        cut = max(position, limit)
+        self.parts.append(text[position:cut])
+        self._pending = text[cut:]
+        return "".join(self.parts[start:])
+
+    def feed(self, chunk):
+        """チャンクを追加し、確定した部分（書き出してよい文字列）を返す"""
+        return self._render(self._pending + chunk, final=False)
+
+    def flush(self):
+        """最後のチャンクの後に呼び、残りを返す"""
+        return self._render(self._pending, final=True)
+
+    def finish(self, deferred_values):
+        """保留していたプレースホルダーを置換した全体を返す"""
+        for index, name in self.deferred_slots:
+            if name in deferred_values:
+                value = str(deferred_values[name])
+                self.parts[index] = html.escape(value) if name in self.escaped else value
+        return "".join(self.parts)
+
+
+_template_cache = {}
+
+
+def load_template(path):
+    """テンプレートファイルをコンパイルして返す（更新時刻が変わるまでキャッシュ）"""
+    mtime = os.path.getmtime(path)
+    cached = _template_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'r', encoding='utf-8') as f:
+        template = CompiledTemplate(f.read())
+    _template_cache[path] = (mtime, template)
+    return template
@@ -0,0 +1,111 @@
+"""
+処理区間（スパン）の計測と Chrome トレース形式（Trace Event Format）での書き出し
+
+    tracer = Tracer()
+    with tracer.span("fetch_feed", "feed", url=url) as span:
+        ...
+        span['status'] = "ok"   # 区間の終了時に記録する値を追加できる
+
+    @tracer.traced("generate_new_style", "stage")
+    def generate_new_style(...): ...
+
+    tracer.write("public/data/{ID}.trace.json")
+
+書き出したファイルは chrome://tracing や Perfetto UI（https://ui.perfetto.dev）で開ける。
+スパンはスレッドごとの行に入れ子で表示されるため、並列に実行されたフィード取得や
+機能・スタイル・レイアウト生成の中で、どれが全体を遅らせたかが一目で分かる。
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_PID = 1
+
+
+class Tracer:
+    """スレッドセーフなスパンの記録係（時刻はインスタンス生成時からのマイクロ秒）"""
+
+    def __init__(self, process_name="MorphoNews generator"):
+        self.process_name = process_name
+        self._origin = time.perf_counter()
+        self._events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def now(self):
+        """トレース上の現在時刻（マイクロ秒）"""
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _thread_id(self):
+        """スレッドに小さな連番を振る（呼び出し元でロック済み）"""
+        ident = threading.get_ident()
+        if ident not in self._threads:
+            self._threads[ident] = (len(self._threads) + 1, threading.current_thread().name)
+        return self._threads[ident][0]
+
+    def record(self, name, cat, start, end, args=None):
+        """start〜end（now() の値）の区間を記録"""
+        with self._lock:
+            self._events.append({
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": round(start, 1),
+                "dur": round(end - start, 1),
+                "pid": TRACE_PID,
+                "tid": self._thread_id(),
+                "args": args or {},
+            })
+
+    @contextmanager
+    def span(self, name, cat="stage", **args):
+        """with文の区間を記録する。yieldした辞書に追加した値は args として書き出される"""
+        start = self.now()
+        try:
+            yield args
+        except BaseException as e:
+            args['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.record(name, cat, start, self.now(), args)
+
+    def traced(self, name=None, cat="stage"):
+        """関数の呼び出し全体をスパンとして記録するデコレーター"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name or fn.__name__, cat):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def slowest(self, count=5, cat=None):
+        """時間のかかったスパン（dur の降順）"""
+        with self._lock:
+            events = [e for e in self._events if cat is None or e['cat'] == cat]
+        return sorted(events, key=lambda e: e['dur'], reverse=True)[:count]
+
+    def to_chrome_trace(self, metadata=None):
+        """Chrome トレース形式の辞書（スレッド名のメタデータイベントを含む）"""
+        with self._lock:
+            events = sorted(self._events, key=lambda e: e['ts'])
+            threads = sorted(self._threads.values())
+        names = [{"name": "process_name", "ph": "M", "pid": TRACE_PID, "args": {"name": self.process_name}}]
+        names.extend(
+            {"name": "thread_name", "ph": "M", "pid": TRACE_PID, "tid": tid, "args": {"name": thread_name}}
+            for tid, thread_name in threads
+        )
+        return {"traceEvents": names + events, "displayTimeUnit": "ms", "otherData": metadata or {}}
+
+    def write(self, path, metadata=None):
+        """トレースをファイルに書き出し、記録したスパンの数を返す"""
+        trace = self.to_chrome_trace(metadata)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, ensure_ascii=False, separators=(',', ':'), default=str)
+        os.replace(tmp_path, path)
+        return sum(1 for e in trace['traceEvents'] if e['ph'] == 'X')
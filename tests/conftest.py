@@ -0,0 +1,5 @@
+import os
+import sys
+
+# scripts/ のモジュールは互いに `import generator` のように参照し合う
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
@@ -0,0 +1,22 @@
+"""blob_store.BlobStore（プロンプト本文のブロブ化）"""
+import os
+
+from blob_store import BLOB_MIN_CHARS, BlobStore
+
+
+def test_each_prompt_is_one_blob_shared_by_identical_text(tmp_path):
+    store = BlobStore(str(tmp_path))
+    prompt = "指示文\n" + "記事\n" * BLOB_MIN_CHARS
+    packed = store.pack({'meta': {'summary_prompt': prompt}, 'prompts': {'summary': prompt}},
+                        fields={'summary_prompt', 'summary'})
+
+    ref = packed['meta']['summary_prompt']
+    assert len(ref['$blobs']) == 1
+    assert packed['prompts']['summary'] == ref
+    assert os.listdir(tmp_path) == [f"{ref['$blobs'][0]}.txt"]
+    assert store.expand(packed)['meta']['summary_prompt'] == prompt
+
+
+def test_short_text_stays_inline(tmp_path):
+    store = BlobStore(str(tmp_path))
+    assert store.pack({'summary_prompt': "短い"}) == {'summary_prompt': "短い"}
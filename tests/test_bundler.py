@@ -0,0 +1,27 @@
+"""bundler.minify_js（行単位のJS圧縮）"""
+from bundler import minify_js
+
+
+def test_code_after_closing_comment_on_same_line_is_kept():
+    source = "/* h */ const a = 1;\nconst b = 2;\nconsole.log(a, b);\n"
+    assert minify_js(source) == "const a = 1;\nconst b = 2;\nconsole.log(a, b);\n"
+
+
+def test_code_after_multiline_comment_end_is_kept():
+    source = "/**\n * doc\n */ init();\nrun();\n"
+    assert minify_js(source) == "init();\nrun();\n"
+
+
+def test_consecutive_comments_on_one_line():
+    source = "/* a */ /* b */ go();\n/* c */\n// d\nstop();\n"
+    assert minify_js(source) == "go();\nstop();\n"
+
+
+def test_unclosed_comment_drops_lines_until_close():
+    source = "/* start\nhidden();\nend */\nshown();\n"
+    assert minify_js(source) == "shown();\n"
+
+
+def test_template_literal_lines_are_preserved():
+    source = "const html = `\n    <p>\n        /* not a comment */\n    </p>\n`;\n    after();\n"
+    assert minify_js(source) == "const html = `\n    <p>\n        /* not a comment */\n    </p>\n`;\nafter();\n"
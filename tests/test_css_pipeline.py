@@ -0,0 +1,26 @@
+"""css_pipeline.minify_css（宣言の重複除去）"""
+from css_pipeline import minify_css
+
+
+def test_unquoted_data_url_is_not_split_on_semicolon():
+    css = ".a { background: url(data:image/png;base64,AAAA); color: red; }"
+    assert minify_css(css) == ".a{background:url(data:image/png;base64,AAAA);color:red}\n"
+
+
+def test_nested_parentheses_are_kept_intact():
+    css = ".a { width: calc(100% - (2 * 3px)); width: calc(100% - (2 * 3px)); }"
+    assert minify_css(css) == ".a{width:calc(100% - (2 * 3px))}\n"
+
+
+def test_space_before_colon_is_same_declaration():
+    css = ".a { color : red; color:red; }"
+    assert minify_css(css) == ".a{color:red}\n"
+
+
+def test_descendant_pseudo_selector_keeps_space():
+    assert minify_css("a :hover { top : 0 }") == "a :hover{top:0}\n"
+
+
+def test_fallback_values_are_kept():
+    css = ".a { height: 100vh; height: 100dvh; }"
+    assert minify_css(css) == ".a{height:100vh;height:100dvh}\n"
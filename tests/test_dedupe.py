@@ -0,0 +1,70 @@
+"""generator の記事の重複排除（URL正規化・タイトルのSimHash・実行間の既読インデックス）"""
+from datetime import datetime
+
+import generator
+
+NOW = datetime(2026, 1, 2, 9, 0, 0)
+TITLE = "OpenAI releases GPT-6 with new reasoning mode"
+
+
+def article(title, link):
+    return {"title": title, "link": link, "summary": ""}
+
+
+def empty_index():
+    return {"version": 1, "urls": {}, "titles": {}}
+
+
+def distance(a, b):
+    return bin(generator.title_simhash(a) ^ generator.title_simhash(b)).count('1')
+
+
+def test_near_duplicate_threshold_is_inclusive():
+    limit = generator.TITLE_SIMHASH_DISTANCE
+    within = (1 << limit) - 1
+    beyond = (1 << (limit + 1)) - 1
+    assert generator.is_near_duplicate(within, [0])
+    assert not generator.is_near_duplicate(beyond, [0])
+
+
+def test_simhash_separates_rewordings_from_other_stories():
+    assert distance(TITLE, TITLE.upper()) == 0
+    assert distance(TITLE, "OpenAI releases GPT-6 with a new reasoning mode") <= generator.TITLE_SIMHASH_DISTANCE
+    assert distance(TITLE, "Google announces Gemini 4 for robotics") > generator.TITLE_SIMHASH_DISTANCE
+
+
+def test_canonicalize_url_drops_tracking_and_cosmetic_differences():
+    assert (generator.canonicalize_url("https://www.Example.com/post/?utm_source=x&id=1&fbclid=y#top")
+            == generator.canonicalize_url("http://example.com/post?id=1"))
+    assert generator.canonicalize_url("https://example.com/a?id=1") != generator.canonicalize_url("https://example.com/a?id=2")
+
+
+def test_dedupe_within_run(monkeypatch):
+    monkeypatch.setattr(generator, "TOP_NEWS_COUNT", 1)
+    articles = [
+        article(TITLE, "https://a.example/1"),
+        article("Unrelated headline about chips", "https://www.a.example/1/?utm_medium=rss"),
+        article("OpenAI releases GPT-6 with a new reasoning mode", "https://b.example/2"),
+        article("Google announces Gemini 4 for robotics", "https://c.example/3"),
+    ]
+    index = empty_index()
+    kept, stats = generator.dedupe_articles(articles, index, NOW)
+    assert [a['link'] for a in kept] == ["https://a.example/1", "https://c.example/3"]
+    assert stats['duplicate_urls'] == 1
+    assert stats['near_duplicate_titles'] == 1
+    assert len(index['urls']) == 2
+
+
+def test_seen_articles_are_skipped_and_backfilled(monkeypatch):
+    monkeypatch.setattr(generator, "TOP_NEWS_COUNT", 2)
+    index = empty_index()
+    generator.dedupe_articles([article(TITLE, "https://a.example/1")], index, NOW)
+
+    articles = [
+        article(TITLE.upper(), "https://mirror.example/9"),
+        article("Google announces Gemini 4 for robotics", "https://c.example/3"),
+    ]
+    kept, stats = generator.dedupe_articles(articles, index, NOW)
+    assert stats['seen_before'] == 1
+    assert stats['backfilled'] == 1
+    assert [a['link'] for a in kept] == ["https://c.example/3", "https://mirror.example/9"]
@@ -0,0 +1,36 @@
+"""条件付きGETによるフィードキャッシュ（モックサーバーのRSSは200 / 304を返す）"""
+import pytest
+
+import generator
+from mock_llm_server import start_server
+
+
+@pytest.fixture(scope="module")
+def feed_url():
+    server = start_server(port=0, latency=0)
+    yield f"http://127.0.0.1:{server.server_address[1]}/feeds/0.xml"
+    server.shutdown()
+
+
+def test_first_fetch_stores_etag(feed_url):
+    result = generator.fetch_feed(feed_url)
+    assert result['status'] == "ok"
+    assert result['cache']['etag']
+    assert len(result['entries']) == 5
+
+
+def test_not_modified_reuses_cached_entries(feed_url):
+    first = generator.fetch_feed(feed_url)
+    cached = dict(first['cache'], entries=[{"title": "cached", "link": "https://example.com/cached", "summary": ""}])
+    second = generator.fetch_feed(feed_url, cached)
+    assert second['status'] == "not_modified"
+    assert second['entries'] == cached['entries']
+    assert second['title'] == first['title']
+
+
+def test_changed_etag_refetches(feed_url):
+    first = generator.fetch_feed(feed_url)
+    stale = dict(first['cache'], etag='"stale"', entries=[])
+    second = generator.fetch_feed(feed_url, stale)
+    assert second['status'] == "ok"
+    assert second['entries'] == first['entries']
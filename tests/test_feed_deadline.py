@@ -0,0 +1,55 @@
+"""フィード1件の取得時間の上限（少しずつ送り続けるサーバーも締め切りで打ち切る）"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import generator
+from mock_llm_server import mock_feed
+
+
+class DripHandler(BaseHTTPRequestHandler):
+    """RSSを数バイトずつ間を空けて送る（1回の読み込みのタイムアウトには掛からない）"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = mock_feed(0).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            for i in range(0, len(body), 64):
+                self.wfile.write(body[i:i + 64])
+                self.wfile.flush()
+                time.sleep(0.05)
+        except OSError:
+            pass
+
+
+@pytest.fixture
+def drip_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DripHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/feeds/0.xml"
+    server.shutdown()
+
+
+def test_slow_drip_feed_is_cut_off_at_deadline(drip_url, monkeypatch):
+    monkeypatch.setattr(generator, "FEED_TIMEOUT_SEC", 0.3)
+    monkeypatch.setattr(generator, "FEED_READ_TIMEOUT_SEC", 1)
+    monkeypatch.setattr(generator, "FEED_READ_CHUNK_BYTES", 64)
+    start = time.time()
+    result = generator.request_feed(drip_url)
+    assert result['status'] == "timeout"
+    assert time.time() - start < 1.0
+
+
+def test_slow_drip_feed_completes_within_deadline(drip_url, monkeypatch):
+    monkeypatch.setattr(generator, "FEED_READ_CHUNK_BYTES", 64)
+    result = generator.request_feed(drip_url)
+    assert result['status'] == "ok"
+    assert len(result['entries']) == 5
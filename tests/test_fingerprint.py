@@ -0,0 +1,27 @@
+"""fingerprint.prune_assets（参照されなくなったハッシュ付きコピーの削除）"""
+import os
+
+from fingerprint import prune_assets
+
+
+def write(root, path, text=""):
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_superseded_copy_is_removed_unless_html_references_it(tmp_path):
+    root = str(tmp_path)
+    write(root, "assets/dist/features/core/loader.new.js")
+    write(root, "assets/dist/features/core/loader.old.js")
+    write(root, "assets/dist/features/core/loader.old.js.gz")
+    write(root, "assets/dist/layouts/grid.old.css")
+    write(root, "archives/a.html", '<link href="../assets/dist/layouts/grid.old.css">')
+
+    removed = prune_assets(root, {"features/core/loader.js": "assets/dist/features/core/loader.new.js"})
+
+    assert removed == ["assets/dist/features/core/loader.old.js"]
+    assert os.path.exists(os.path.join(root, "assets/dist/layouts/grid.old.css"))
+    # 圧縮版は precompress.remove_orphans に任せる
+    assert os.path.exists(os.path.join(root, "assets/dist/features/core/loader.old.js.gz"))
@@ -0,0 +1,22 @@
+"""generator.strip_code_fence_stream（full-evolveのストリーミング出力からコードフェンスを除く）"""
+import pytest
+
+import generator
+
+BODY = "<!DOCTYPE html>\n<html>`code`</html>"
+
+
+@pytest.mark.parametrize("raw", [
+    f"```html\n{BODY}\n```\n",
+    f"```\n{BODY}\n```",
+    f"  \n{BODY}   \n",
+    BODY,
+])
+@pytest.mark.parametrize("size", [1, 2, 5, 1000])
+def test_strip_code_fence_stream(raw, size):
+    chunks = [raw[i:i + size] for i in range(0, len(raw), size)]
+    assert "".join(generator.strip_code_fence_stream(chunks)) == BODY
+
+
+def test_strip_code_fence_stream_empty():
+    assert list(generator.strip_code_fence_stream(["```html", "\n```"])) == []
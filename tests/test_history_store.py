@@ -0,0 +1,51 @@
+"""history_store.HistoryStore（追記ログ + ソート済みインデックス）"""
+import json
+
+from history_store import HistoryStore
+
+
+def open_store(tmp_path):
+    return HistoryStore.open(str(tmp_path / "history.log.jsonl"), str(tmp_path / "history.index.json"))
+
+
+def test_append_and_lookup_round_trip_through_reopened_index(tmp_path):
+    store = open_store(tmp_path)
+    for entry_id in ("2026-01-02_0900", "2026-01-01_0900", "2026-01-03_0900"):
+        assert store.append({'id': entry_id, 'mood_keyword': entry_id[-4:]})
+    assert not store.append({'id': "2026-01-01_0900"})
+
+    reopened = open_store(tmp_path)
+    assert reopened.count() == 3
+    assert reopened.get("2026-01-02_0900") == {'id': "2026-01-02_0900", 'mood_keyword': "0900"}
+    assert reopened.get("2026-01-04_0900") is None
+    assert [e['id'] for e in reopened.view()[1:]] == ["2026-01-02_0900", "2026-01-03_0900"]
+
+
+def test_prev_and_next_use_sorted_ids(tmp_path):
+    store = open_store(tmp_path)
+    for entry_id in ("b", "d", "a"):
+        store.append({'id': entry_id})
+    assert store.prev_id("c") == "b"
+    assert store.prev_id("a") is None
+    assert store.next_id("b") == "d"
+    assert store.next_id("d") is None
+
+
+def test_index_is_rebuilt_when_log_changed_outside_the_store(tmp_path):
+    store = open_store(tmp_path)
+    store.append({'id': "a"})
+    with open(tmp_path / "history.log.jsonl", 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'id': "0"}) + "\n")
+    assert [e['id'] for e in open_store(tmp_path).entries()] == ["0", "a"]
+
+
+def test_materialize_writes_only_when_the_log_changed(tmp_path):
+    store = open_store(tmp_path)
+    history_path = str(tmp_path / "history.json")
+    store.append({'id': "a"})
+    assert store.materialize(history_path)
+    assert not store.materialize(history_path)
+    store.append({'id': "b"})
+    assert store.materialize(history_path)
+    with open(history_path, encoding='utf-8') as f:
+        assert [e['id'] for e in json.load(f)['entries']] == ["a", "b"]
@@ -0,0 +1,38 @@
+"""generator の記事の正規化（HTML除去・エンティティ復元・トークン数での切り詰め）"""
+import generator
+
+
+def test_estimate_tokens_counts_cjk_per_character():
+    assert generator.estimate_tokens("") == 0
+    assert generator.estimate_tokens("abcd") == 1
+    assert generator.estimate_tokens("abcde") == 2
+    assert generator.estimate_tokens("日本語") == 3
+    assert generator.estimate_tokens("日本語abcd") == 4
+
+
+def test_html_to_text_strips_tags_entities_and_whitespace():
+    raw = "<p>Hello&nbsp;<b>world</b></p>\n\n<div>R&amp;amp;D &lt;3</div>"
+    assert generator.html_to_text(raw) == "Hello world R&D <3"
+    assert generator.html_to_text(None) == ""
+
+
+def test_truncate_to_tokens_fits_budget():
+    text = "word " * 100
+    truncated = generator.truncate_to_tokens(text, 10)
+    assert truncated.endswith("…")
+    assert generator.estimate_tokens(truncated[:-1]) <= 10
+    assert generator.truncate_to_tokens("short", 10) == "short"
+
+
+def test_normalize_articles_reports_savings():
+    articles = [{
+        "title": "<em>Big</em> news",
+        "link": "https://example.com/1",
+        "summary": "<p>" + "detail " * 200 + "</p>",
+    }]
+    normalized, stats = generator.normalize_articles(articles)
+    assert normalized[0]['title'] == "Big news"
+    assert "<p>" not in normalized[0]['summary']
+    assert generator.estimate_tokens(normalized[0]['summary']) <= generator.ARTICLE_SUMMARY_MAX_TOKENS + 1
+    assert stats['saved_tokens_est'] == stats['legacy_tokens_est'] - stats['normalized_tokens_est']
+    assert articles[0]['title'] == "<em>Big</em> news"
@@ -0,0 +1,27 @@
+"""precompress（キャッシュから戻した圧縮ファイルの再利用）"""
+import gzip
+import os
+
+from build_manifest import BuildManifest
+from precompress import precompress_public
+
+
+def test_only_missing_or_mismatched_outputs_are_recompressed(tmp_path):
+    public = tmp_path / "public"
+    (public / "styles").mkdir(parents=True)
+    (public / "styles" / "a.css").write_text(".a{color:red}\n" * 200)
+    (public / "styles" / "b.css").write_text(".b{color:blue}\n" * 200)
+    manifest_path = str(tmp_path / "precompress-manifest.json")
+
+    manifest = BuildManifest.load(manifest_path, str(public))
+    first = precompress_public(str(public), manifest)
+    manifest.save()
+    assert len(first) == 2
+
+    # 別の実行のキャッシュから、内容の違う圧縮ファイルが戻った場合
+    (public / "styles" / "b.css.gz").write_bytes(gzip.compress(b"stale"))
+    manifest = BuildManifest.load(manifest_path, str(public))
+    second = precompress_public(str(public), manifest)
+
+    assert [os.path.basename(result['path']) for result in second] == ["b.css"]
+    assert gzip.decompress((public / "styles" / "b.css.gz").read_bytes()).startswith(b".b{")
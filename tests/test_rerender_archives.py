@@ -0,0 +1,59 @@
+"""rerender_archives.plan_jobs（再生成の対象・スキップ理由・描画を省略するための入力ハッシュ）"""
+import generator
+import rerender_archives
+from build_manifest import BuildManifest
+from history_store import HistoryStore
+
+REGISTRIES = {
+    'feature': {"f1": {"id": "f1"}},
+    'style': {"s1": {"id": "s1"}},
+    'layout': {},
+}
+
+
+def setup(tmp_path, monkeypatch, entries):
+    archive_dir = tmp_path / "archives"
+    archive_dir.mkdir()
+    monkeypatch.setattr(generator, "ARCHIVE_DIR", str(archive_dir))
+    store = HistoryStore.open(str(tmp_path / "history.log.jsonl"), str(tmp_path / "history.index.json"))
+    for entry in entries:
+        store.append(entry)
+    manifest = BuildManifest.load(str(tmp_path / "build-manifest.json"), str(tmp_path))
+    return archive_dir, store, manifest
+
+
+def test_plan_jobs_skips_unrenderable_entries(tmp_path, monkeypatch):
+    _, store, manifest = setup(tmp_path, monkeypatch, [
+        {'id': "2026-01-01_0900", 'generation_mode': "ai", 'new_feature': "f1", 'new_style': "s1"},
+        {'id': "2026-01-02_0900", 'generation_mode': "full-evolve"},
+        {'id': "2026-01-03_0900"},
+        {'id': "2026-01-04_0900", 'generation_mode': "modular", 'new_layout': "gone"},
+    ])
+    ids = ["2026-01-01_0900", "2026-01-02_0900", "2026-01-03_0900", "2026-01-04_0900", "2026-01-05_0900"]
+    jobs, skipped = rerender_archives.plan_jobs(ids, store, REGISTRIES, manifest)
+
+    assert skipped == [
+        ("2026-01-02_0900", "full-evolve"),
+        ("2026-01-03_0900", "legacy"),
+        ("2026-01-05_0900", "not in history"),
+    ]
+    first, last = jobs
+    assert first == ("2026-01-01_0900", "#", 1, {"id": "f1"}, {"id": "s1"}, None, None)
+    assert last[:3] == ("2026-01-04_0900", "./2026-01-03_0900.html", 4)
+
+    jobs, skipped = rerender_archives.plan_jobs(ids, store, REGISTRIES, manifest, include_legacy=True)
+    assert "2026-01-03_0900" in [job[0] for job in jobs]
+
+
+def test_plan_jobs_passes_recorded_inputs_unless_forced(tmp_path, monkeypatch):
+    archive_dir, store, manifest = setup(tmp_path, monkeypatch, [
+        {'id': "2026-01-01_0900", 'generation_mode': "ai"},
+    ])
+    archive_path = archive_dir / "2026-01-01_0900.html"
+    archive_path.write_text("<html></html>", encoding="utf-8")
+    manifest.record(str(archive_path), {'values': "abc"})
+
+    jobs, _ = rerender_archives.plan_jobs(["2026-01-01_0900"], store, REGISTRIES, manifest)
+    assert jobs[0][-1] == {'values': "abc"}
+    jobs, _ = rerender_archives.plan_jobs(["2026-01-01_0900"], store, REGISTRIES, manifest, force=True)
+    assert jobs[0][-1] is None
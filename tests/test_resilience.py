@@ -0,0 +1,132 @@
+"""resilience（サーキットブレーカー・選択的な再試行・タイムアウト・ヘッジ・ストリームの再試行）"""
+import time
+
+import pytest
+
+from resilience import CallTimeoutError, CircuitBreaker, CircuitOpenError, ResilientCaller, is_transient
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def make_caller(**kwargs):
+    kwargs.setdefault("base_delay", 0.0)
+    kwargs.setdefault("timeout", 2.0)
+    return ResilientCaller(**kwargs)
+
+
+def flaky(errors, result="ok"):
+    """errors を順に送出し、尽きたら result を返す関数と呼び出し回数"""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return fn, calls
+
+
+def test_breaker_opens_after_threshold_and_rejects_while_open():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60.0)
+    breaker.before_call()
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.open_count == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_breaker_closes_on_success_and_reopens_on_failure():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_success()
+    breaker.before_call()
+    assert breaker.failures == 0
+
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.open_count == 3
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_transient_classification():
+    assert is_transient(TimeoutError())
+    assert is_transient(ConnectionError())
+    assert is_transient(HTTPError(429))
+    assert is_transient(HTTPError(503))
+    assert not is_transient(HTTPError(400))
+    assert not is_transient(HTTPError(401))
+    assert not is_transient(ValueError("bad json"))
+
+
+def test_transient_errors_are_retried():
+    caller = make_caller(max_attempts=3)
+    fn, calls = flaky([HTTPError(503), ConnectionError()])
+    assert caller.call(fn) == "ok"
+    assert len(calls) == 3
+    assert caller.stats()["retries"] == 2
+
+
+def test_non_transient_errors_fail_fast_without_tripping_breaker():
+    breaker = CircuitBreaker(failure_threshold=1)
+    caller = make_caller(max_attempts=3, breaker=breaker)
+    fn, calls = flaky([HTTPError(400)])
+    with pytest.raises(HTTPError):
+        caller.call(fn)
+    assert len(calls) == 1
+    assert caller.stats()["non_retryable"] == 1
+    breaker.before_call()
+
+
+def test_slow_call_raises_call_timeout():
+    caller = make_caller(timeout=0.05, max_attempts=1)
+    with pytest.raises(CallTimeoutError):
+        caller.call(time.sleep, 1.0)
+    assert caller.stats()["timeouts"] == 1
+
+
+def test_hedge_wins_when_primary_is_slow():
+    caller = make_caller(hedge=True, hedge_min_samples=1)
+    caller._latencies = [0.01]
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(1.0)
+            return "primary"
+        return "hedge"
+    assert caller.call(fn) == "hedge"
+    assert caller.stats()["hedge_wins"] == 1
+
+
+def test_stream_reopens_until_first_chunk_then_does_not_retry():
+    caller = make_caller(max_attempts=3)
+    opened = []
+
+    def open_stream(prompt):
+        opened.append(prompt)
+        if len(opened) == 1:
+            raise HTTPError(503)
+        yield "a"
+        yield "b"
+        raise ConnectionError("dropped")
+
+    chunks = []
+    with pytest.raises(ConnectionError):
+        for chunk in caller.stream(open_stream, "p", idle_timeout=1.0):
+            chunks.append(chunk)
+    assert chunks == ["a", "b"]
+    assert opened == ["p", "p"]
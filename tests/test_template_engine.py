@@ -0,0 +1,57 @@
+"""template_engine（コンパイル済みテンプレートとストリーミング置換）"""
+import html
+
+from template_engine import CompiledTemplate, StreamingRenderer, load_template, placeholder_variants_pattern
+
+
+def replace_all(text, values, escaped=()):
+    """置き換え前の方式（プレースホルダーごとに str.replace）"""
+    for name, value in values.items():
+        value = str(value)
+        text = text.replace(f"{{{name}}}", html.escape(value) if name in escaped else value)
+    return text
+
+
+TEMPLATE = """<html><head><title>{TITLE}</title>
+<style>body { color: red; } .a{b:c}</style>
+<script>const x = `${value}`; if (a) { run(); }</script></head>
+<body data-id="{ID}"><h1>{TITLE}</h1>{CONTENT}<footer>{GEN_COUNT} / {UNKNOWN}</footer></body></html>"""
+
+
+def test_render_matches_str_replace():
+    values = {"TITLE": "Morning <Edition>", "ID": "2026-01-01_0900", "CONTENT": "<p>a & b</p>", "GEN_COUNT": 12}
+    rendered = CompiledTemplate(TEMPLATE).render(values, escaped={"TITLE"})
+    assert rendered == replace_all(TEMPLATE, values, escaped={"TITLE"})
+    assert "<title>Morning &lt;Edition&gt;</title>" in rendered
+    assert "<p>a & b</p>" in rendered
+    assert "{UNKNOWN}" in rendered
+
+
+def test_values_are_not_rescanned_for_placeholders():
+    rendered = CompiledTemplate("{A}-{B}").render({"A": "{B}", "B": "x"})
+    assert rendered == "{B}-x"
+
+
+def test_names_and_template_cache(tmp_path):
+    path = tmp_path / "TEMPLATE.html"
+    path.write_text(TEMPLATE, encoding="utf-8")
+    template = load_template(str(path))
+    assert template.names == {"TITLE", "ID", "CONTENT", "GEN_COUNT", "UNKNOWN"}
+    assert load_template(str(path)) is template
+
+
+def split_every(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_streaming_renderer_matches_whole_render_at_any_chunk_size():
+    names = ("TITLE", "TOTAL_TIME")
+    text = "<h1>{{ TITLE }}</h1>" + "x" * 150 + "<p>{TITLE} in {{TOTAL_TIME}}s</p>{OTHER}"
+    expected = "<h1>A &amp; B</h1>" + "x" * 150 + "<p>A &amp; B in 1.5s</p>{OTHER}"
+    for size in (1, 3, 7, 64, len(text)):
+        renderer = StreamingRenderer(
+            placeholder_variants_pattern(names), {"TITLE": "A & B"}, deferred={"TOTAL_TIME"}, escaped={"TITLE"}
+        )
+        written = "".join(renderer.feed(chunk) for chunk in split_every(text, size)) + renderer.flush()
+        assert written == expected.replace("1.5", "{{TOTAL_TIME}}")
+        assert renderer.finish({"TOTAL_TIME": 1.5}) == expected
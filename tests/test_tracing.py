@@ -0,0 +1,55 @@
+"""tracing.Tracer（スパンの記録と Chrome トレース形式での書き出し）"""
+import json
+import threading
+
+import pytest
+
+from tracing import Tracer
+
+
+def spans(trace):
+    return {e['name']: e for e in trace['traceEvents'] if e['ph'] == 'X'}
+
+
+def test_nested_spans_and_args():
+    tracer = Tracer()
+
+    @tracer.traced("outer")
+    def outer():
+        with tracer.span("inner", "io", path="a.html") as span:
+            span['bytes'] = 10
+
+    outer()
+    events = spans(tracer.to_chrome_trace())
+    outer_event, inner_event = events['outer'], events['inner']
+    assert inner_event['args'] == {'path': "a.html", 'bytes': 10}
+    assert inner_event['cat'] == "io"
+    assert outer_event['ts'] <= inner_event['ts']
+    assert inner_event['ts'] + inner_event['dur'] <= outer_event['ts'] + outer_event['dur'] + 0.1
+
+
+def test_failed_span_records_error():
+    tracer = Tracer()
+    with pytest.raises(ValueError):
+        with tracer.span("parse"):
+            raise ValueError("bad")
+    assert spans(tracer.to_chrome_trace())['parse']['args'] == {'error': "ValueError: bad"}
+
+
+def test_threads_get_their_own_rows(tmp_path):
+    tracer = Tracer()
+    with tracer.span("main"):
+        pass
+    worker = threading.Thread(target=lambda: tracer.record("feed", "feed", 0, 5), name="feed-worker")
+    worker.start()
+    worker.join()
+
+    path = tmp_path / "data" / "run.trace.json"
+    assert tracer.write(str(path), {'id': "run"}) == 2
+    trace = json.loads(path.read_text(encoding="utf-8"))
+    assert trace['otherData'] == {'id': "run"}
+    events = spans(trace)
+    assert events['main']['tid'] != events['feed']['tid']
+    thread_names = {e['tid']: e['args']['name'] for e in trace['traceEvents'] if e['name'] == "thread_name"}
+    assert thread_names[events['feed']['tid']] == "feed-worker"
+    assert [e['name'] for e in tracer.slowest(1, cat="feed")] == ["feed"]